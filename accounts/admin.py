@@ -1,4 +1,9 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from moderation.admin import BatchedDeletionAdminMixin
+
 from .models import Profile
 
 
@@ -6,3 +11,11 @@ from .models import Profile
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'display_name', 'created_at')
     search_fields = ('user__username', 'display_name')
+
+
+admin.site.unregister(get_user_model())
+
+
+@admin.register(get_user_model())
+class UserAdmin(BatchedDeletionAdminMixin, BaseUserAdmin):
+    pass
@@ -0,0 +1,34 @@
+"""Async variants of the public profile views, served when running under ASGI."""
+from __future__ import annotations
+
+from django.contrib.auth.models import User
+from django.http import Http404
+
+from news.async_views import AsyncListMixin, aresolve_user
+
+from .views import PublicProfileView, UserPostsView
+
+
+class AsyncPublicProfileView(PublicProfileView):
+    async def get(self, request, *args, **kwargs):
+        await aresolve_user(request)
+        try:
+            self.object = await self.get_user_queryset().aget(username=self.kwargs['username'])
+        except User.DoesNotExist:
+            raise Http404
+        context = self.get_context_data(object=self.object)
+        return self.render_to_response(context)
+
+
+class AsyncUserPostsView(AsyncListMixin, UserPostsView):
+    async def get(self, request, *args, **kwargs):
+        try:
+            self.author = await User.objects.select_related('profile', 'author_stats').aget(
+                username=self.kwargs['username']
+            )
+        except User.DoesNotExist:
+            raise Http404
+        return await super().get(request, *args, **kwargs)
+
+    def get_author(self) -> User:
+        return self.author
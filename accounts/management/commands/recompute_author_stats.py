@@ -0,0 +1,25 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from accounts.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Recompute author statistics (posts, likes received, comments) in batches of users.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        total = 0
+        last_id = 0
+        while True:
+            ids = list(
+                User.objects.filter(id__gt=last_id).order_by('id').values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+            total += AuthorStats.recompute(ids)
+            last_id = ids[-1]
+        self.stdout.write(self.style.SUCCESS(f'Author stats recomputed for {total} users.'))
@@ -0,0 +1,52 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def populate_author_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Post = apps.get_model('news', 'Post')
+    Like = apps.get_model('news', 'Like')
+    Comment = apps.get_model('news', 'Comment')
+    AuthorStats = apps.get_model('accounts', 'AuthorStats')
+    posts = dict(Post.objects.filter(status='published').values_list('author_id').annotate(n=Count('id')).order_by())
+    likes = dict(Like.objects.values_list('post__author_id').annotate(n=Count('id')).order_by())
+    comments = dict(Comment.objects.values_list('author_id').annotate(n=Count('id')).order_by())
+    AuthorStats.objects.bulk_create(
+        [
+            AuthorStats(
+                user_id=user_id,
+                posts_count=posts.get(user_id, 0),
+                likes_received=likes.get(user_id, 0),
+                comments_count=comments.get(user_id, 0),
+            )
+            for user_id in User.objects.values_list('id', flat=True).iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('accounts', '0001_initial'),
+        ('news', '0003_post_archive_month'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+                ('likes_received', models.PositiveIntegerField(default=0)),
+                ('comments_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(populate_author_stats, migrations.RunPython.noop),
+    ]
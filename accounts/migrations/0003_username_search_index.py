@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# The admin finds users by a case-insensitive username prefix (istartswith):
+# UPPER(username) LIKE UPPER(%s) on PostgreSQL, which needs an expression index
+# with pattern ops, and LIKE on SQLite, which needs a NOCASE index.
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_upper_idx '
+            'ON auth_user (UPPER(username::text) text_pattern_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS auth_user_username_nocase_idx ON auth_user (username COLLATE NOCASE)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS auth_user_username_upper_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP INDEX IF EXISTS auth_user_username_nocase_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('accounts', '0002_author_stats'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+from collections import Counter
+from typing import Iterable
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
 from django.dispatch import receiver
 
+from news.models import Comment, Like, Post
+from news.signals import post_published, post_unpublished, posts_unpublished
+
 
 class Profile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='profile')
@@ -20,7 +28,119 @@ class Profile(models.Model):
         return self.display_name or self.user.username
 
 
+class AuthorStats(models.Model):
+    """Counters shown on profiles and bylines, kept up to date incrementally.
+
+    ``posts_count`` counts published posts, ``likes_received`` likes on the
+    author's posts and ``comments_count`` comments the user wrote.
+    ``manage.py recompute_author_stats`` rebuilds them in batches.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='author_stats'
+    )
+    posts_count = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"Stats for {self.user_id}"
+
+    @classmethod
+    def bump(cls, user_id: int, field: str, delta: int) -> None:
+        updated = cls.objects.filter(user_id=user_id).update(**{field: Greatest(F(field) + delta, 0)})
+        if not updated and delta > 0:
+            # no row yet (user created before stats existed): compute it exactly
+            cls.recompute([user_id])
+
+    @classmethod
+    def recompute(cls, user_ids: Iterable[int]) -> int:
+        user_ids = list(user_ids)
+        posts = dict(
+            Post.objects.filter(author_id__in=user_ids, status=Post.Status.PUBLISHED)
+            .values_list('author_id').annotate(n=Count('id')).order_by()
+        )
+        likes = dict(
+            Like.objects.filter(post__author_id__in=user_ids)
+            .values_list('post__author_id').annotate(n=Count('id')).order_by()
+        )
+        comments = dict(
+            Comment.objects.filter(author_id__in=user_ids)
+            .values_list('author_id').annotate(n=Count('id')).order_by()
+        )
+        rows = [
+            cls(
+                user_id=user_id,
+                posts_count=posts.get(user_id, 0),
+                likes_received=likes.get(user_id, 0),
+                comments_count=comments.get(user_id, 0),
+            )
+            for user_id in user_ids
+        ]
+        cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=['posts_count', 'likes_received', 'comments_count', 'updated_at'],
+        )
+        return len(rows)
+
+
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance: User, created: bool, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+        AuthorStats.objects.create(user=instance)
+
+
+@receiver(post_published, sender=Post)
+def count_author_post(sender, post: Post, **kwargs):
+    AuthorStats.bump(post.author_id, 'posts_count', 1)
+
+
+@receiver(post_unpublished, sender=Post)
+def uncount_author_post(sender, post: Post, **kwargs):
+    AuthorStats.bump(post.author_id, 'posts_count', -1)
+
+
+@receiver(posts_unpublished, sender=Post)
+def uncount_author_posts(sender, posts: list, **kwargs):
+    for author_id, n in Counter(post.author_id for post, _ in posts).items():
+        AuthorStats.bump(author_id, 'posts_count', -n)
+
+
+@receiver(post_save, sender=Like)
+def count_like_received(sender, instance: Like, created: bool, **kwargs):
+    if created:
+        AuthorStats.bump(instance.post.author_id, 'likes_received', 1)
+
+
+@receiver(pre_delete, sender=Post)
+def uncount_likes_of_deleted_post(sender, instance: Post, origin=None, **kwargs):
+    # the post's likes go in the same cascade: one bump here instead of a
+    # post lookup and a bump per like in uncount_like_received
+    if origin is None:
+        return
+    likes = Like.objects.filter(post_id=instance.pk).count()
+    if likes:
+        AuthorStats.bump(instance.author_id, 'likes_received', -likes)
+    origin.__dict__.setdefault('_deleted_post_ids', set()).add(instance.pk)
+
+
+@receiver(post_delete, sender=Like)
+def uncount_like_received(sender, instance: Like, origin=None, **kwargs):
+    if instance.post_id in getattr(origin, '_deleted_post_ids', ()):
+        return
+    AuthorStats.bump(instance.post.author_id, 'likes_received', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_comment(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        AuthorStats.bump(instance.author_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def uncount_comment(sender, instance: Comment, **kwargs):
+    AuthorStats.bump(instance.author_id, 'comments_count', -1)
@@ -1,9 +1,13 @@
+from django.conf import settings
 from django.urls import path, include
 from allauth.account import views as allauth_views
 from django.contrib.auth.views import LogoutView
 
 from .views import ProfileEditView, PublicProfileView, UserPostsView
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import AsyncPublicProfileView as PublicProfileView, AsyncUserPostsView as UserPostsView
+
 urlpatterns = [
     # allauth views with our URLs for backward compatibility
     path('accounts/login/', allauth_views.LoginView.as_view(template_name='accounts/login.html'), name='login'),
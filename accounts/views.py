@@ -43,23 +43,35 @@ class ProfileEditView(LoginRequiredMixin, UpdateView):
 
 class PublicProfileView(DetailView):
     template_name = 'accounts/profile_public.html'
+    read_from_replica = True
     context_object_name = 'profile_user'
 
+    def get_user_queryset(self):
+        # user, profile and stats in a single query
+        return User.objects.select_related('profile', 'author_stats')
+
     def get_object(self, queryset=None):
-        username = self.kwargs['username']
-        return get_object_or_404(User, username=username)
+        return get_object_or_404(self.get_user_queryset(), username=self.kwargs['username'])
 
 
 class UserPostsView(ListView):
     template_name = 'accounts/user_posts.html'
+    read_from_replica = True
     context_object_name = 'posts'
     paginate_by = 10
 
+    def get_author(self) -> User:
+        return get_object_or_404(User.objects.select_related('profile', 'author_stats'), username=self.kwargs['username'])
+
     def get_queryset(self):
-        username = self.kwargs['username']
-        user = get_object_or_404(User, username=username)
+        self.author = self.get_author()
         return (
-            Post.objects.filter(author=user, status=Post.Status.PUBLISHED)
+            Post.objects.filter(author=self.author, status=Post.Status.PUBLISHED)
             .select_related('author')
             .order_by('-published_at')
         )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['profile_user'] = self.author
+        return context
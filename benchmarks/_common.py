@@ -0,0 +1,229 @@
+"""Shared helpers for the benchmark scripts.
+
+Each benchmark runs against a throwaway SQLite database seeded through the
+regular models, starts real gunicorn processes on a free local port and hits
+them with a small threaded HTTP load generator. Memory figures are read from
+/proc, so the scripts are Linux-only.
+
+Static files are served through the manifest storage, so run
+``python manage.py collectstatic --noinput`` once before benchmarking.
+"""
+from __future__ import annotations
+
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Iterable, Optional
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+SEED_SCRIPT = r'''
+import json, random, sys
+import django
+django.setup()
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.backends.db import SessionStore
+from accounts.models import Profile
+from news.models import Post, Comment, Like
+
+posts, users, comments_per_post = (int(x) for x in sys.argv[1:4])
+random.seed(42)
+password = make_password('bench-password')
+User.objects.bulk_create([User(username=f'bench{i}', password=password) for i in range(users)])
+authors = list(User.objects.filter(username__startswith='bench').order_by('id'))
+Profile.objects.bulk_create([Profile(user=u) for u in authors])
+urls, sessions = [], []
+for i in range(posts):
+    post = Post.objects.create(
+        title=f'Patch notes {i}', summary='bench', body='<p>' + 'lorem ipsum ' * 200 + '</p>',
+        author=random.choice(authors), status=Post.Status.PUBLISHED,
+    )
+    for j in range(comments_per_post):
+        Comment.objects.create(post=post, author=random.choice(authors), body=f'comment {j}')
+    for user in random.sample(authors, min(len(authors), 5)):
+        Like.objects.create(post=post, user=user)
+    urls.append(post.get_absolute_url())
+for user in authors:
+    session = SessionStore()
+    session['_auth_user_id'] = str(user.pk)
+    session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+    session['_auth_user_hash'] = user.get_session_auth_hash()
+    session.create()
+    sessions.append(session.session_key)
+print(json.dumps({'posts': urls, 'users': [u.username for u in authors], 'sessions': sessions}))
+'''
+
+
+def bench_env(db_path: Path, **extra: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        'DJANGO_SETTINGS_MODULE': 'myproject.settings',
+        'DATABASE_URL': '',
+        'SQLITE_PATH': str(db_path),
+        'DEBUG': 'false',
+        'SECURE_SSL_REDIRECT': 'false',
+        'ALLOWED_HOSTS': '*',
+        'PYTHONPATH': str(BASE_DIR),
+    })
+    env.update(extra)
+    return env
+
+
+def ensure_collectstatic() -> None:
+    if not (BASE_DIR / 'staticfiles' / 'staticfiles.json').exists():
+        sys.exit('staticfiles manifest is missing: run `python manage.py collectstatic --noinput` first')
+
+
+def setup_database(env: dict, posts: int = 200, users: int = 50, comments_per_post: int = 5) -> dict:
+    """Migrates and seeds a fresh database; returns post URLs, usernames and session keys."""
+    subprocess.run(
+        [sys.executable, 'manage.py', 'migrate', '--noinput'],
+        env=env, cwd=BASE_DIR, check=True, stdout=subprocess.DEVNULL,
+    )
+    out = subprocess.run(
+        [sys.executable, '-c', SEED_SCRIPT, str(posts), str(users), str(comments_per_post)],
+        env=env, cwd=BASE_DIR, check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class Server:
+    """A gunicorn process running in the background for the duration of a ``with`` block."""
+
+    def __init__(self, app: str, env: dict, workers: int = 2, extra_args: Iterable[str] = ()):
+        self.port = free_port()
+        self.base_url = f'http://127.0.0.1:{self.port}'
+        self.cmd = [
+            sys.executable, '-m', 'gunicorn', app,
+            '--workers', str(workers),
+            '--bind', f'127.0.0.1:{self.port}',
+            '--log-level', 'warning',
+            *extra_args,
+        ]
+        self.env = env
+        self.process: Optional[subprocess.Popen] = None
+
+    def __enter__(self) -> 'Server':
+        self.process = subprocess.Popen(self.cmd, env=self.env, cwd=BASE_DIR)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                urllib.request.urlopen(self.base_url + '/', timeout=5).read()
+                return self
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError(f'server did not start: {" ".join(self.cmd)}')
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+
+    def rss_kb(self) -> int:
+        """Resident memory of the gunicorn master and all of its workers."""
+        pids = {self.process.pid}
+        for entry in Path('/proc').iterdir():
+            if not entry.name.isdigit():
+                continue
+            try:
+                fields = (entry / 'stat').read_text().rsplit(')', 1)[1].split()
+            except OSError:
+                continue
+            if int(fields[1]) == self.process.pid:
+                pids.add(int(entry.name))
+        total = 0
+        for pid in pids:
+            try:
+                for line in Path(f'/proc/{pid}/status').read_text().splitlines():
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+            except OSError:
+                continue
+        return total
+
+
+def request(url: str, data: Optional[bytes] = None, headers: Optional[dict] = None) -> int:
+    req = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            resp.read()
+            return resp.status
+    except urllib.error.HTTPError as exc:
+        return exc.code
+
+
+def run_load(targets, concurrency: int, duration: float) -> dict:
+    """Hits ``targets`` from ``concurrency`` threads for ``duration`` seconds.
+
+    ``targets`` is a list of ``(url, data, headers)`` tuples (``data=None`` means GET);
+    threads walk it round-robin from different offsets.
+    """
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker(offset: int) -> None:
+        nonlocal errors
+        local, local_errors, i = [], 0, offset
+        while time.monotonic() < stop_at:
+            url, data, headers = targets[i % len(targets)]
+            i += 1
+            started = time.perf_counter()
+            status = request(url, data, headers)
+            local.append(time.perf_counter() - started)
+            if status >= 400:
+                local_errors += 1
+        with lock:
+            latencies.extend(local)
+            errors += local_errors
+
+    threads = [threading.Thread(target=worker, args=(n * 7,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+
+    def pct(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / duration,
+        'p50_ms': pct(0.50),
+        'p95_ms': pct(0.95),
+        'p99_ms': pct(0.99),
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def print_table(rows: list[dict], columns: list[str]) -> None:
+    widths = {c: max(len(c), *(len(_fmt(r.get(c))) for r in rows)) for c in columns}
+    print('  '.join(c.ljust(widths[c]) for c in columns))
+    for row in rows:
+        print('  '.join(_fmt(row.get(c)).ljust(widths[c]) for c in columns))
+
+
+def _fmt(value) -> str:
+    if isinstance(value, float):
+        return f'{value:.1f}'
+    return '' if value is None else str(value)
@@ -0,0 +1,56 @@
+"""Concurrent-reader throughput and memory: sync WSGI workers vs. async views under uvicorn workers.
+
+    python manage.py collectstatic --noinput
+    python -m benchmarks.read_path --workers 2 --concurrency 32 --duration 15
+
+Both modes serve the same seeded SQLite database and the same mix of feed,
+post detail, profile and user-posts URLs.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from ._common import Server, bench_env, ensure_collectstatic, print_table, run_load, setup_database
+
+MODES = {
+    'wsgi': ('myproject.wsgi', []),
+    'asgi': ('myproject.asgi:application', ['--worker-class', 'uvicorn.workers.UvicornWorker']),
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['wsgi', 'asgi'])
+    args = parser.parse_args()
+    ensure_collectstatic()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'bench.sqlite3'
+        seed = setup_database(bench_env(db_path), posts=args.posts)
+        paths = ['/', '/?page=2', '/interesting/', '/top/week/']
+        paths += seed['posts'][:50]
+        for username in seed['users'][:10]:
+            paths += [f'/u/{username}/', f'/u/{username}/posts/']
+
+        rows = []
+        for mode in args.modes:
+            app, extra = MODES[mode]
+            env = bench_env(db_path, SERVER_MODE=mode)
+            with Server(app, env, workers=args.workers, extra_args=extra) as server:
+                targets = [(server.base_url + path, None, None) for path in paths]
+                run_load(targets, concurrency=4, duration=2)  # warm-up
+                result = run_load(targets, concurrency=args.concurrency, duration=args.duration)
+                result.update(mode=mode, rss_mb=server.rss_kb() / 1024)
+                rows.append(result)
+
+    print_table(rows, ['mode', 'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms', 'rss_mb'])
+
+
+if __name__ == '__main__':
+    main()
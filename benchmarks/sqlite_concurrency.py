@@ -0,0 +1,85 @@
+"""Concurrent reads and like/comment writes on SQLite across several gunicorn workers.
+
+    python manage.py collectstatic --noinput
+    python -m benchmarks.sqlite_concurrency --workers 4 --readers 16 --writers 8 --duration 15
+
+Runs the same load against the stock SQLite backend and against
+SQLITE_PRODUCTION_MODE (WAL, tuned pragmas, BEGIN IMMEDIATE). Write errors
+are mostly "database is locked" 500s; reader latency shows how much readers
+are blocked behind writers.
+"""
+from __future__ import annotations
+
+import argparse
+import tempfile
+import threading
+import urllib.parse
+from pathlib import Path
+
+from ._common import Server, bench_env, ensure_collectstatic, print_table, run_load, setup_database
+
+CSRF_TOKEN = 'b' * 32
+
+MODES = {
+    'default': {},
+    'production': {'SQLITE_PRODUCTION_MODE': 'true'},
+}
+
+
+def write_targets(base_url: str, seed: dict) -> list:
+    targets = []
+    for i, session_key in enumerate(seed['sessions']):
+        headers = {
+            'Cookie': f'sessionid={session_key}; csrftoken={CSRF_TOKEN}',
+            'X-CSRFToken': CSRF_TOKEN,
+            'Content-Type': 'application/x-www-form-urlencoded',
+        }
+        post_url = base_url + seed['posts'][i % len(seed['posts'])]
+        targets.append((post_url + 'like/', b'', headers))
+        body = urllib.parse.urlencode({'body': f'bench comment {i}'}).encode()
+        targets.append((post_url + 'comment/', body, headers))
+    return targets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=16)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=15.0)
+    parser.add_argument('--posts', type=int, default=100)
+    parser.add_argument('--modes', nargs='+', choices=sorted(MODES), default=['default', 'production'])
+    args = parser.parse_args()
+    ensure_collectstatic()
+
+    rows = []
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = bench_env(Path(tmp) / 'bench.sqlite3', **MODES[mode])
+            seed = setup_database(env, posts=args.posts)
+            with Server('myproject.wsgi', env, workers=args.workers) as server:
+                reads = [(server.base_url + path, None, None) for path in ['/', '/interesting/', *seed['posts'][:30]]]
+                writes = write_targets(server.base_url, seed)
+                results = {}
+
+                def run(kind, targets, concurrency):
+                    results[kind] = run_load(targets, concurrency=concurrency, duration=args.duration)
+
+                threads = [
+                    threading.Thread(target=run, args=('read', reads, args.readers)),
+                    threading.Thread(target=run, args=('write', writes, args.writers)),
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+            for kind, result in results.items():
+                result.update(mode=mode, kind=kind)
+                rows.append(result)
+
+    print_table(rows, ['mode', 'kind', 'requests', 'errors', 'rps', 'p50_ms', 'p95_ms', 'p99_ms'])
+
+
+if __name__ == '__main__':
+    main()
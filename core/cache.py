@@ -0,0 +1,21 @@
+from django.core.cache.backends.locmem import LocMemCache
+
+from . import metrics
+
+_missing = object()
+
+
+class InstrumentedLocMemCache(LocMemCache):
+    """LocMemCache that counts hits and misses in core.metrics (``cache_requests_total``)."""
+
+    def __init__(self, name, params):
+        super().__init__(name, params)
+        self.metrics_name = params.get('OPTIONS', {}).get('METRICS_NAME', name)
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _missing, version=version)
+        if value is _missing:
+            metrics.inc('cache_requests_total', cache=self.metrics_name, result='miss')
+            return default
+        metrics.inc('cache_requests_total', cache=self.metrics_name, result='hit')
+        return value
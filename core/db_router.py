@@ -0,0 +1,124 @@
+"""Read-replica routing.
+
+When a ``replica`` database is configured, reads issued by views that set
+``read_from_replica = True`` (feeds, post detail, profiles) go to the replica;
+every other query - writes, sessions, moderation, admin - uses the primary.
+
+Reads fall back to the primary when:
+
+* the client wrote something within the last ``REPLICA_STICKY_SECONDS``
+  (``ReplicaRoutingMiddleware`` sets a short-lived cookie after each unsafe
+  request, so the redirect after a like or comment reads its own write);
+* the replica lags by more than ``REPLICA_MAX_LAG_SECONDS`` or is unreachable.
+"""
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+REPLICA_DB_ALIAS = 'replica'
+PRIMARY_PIN_COOKIE = 'primary_pin'
+
+# Only application data is served from the replica; sessions and auth bookkeeping
+# written during the same request must stay on the primary.
+REPLICA_APP_LABELS = {'news', 'accounts', 'auth'}
+
+_replica_reads: ContextVar[bool] = ContextVar('replica_reads', default=False)
+_pinned_to_primary: ContextVar[bool] = ContextVar('pinned_to_primary', default=False)
+
+_lag_checked_at = 0.0
+_lag_ok = True
+
+
+def replica_configured() -> bool:
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def replica_lag_seconds() -> Optional[float]:
+    """Replication delay reported by the replica, ``None`` if it cannot be queried."""
+    connection = connections[REPLICA_DB_ALIAS]
+    if connection.vendor != 'postgresql':
+        # local SQLite stand-in: the file is the replica, there is nothing to measure
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT CASE WHEN pg_is_in_recovery() "
+                "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+                "ELSE 0 END"
+            )
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        return None
+
+
+def replica_is_fresh() -> bool:
+    # checked at most every REPLICA_LAG_CHECK_SECONDS per process
+    global _lag_checked_at, _lag_ok
+    now = time.monotonic()
+    if now - _lag_checked_at >= settings.REPLICA_LAG_CHECK_SECONDS:
+        lag = replica_lag_seconds()
+        _lag_ok = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+        _lag_checked_at = now
+    return _lag_ok
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and not _pinned_to_primary.get()
+            and model._meta.app_label in REPLICA_APP_LABELS
+            and replica_configured()
+            and replica_is_fresh()
+        ):
+            return REPLICA_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaRoutingMiddleware:
+    """Scopes replica reads to views that opt in and pins recent writers to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        is_write = request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+        pinned_token = _pinned_to_primary.set(is_write or PRIMARY_PIN_COOKIE in request.COOKIES)
+        replica_token = _replica_reads.set(False)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_reads.reset(replica_token)
+            _pinned_to_primary.reset(pinned_token)
+        if is_write and response.status_code < 400 and replica_configured():
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite='Lax',
+                secure=settings.SESSION_COOKIE_SECURE,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_class = getattr(view_func, 'view_class', None)
+        if getattr(view_class, 'read_from_replica', False):
+            # reset in __call__; also covers rendering of lazy querysets in the template
+            _replica_reads.set(True)
+        return None
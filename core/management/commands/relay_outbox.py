@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver pending outbox events to the consumers of OUTBOX_CONSUMERS (all by default). '
+        'With --loop keeps polling; failed batches are retried from the same offset, and --prune '
+        'runs every --prune-interval seconds.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('consumers', nargs='*')
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--loop', action='store_true')
+        parser.add_argument('--interval', type=float, default=1.0)
+        parser.add_argument('--prune', action='store_true', help='then delete events every consumer has seen')
+        parser.add_argument('--prune-interval', type=float, default=3600.0)
+
+    def handle(self, *args, **options):
+        consumers = options['consumers'] or list(settings.OUTBOX_CONSUMERS)
+        unknown = set(consumers) - set(settings.OUTBOX_CONSUMERS)
+        if unknown:
+            raise CommandError(f"Unknown consumers: {', '.join(sorted(unknown))}")
+        sinks = {consumer: outbox.get_sink(consumer) for consumer in consumers}
+        pruned_at = None
+        while True:
+            failed = []
+            for consumer, sink in sinks.items():
+                try:
+                    delivered = outbox.relay(consumer, sink, options['batch_size'])
+                except Exception as exc:
+                    failed.append(consumer)
+                    self.stderr.write(f'{consumer}: {exc!r} (stopped at #{outbox.offset(consumer)})')
+                    continue
+                if delivered or not options['loop']:
+                    self.stdout.write(f'{consumer}: {delivered} events, at #{outbox.offset(consumer)}')
+            if options['prune'] and (pruned_at is None or time.monotonic() - pruned_at >= options['prune_interval']):
+                self.stdout.write(f'Pruned {outbox.prune()} events.')
+                pruned_at = time.monotonic()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        if failed:
+            raise CommandError(f"Delivery failed for: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS('Outbox relayed.'))
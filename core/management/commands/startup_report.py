@@ -0,0 +1,68 @@
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import warmup
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(output: str) -> list[tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every line of ``python -X importtime`` output."""
+    rows = []
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            rows.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Report where process start-up time goes: import cost per package and module '
+        '(python -X importtime, in a fresh interpreter) and the duration of each warm-up step.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument('--skip-warmup', action='store_true', help='Only measure imports')
+
+    def handle(self, *args, **options):
+        application = settings.WSGI_APPLICATION.rsplit('.', 1)[0]
+        code = (
+            'import os; '
+            f'os.environ.setdefault("DJANGO_SETTINGS_MODULE", "{os.environ["DJANGO_SETTINGS_MODULE"]}"); '
+            f'import {application}'
+        )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', code],
+            capture_output=True, text=True, cwd=settings.BASE_DIR,
+        )
+        if result.returncode != 0:
+            raise CommandError(f'importing {application} failed:\n{result.stderr[-2000:]}')
+        rows = parse_importtime(result.stderr)
+        total = sum(self_us for _, self_us, _ in rows)
+
+        by_package = Counter()
+        for module, self_us, _ in rows:
+            by_package[module.split('.')[0]] += self_us
+        limit = options['limit']
+        self.stdout.write(f'Importing {application}: {total / 1000:.0f} ms over {len(rows)} modules\n')
+        self.stdout.write(f"{'package':<32}{'self ms':>10}{'share':>8}")
+        for package, self_us in by_package.most_common(limit):
+            self.stdout.write(f'{package:<32}{self_us / 1000:>10.1f}{self_us / total:>8.1%}')
+
+        self.stdout.write(f"\n{'module':<48}{'cumulative ms':>14}")
+        for module, _, cumulative in sorted(rows, key=lambda row: -row[2])[:limit]:
+            self.stdout.write(f'{module:<48}{cumulative / 1000:>14.1f}')
+
+        if not options['skip_warmup']:
+            self.stdout.write(f"\n{'warm-up step':<32}{'ms':>10}")
+            for step, seconds in warmup.run().items():
+                self.stdout.write(f'{step:<32}{seconds * 1000:>10.1f}')
+        self.stdout.write(self.style.SUCCESS('Start-up report done.'))
@@ -0,0 +1,252 @@
+"""Process-local metrics registry rendered in the Prometheus text format.
+
+Counters and histograms live in memory. Under gunicorn every worker also
+writes its registry to ``METRICS_DIR`` (at most every
+``METRICS_FLUSH_SECONDS``, and at exit), and the ``/metrics`` endpoint sums
+those files with its own live registry, so a scrape sees all workers
+whichever one answers. Without ``METRICS_DIR`` only the answering process is
+reported. The files of workers that exited are folded into one by ``retire``.
+
+What is recorded:
+
+* ``http_requests_total`` and ``http_request_duration_seconds`` per URL
+  route, by ``MetricsMiddleware``;
+* ``db_queries_total`` / ``db_query_seconds_total`` per route and database,
+  by an execute wrapper installed on every connection;
+* ``cache_requests_total`` hits and misses, by core.cache.InstrumentedLocMemCache;
+* ``news_likes_total`` and ``news_comments_total`` writes, by news receivers.
+"""
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+# counters of exited workers, see retire()
+RETIRED = 'retired.json'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+_route = contextvars.ContextVar('metrics_route', default='other')
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(labels: dict) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counters: dict[tuple[str, Labels], float] = {}
+        # per series: one count per bucket, then sum and count
+        self.histograms: dict[tuple[str, Labels], list[float]] = {}
+        self.flushed_at = time.monotonic()
+        self.path: Optional[Path] = None
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        key = (name, _labels(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, _labels(labels))
+        with self.lock:
+            series = self.histograms.get(key)
+            if series is None:
+                series = self.histograms[key] = [0.0] * (len(BUCKETS) + 2)
+            index = bisect_left(BUCKETS, value)
+            if index < len(BUCKETS):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                'counters': [[name, list(labels), value] for (name, labels), value in self.counters.items()],
+                'histograms': [[name, list(labels), list(series)] for (name, labels), series in self.histograms.items()],
+            }
+
+    def flush(self) -> None:
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        if self.path is None:
+            # unique per process even when pids are reused after a worker restart
+            self.path = Path(directory) / f'{os.getpid()}-{time.time_ns()}.json'
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.snapshot()))
+        os.replace(tmp, self.path)
+        self.flushed_at = time.monotonic()
+
+    def maybe_flush(self) -> None:
+        if time.monotonic() - self.flushed_at >= settings.METRICS_FLUSH_SECONDS:
+            try:
+                self.flush()
+            except OSError:
+                pass
+
+
+registry = Registry()
+atexit.register(lambda: registry.flush())
+if hasattr(os, 'register_at_fork'):
+    # a preloaded gunicorn master must not hand its numbers to every worker
+    os.register_at_fork(after_in_child=registry.reset)
+
+
+def inc(name: str, value: float = 1, **labels) -> None:
+    registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    registry.observe(name, value, **labels)
+
+
+def _read(paths: Iterable[Path]) -> list[dict]:
+    snapshots = []
+    for path in paths:
+        try:
+            snapshots.append(json.loads(path.read_text()))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def _merge(snapshots: list[dict]) -> dict:
+    counters: dict[tuple, float] = {}
+    histograms: dict[tuple, list[float]] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = (name, tuple(map(tuple, labels)))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, series in snapshot['histograms']:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(key, [0.0] * len(series))
+            for i, value in enumerate(series):
+                merged[i] += value
+    return {'counters': counters, 'histograms': histograms}
+
+
+def collect() -> dict:
+    """This process's registry merged with the files of the other processes."""
+    snapshots = [registry.snapshot()]
+    directory = settings.METRICS_DIR
+    if directory and Path(directory).is_dir():
+        snapshots += _read(path for path in Path(directory).glob('*.json') if path != registry.path)
+    return _merge(snapshots)
+
+
+def retire(pid: int) -> None:
+    """Folds the files of an exited process into ``retired.json`` so totals keep counting it.
+
+    Called by the gunicorn master for every worker that exits (see
+    gunicorn.conf.py); without it the files of recycled workers pile up.
+    """
+    directory = settings.METRICS_DIR
+    if not directory:
+        return
+    paths = list(Path(directory).glob(f'{pid}-*.json'))
+    if not paths:
+        return
+    retired = Path(directory) / RETIRED
+    data = _merge(_read([retired, *paths]))
+    tmp = retired.with_suffix('.tmp')
+    tmp.write_text(json.dumps({
+        'counters': [[name, list(labels), value] for (name, labels), value in data['counters'].items()],
+        'histograms': [[name, list(labels), series] for (name, labels), series in data['histograms'].items()],
+    }))
+    os.replace(tmp, retired)
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ','.join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(data: dict) -> str:
+    lines = []
+    for name in sorted({name for name, _ in data['counters']}):
+        lines.append(f'# TYPE {name} counter')
+        for (series_name, labels), value in sorted(data['counters'].items()):
+            if series_name == name:
+                lines.append(f'{name}{_format_labels(labels)} {_number(value)}')
+    for name in sorted({name for name, _ in data['histograms']}):
+        lines.append(f'# TYPE {name} histogram')
+        for (series_name, labels), series in sorted(data['histograms'].items()):
+            if series_name != name:
+                continue
+            cumulative = 0.0
+            for bound, count in zip(BUCKETS, series):
+                cumulative += count
+                lines.append(f'{name}_bucket{_format_labels(labels + (("le", repr(bound)),))} {_number(cumulative)}')
+            lines.append(f'{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {_number(series[-1])}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {_number(series[-2])}')
+            lines.append(f'{name}_count{_format_labels(labels)} {_number(series[-1])}')
+    return '\n'.join(lines) + '\n'
+
+
+def _record_query(execute, sql, params, many, context):
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        alias = context['connection'].alias
+        route = _route.get()
+        registry.inc('db_queries_total', route=route, database=alias)
+        registry.inc('db_query_seconds_total', time.perf_counter() - started, route=route, database=alias)
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+class MetricsMiddleware:
+    """Times every request and labels it, and its queries, with the matched URL route."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        token = _route.set('unmatched')
+        try:
+            response = self.get_response(request)
+        finally:
+            route = _route.get()
+            _route.reset(token)
+        elapsed = time.perf_counter() - started
+        registry.inc('http_requests_total', route=route, method=request.method, status=response.status_code)
+        registry.observe('http_request_duration_seconds', elapsed, route=route, method=request.method)
+        registry.maybe_flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        _route.set('/' + match.route if match else 'unmatched')
+        return None
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxoffset',
+            name='gaps',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
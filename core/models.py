@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+
+class OutboxEvent(models.Model):
+    """A domain event written in the same transaction as the change it describes.
+
+    ``manage.py relay_outbox`` delivers events in ``id`` order to the
+    consumers of settings.OUTBOX_CONSUMERS (see core/outbox.py).
+    """
+
+    topic = models.CharField(max_length=50)
+    key = models.CharField(max_length=50)
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.topic} {self.key}"
+
+
+class OutboxOffset(models.Model):
+    """The last event id a consumer has acknowledged, and the lower ids still awaited (see core.outbox.Cursor)."""
+
+    consumer = models.CharField(max_length=50, primary_key=True)
+    last_event_id = models.BigIntegerField(default=0)
+    gaps = models.JSONField(default=dict, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.consumer} at #{self.last_event_id}"
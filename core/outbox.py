@@ -0,0 +1,218 @@
+"""Transactional outbox: domain events for bots, the search indexer and other consumers.
+
+Models call ``emit`` from receivers that run inside the transaction saving
+the change, so an event exists exactly when its change was committed. Topics:
+
+* ``post.published`` / ``post.unpublished`` (also sent when a listed post is deleted)
+* ``comment.created``
+* ``like.created`` / ``like.deleted``
+* ``moderation.action``
+
+``relay`` hands a consumer's pending events, oldest first, to its sink in
+batches and moves the consumer's offset only after the sink accepted the
+batch: delivery is at least once, so consumers deduplicate by event ``id``.
+Ids are allocated at insert, not at commit, so a transaction still in flight
+can commit a lower id after the offset has moved past it. The offset is
+therefore a ``Cursor``: ids skipped over are kept as gaps and looked for
+again on every run until ``OUTBOX_GAP_TIMEOUT_SECONDS`` pass.
+
+Consumers are configured like caches::
+
+    OUTBOX_CONSUMERS = {
+        'search': {'SINK': 'http', 'OPTIONS': {'url': 'http://indexer/events'}},
+        'archive': {'SINK': 'jsonl', 'OPTIONS': {'path': '/var/log/dotapost/events.jsonl'}},
+    }
+
+``SINK`` is ``http``, ``jsonl`` or the dotted path of a class taking the
+options as keyword arguments and having a ``send(events)`` method that raises
+when the batch was not accepted.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+import urllib.request
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboxEvent, OutboxOffset
+
+
+def emit(topic: str, key: str, payload: dict) -> OutboxEvent:
+    return OutboxEvent.objects.create(topic=topic, key=key, payload=payload)
+
+
+def emit_many(events: Iterable[tuple[str, str, dict]]) -> None:
+    OutboxEvent.objects.bulk_create(OutboxEvent(topic=topic, key=key, payload=payload) for topic, key, payload in events)
+
+
+def as_dict(event: OutboxEvent) -> dict:
+    return {
+        'id': event.pk,
+        'topic': event.topic,
+        'key': event.key,
+        'payload': event.payload,
+        'created_at': event.created_at,
+    }
+
+
+def encode(events: list[dict]) -> list[str]:
+    return [json.dumps(event, cls=DjangoJSONEncoder, ensure_ascii=False) for event in events]
+
+
+class JsonlSink:
+    """Appends one JSON object per line to a local file and fsyncs it."""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+
+    def send(self, events: list[dict]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('a', encoding='utf-8') as fh:
+            fh.write(''.join(line + '\n' for line in encode(events)))
+            fh.flush()
+            os.fsync(fh.fileno())
+
+
+class HttpSink:
+    """POSTs ``{"events": [...]}`` as JSON; any non-2xx answer or network error fails the batch."""
+
+    def __init__(self, url: str, timeout: float = 10, headers: Optional[dict] = None):
+        self.url = url
+        self.timeout = timeout
+        self.headers = headers or {}
+
+    def send(self, events: list[dict]) -> None:
+        body = ('{"events": [' + ', '.join(encode(events)) + ']}').encode()
+        request = urllib.request.Request(
+            self.url, data=body, method='POST', headers={'Content-Type': 'application/json', **self.headers}
+        )
+        # urlopen raises HTTPError for 4xx/5xx
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+SINKS = {'jsonl': JsonlSink, 'http': HttpSink}
+
+
+def get_sink(consumer: str):
+    config = settings.OUTBOX_CONSUMERS[consumer]
+    sink = SINKS.get(config['SINK']) or import_string(config['SINK'])
+    return sink(**config.get('OPTIONS', {}))
+
+
+class Cursor:
+    """A reader's place in a table whose ids may become visible out of order.
+
+    ``position`` is the highest id read; ``gaps`` maps the lower ids that were
+    missing when it was passed to the time they were first missed. A missing
+    id is usually a transaction that has not committed yet, sometimes one
+    that rolled back, and the two cannot be told apart: gaps are read again
+    until ``OUTBOX_GAP_TIMEOUT_SECONDS`` pass and only then given up on.
+    """
+
+    def __init__(self, position: int = 0, gaps: Optional[dict[int, float]] = None):
+        self.position = position
+        self.gaps = dict(gaps or {})
+
+    @classmethod
+    def at_end(cls, queryset: QuerySet) -> Cursor:
+        """Past the last row of ``queryset``; ids missing among its recent rows are gaps."""
+        recent = timezone.now() - timedelta(seconds=settings.OUTBOX_GAP_TIMEOUT_SECONDS)
+        ids = list(queryset.filter(created_at__gte=recent).order_by('pk').values_list('pk', flat=True))
+        if not ids:
+            return cls(queryset.aggregate(last=Max('pk'))['last'] or 0)
+        cursor = cls(ids[0] - 1)
+        cursor.advance(ids)
+        return cursor
+
+    def pending(self) -> Q:
+        """Filter for the rows not read yet: past ``position`` or in a gap still waited for."""
+        now = time.time()
+        self.gaps = {pk: seen for pk, seen in self.gaps.items() if now - seen < settings.OUTBOX_GAP_TIMEOUT_SECONDS}
+        pending = Q(pk__gt=self.position)
+        if self.gaps:
+            pending |= Q(pk__in=list(self.gaps))
+        return pending
+
+    def advance(self, ids: Iterable[int]) -> None:
+        """Mark ``ids`` as read."""
+        now = time.time()
+        for pk in sorted(ids):
+            if pk > self.position:
+                self.gaps.update(dict.fromkeys(range(self.position + 1, pk), now))
+                self.position = pk
+            else:
+                self.gaps.pop(pk, None)
+
+
+def cursor(consumer: str) -> Cursor:
+    stored = OutboxOffset.objects.filter(consumer=consumer).values_list('last_event_id', 'gaps').first()
+    if stored is None:
+        return Cursor()
+    position, gaps = stored
+    return Cursor(position, {int(pk): seen for pk, seen in gaps.items()})
+
+
+def save_cursor(consumer: str, position: Cursor) -> None:
+    OutboxOffset.objects.update_or_create(
+        consumer=consumer, defaults={'last_event_id': position.position, 'gaps': position.gaps}
+    )
+
+
+def offset(consumer: str) -> int:
+    return cursor(consumer).position
+
+
+def relay(consumer: str, sink=None, batch_size: Optional[int] = None, max_batches: Optional[int] = None) -> int:
+    """Deliver the consumer's pending events; returns how many were acknowledged.
+
+    A sink error propagates after the batches delivered so far were recorded.
+    """
+    sink = sink or get_sink(consumer)
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    delivered = batches = 0
+    position = cursor(consumer)
+    saved_gaps = dict(position.gaps)
+    while max_batches is None or batches < max_batches:
+        events = list(OutboxEvent.objects.filter(position.pending()).order_by('pk')[:batch_size])
+        if not events:
+            if position.gaps != saved_gaps:
+                # gaps given up on
+                save_cursor(consumer, position)
+            break
+        sink.send([as_dict(event) for event in events])
+        position.advance(event.pk for event in events)
+        save_cursor(consumer, position)
+        saved_gaps = dict(position.gaps)
+        delivered += len(events)
+        batches += 1
+    return delivered
+
+
+def prune(retention_days: Optional[int] = None) -> int:
+    """Delete events older than the retention that every configured consumer has acknowledged.
+
+    With no consumers configured nobody is waiting for the events, so the
+    retention alone decides.
+    """
+    retention_days = settings.OUTBOX_RETENTION_DAYS if retention_days is None else retention_days
+    consumers = list(settings.OUTBOX_CONSUMERS)
+    expired = OutboxEvent.objects.filter(created_at__lt=timezone.now() - timedelta(days=retention_days))
+    if consumers:
+        offsets = OutboxOffset.objects.filter(consumer__in=consumers)
+        if len(offsets) < len(consumers):
+            return 0
+        expired = expired.filter(pk__lte=offsets.aggregate(low=Min('last_event_id'))['low'])
+    with transaction.atomic():
+        deleted, _ = expired.delete()
+    return deleted
@@ -0,0 +1,41 @@
+"""Paginator that trusts planner estimates for very large result sets.
+
+``COUNT(*)`` has to visit every matching row, which on a table with millions
+of rows costs more than rendering the page itself. On PostgreSQL the planner
+already knows roughly how many rows a query returns (from ``pg_class`` /
+``ANALYZE`` statistics); when that estimate is at least
+``ADMIN_ESTIMATED_COUNT_THRESHOLD`` it is used as the count. Smaller results,
+and other databases, are counted exactly.
+"""
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset) -> Optional[int]:
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self) -> int:
+        if hasattr(self.object_list, 'query'):
+            estimate = estimated_count(self.object_list)
+            if estimate is not None and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD:
+                return estimate
+        return super().count
@@ -0,0 +1,45 @@
+"""SQLite backend for running production nodes on a single database file.
+
+Enabled with ``SQLITE_PRODUCTION_MODE=true`` (see settings). On top of the
+stock backend it:
+
+* applies the pragmas from ``OPTIONS['pragmas']`` to every new connection -
+  WAL journal so readers never block the writer, ``synchronous=NORMAL``
+  (durable in WAL mode except for the last transactions on power loss),
+  memory-mapped I/O, a busy timeout and a larger page cache;
+* opens transactions with ``BEGIN IMMEDIATE``. The write lock is taken up
+  front, so concurrent writers from several gunicorn workers queue on the
+  busy timeout one at a time instead of failing with "database is locked"
+  when a deferred transaction tries to upgrade its read lock.
+"""
+from __future__ import annotations
+
+from django.db.backends.sqlite3 import base
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,  # negative: KiB rather than pages
+    'temp_store': 'MEMORY',
+    'foreign_keys': 'ON',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        kwargs = super().get_connection_params()
+        # not a sqlite3.connect() argument
+        kwargs.pop('pragmas', None)
+        return kwargs
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        pragmas = {**DEFAULT_PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -1,3 +1,32 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views import View
+
+from . import metrics
+
+
+class MetricsView(View):
+    """Prometheus scrape target; pretends not to exist for everyone else.
+
+    A scraper sends ``Authorization: Bearer <METRICS_TOKEN>``. The address
+    allowlist only applies to direct connections: behind a proxy
+    ``REMOTE_ADDR`` is the proxy's, whoever the client is.
+    """
+
+    def allowed(self, request) -> bool:
+        token = settings.METRICS_TOKEN
+        if token and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return True
+        if 'X-Forwarded-For' in request.headers:
+            return False
+        return request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS
+
+    def get(self, request):
+        if not (self.allowed(request) or request.user.is_superuser):
+            raise Http404
+        return HttpResponse(
+            metrics.render(metrics.collect()),
+            content_type='text/plain; version=0.0.4; charset=utf-8',
+        )
@@ -0,0 +1,98 @@
+"""Work done once before serving, so the first requests of a worker are not slow.
+
+``run()`` is called by the gunicorn ``when_ready`` hook in gunicorn.conf.py.
+With ``preload_app`` it runs in the master process before workers are forked,
+so every worker starts with the imports done, templates compiled into the
+cached loader, the URL resolver populated and the per-process caches (local
+memory cache, typeahead index, blocked-word automaton) filled. Database
+connections opened here are closed again before the fork; each worker opens
+its own in ``post_fork``.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from pathlib import Path
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db import connections
+from django.template import TemplateDoesNotExist, TemplateSyntaxError
+from django.template.loader import get_template
+from django.test import RequestFactory
+from django.urls import get_resolver, resolve
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates() -> int:
+    """Loads every template under the TEMPLATES ``DIRS`` into the cached loader."""
+    compiled = 0
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        root = Path(directory)
+        for path in sorted(root.rglob('*.html')):
+            name = path.relative_to(root).as_posix()
+            try:
+                get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as exc:
+                logger.warning('warmup: template %s failed to compile: %s', name, exc)
+                continue
+            compiled += 1
+    return compiled
+
+
+def populate_urls() -> int:
+    resolver = get_resolver()
+    resolver.check()  # forces the lazy pattern/reverse dictionaries to be built
+    return len(resolver.reverse_dict)
+
+
+def render_pages() -> int:
+    """Renders ``WARMUP_URLS`` as an anonymous visitor, filling the fragment caches."""
+    factory = RequestFactory()
+    rendered = 0
+    for url in settings.WARMUP_URLS:
+        match = resolve(url)
+        request = factory.get(url)
+        request.user = AnonymousUser()
+        view = async_to_sync(match.func) if iscoroutinefunction(match.func) else match.func
+        response = view(request, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        rendered += 1
+    return rendered
+
+
+def fill_process_caches() -> None:
+    from moderation import wordfilter
+    from news import suggest
+
+    suggest.warm()
+    wordfilter.automaton()
+
+
+STEPS = [
+    ('templates', compile_templates),
+    ('urls', populate_urls),
+    ('pages', render_pages),
+    ('process caches', fill_process_caches),
+]
+
+
+def run() -> dict[str, float]:
+    """Runs every warm-up step and returns its duration in seconds; failures are logged, not raised."""
+    timings = {}
+    try:
+        for name, step in STEPS:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception:
+                logger.exception('warmup: step %s failed', name)
+            timings[name] = time.perf_counter() - started
+    finally:
+        # connections must not be shared with forked workers
+        connections.close_all()
+    logger.info('warmup: %s', ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in timings.items()))
+    return timings
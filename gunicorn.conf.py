@@ -0,0 +1,41 @@
+"""Gunicorn settings used by start.sh and the Procfile.
+
+With WARM_START on (the default) the application is imported once in the
+master and warmed up by core.warmup before workers are forked; see that
+module for what is preloaded.
+"""
+import os
+
+# bind and workers keep gunicorn's defaults ($PORT, $WEB_CONCURRENCY)
+errorlog = '-'
+preload_app = os.getenv('WARM_START', '1').lower() in ('1', 'true', 'yes', 'on')
+
+
+def when_ready(server):
+    if preload_app:
+        from core import warmup
+
+        warmup.run()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from django.db import connections
+
+        # open the worker's own connection now rather than on its first request
+        for connection in connections.all(initialized_only=False):
+            try:
+                connection.ensure_connection()
+            except Exception as exc:
+                server.log.warning('post_fork: could not connect to %s: %s', connection.alias, exc)
+
+
+def child_exit(server, worker):
+    # fold the exited worker's metrics file into the retired totals (see core.metrics.retire)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'myproject.settings')
+    from core import metrics
+
+    try:
+        metrics.retire(worker.pid)
+    except OSError as exc:
+        server.log.warning('child_exit: could not retire metrics of %s: %s', worker.pid, exc)
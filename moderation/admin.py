@@ -1,12 +1,87 @@
 from django.contrib import admin
 
-from .models import ModerationAction
+from core.admin import FastChangeListMixin
+
+from . import deletion
+from .models import BlockedWord, DeletionJob, ModerationAction
+
+
+class BatchedDeletionAdminMixin:
+    """Deletes through moderation.deletion instead of one cascading transaction.
+
+    Replaces the "delete selected" action; the object page's delete button
+    queues a job as well, and its confirmation page shows the row counts of
+    ``deletion.summary`` rather than collecting and listing the whole cascade.
+    """
+
+    actions = ['delete_in_batches']
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.action(description='Скрыть и удалить по частям', permissions=['delete'])
+    def delete_in_batches(self, request, queryset):
+        for obj in queryset:
+            deletion.request_deletion(obj, request.user)
+        self.message_user(request, f'Поставлено в очередь на удаление: {len(queryset)}.')
+
+    def get_deleted_objects(self, objs, request):
+        model_count: dict[str, int] = {}
+        for obj in objs:
+            for name, n in deletion.summary(obj).items():
+                model_count[name] = model_count.get(name, 0) + n
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return [str(obj) for obj in objs], model_count, perms_needed, []
+
+    def delete_model(self, request, obj):
+        deletion.request_deletion(obj, request.user)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            deletion.request_deletion(obj, request.user)
 
 
 @admin.register(ModerationAction)
-class ModerationActionAdmin(admin.ModelAdmin):
+class ModerationActionAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'target_type', 'target_id', 'action', 'moderator', 'created_at')
     list_filter = ('target_type', 'action', 'created_at')
-    search_fields = ('reason', 'moderator__username')
+    list_select_related = ('moderator',)
+    raw_id_fields = ('moderator',)
+    exact_search_fields = ('target_id',)
+    prefix_search_fields = ('moderator__username',)
+    trigram_search_fields = ('reason',)
+
+
+@admin.register(BlockedWord)
+class BlockedWordAdmin(admin.ModelAdmin):
+    list_display = ('phrase', 'is_active', 'created_at')
+    list_editable = ('is_active',)
+    list_filter = ('is_active',)
+    search_fields = ('phrase',)
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'target_type', 'target_id', 'label', 'status', 'step', 'deleted_rows', 'progress', 'created_at', 'finished_at')
+    list_filter = ('status', 'target_type')
+    search_fields = ('label',)
+    readonly_fields = [field.name for field in DeletionJob._meta.fields]
+    actions = ['retry']
+
+    def has_add_permission(self, request):
+        return False
 
+    @admin.display(description='Осталось')
+    def progress(self, job: DeletionJob) -> str:
+        if job.status in (DeletionJob.Status.DONE, DeletionJob.Status.FAILED):
+            return '—'
+        left = job.remaining_rows
+        total = left + job.deleted_rows
+        return f'{left} ({100 * job.deleted_rows // total if total else 100}% готово)'
 
+    @admin.action(description='Повторить упавшие')
+    def retry(self, request, queryset):
+        retried = queryset.filter(status=DeletionJob.Status.FAILED).update(status=DeletionJob.Status.PENDING, error='')
+        self.message_user(request, f'Повторно поставлено в очередь: {retried}.')
@@ -6,4 +6,8 @@ class ModerationConfig(AppConfig):
     name = 'moderation'
     verbose_name = 'Модерация'
 
+    def ready(self):
+        # connects the receiver that drops this process's blocked-word automaton
+        from . import wordfilter  # noqa: F401
+
 
@@ -0,0 +1,90 @@
+"""Handing queue items out to moderators so two of them never review the same one.
+
+Each moderator opening a queue gets up to ``MODERATION_CLAIM_BATCH`` items,
+highest priority first, as ``QueueClaim`` rows that expire after
+``MODERATION_CLAIM_LEASE_SECONDS``; reloading the page renews the lease and
+tops the batch up. An item is reviewed once a ``ModerationAction`` for it is
+newer than its last change, and it then leaves the queue.
+
+On PostgreSQL the candidates are read with ``SELECT ... FOR UPDATE SKIP
+LOCKED``, so moderators claiming at the same moment get disjoint batches
+instead of waiting on each other. Correctness does not depend on it: the
+claim rows are unique per item and inserted with ``ON CONFLICT DO NOTHING``,
+and a moderator only gets the rows that were actually written. That is all
+SQLite (which serializes writers anyway) relies on.
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from .models import ModerationAction, QueueClaim
+
+
+def undecided(queryset: QuerySet, target_type: str) -> QuerySet:
+    """Items without a moderation decision since their last change."""
+    decided = ModerationAction.objects.filter(
+        target_type=target_type, target_id=OuterRef('pk'), created_at__gte=OuterRef('updated_at')
+    )
+    return queryset.exclude(Exists(decided))
+
+
+def claim(user, target_type: str, candidates: QuerySet, batch_size: int | None = None) -> list[int]:
+    """Claim items of ``candidates`` (ordered by priority) for ``user``; returns all item ids they hold."""
+    batch_size = batch_size or settings.MODERATION_CLAIM_BATCH
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.MODERATION_CLAIM_LEASE_SECONDS)
+    claims = QueueClaim.objects.filter(target_type=target_type)
+    with transaction.atomic():
+        claims.filter(expires_at__lte=now).delete()
+        mine = claims.filter(moderator=user)
+        held = list(candidates.filter(pk__in=mine.values('target_id')).values_list('pk', flat=True))
+        mine.exclude(target_id__in=held).delete()
+        mine.update(expires_at=expires_at)
+        if len(held) < batch_size:
+            free = candidates.exclude(pk__in=claims.values('target_id'))
+            if connections[router.db_for_write(QueueClaim)].features.has_select_for_update_skip_locked:
+                free = free.select_for_update(skip_locked=True, of=('self',))
+            picked = list(free.values_list('pk', flat=True)[:batch_size - len(held)])
+            QueueClaim.objects.bulk_create(
+                [
+                    QueueClaim(target_type=target_type, target_id=pk, moderator=user, expires_at=expires_at)
+                    for pk in picked
+                ],
+                ignore_conflicts=True,
+            )
+        return list(mine.values_list('target_id', flat=True))
+
+
+def held_by_other(target_type: str, target_id: int, user) -> bool:
+    return (
+        QueueClaim.objects.filter(target_type=target_type, target_id=target_id, expires_at__gt=timezone.now())
+        .exclude(moderator=user)
+        .exists()
+    )
+
+
+def held_by_others(target_type: str, target_ids: Iterable[int], user) -> set[int]:
+    """Those of ``target_ids`` that another moderator holds a live claim on."""
+    return set(
+        QueueClaim.objects.filter(target_type=target_type, target_id__in=list(target_ids), expires_at__gt=timezone.now())
+        .exclude(moderator=user)
+        .values_list('target_id', flat=True)
+    )
+
+
+def release(target_type: str, target_ids: Iterable[int]) -> None:
+    QueueClaim.objects.filter(target_type=target_type, target_id__in=list(target_ids)).delete()
+
+
+def claimed_by_others(target_type: str, user) -> int:
+    return (
+        QueueClaim.objects.filter(target_type=target_type, expires_at__gt=timezone.now())
+        .exclude(moderator=user)
+        .count()
+    )
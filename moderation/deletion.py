@@ -0,0 +1,235 @@
+"""Deleting posts and users without one long cascading transaction.
+
+``request_deletion`` hides the target at once and records a ``DeletionJob``
+with an estimate of the rows to delete. A post, or every post and comment of
+a user, goes to the ``deleting`` status: off the listings, out of the
+moderation queues and no longer editable by its author. A user is also
+deactivated; their content is hidden with one UPDATE per table and the
+counters are fixed per batch (``posts_unpublished``), not per row.
+
+``advance`` then removes the dependent rows one batch per transaction, in an
+order that leaves little for the database cascade to do: likes, comments
+newest first (so replies go before the comments they answer), revisions, and
+finally the object itself. A user's posts are taken apart the same way, one
+post at a time, before the user's own likes and comments.
+
+Batches are deleted through ``Collector`` on loaded instances, so the usual
+post_delete receivers keep the counters (author stats, trending, tag and
+archive counts) and caches right, and related rows they read are fetched
+with the batch instead of one query per row.
+"""
+from __future__ import annotations
+
+import time
+from typing import Iterator, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+from django.db.models import Q, QuerySet
+from django.db.models.deletion import Collector
+from django.utils import timezone
+
+from news.models import Comment, Like, Post, PostRevision
+from news.signals import posts_unpublished
+
+from .models import DeletionJob
+
+User = get_user_model()
+
+# (step name, rows to delete, relations the delete receivers read)
+Step = tuple[str, QuerySet, tuple]
+
+
+def delete_batch(queryset: QuerySet, batch_size: int, select_related: tuple = ()) -> int:
+    """Delete up to ``batch_size`` rows of ``queryset``, highest pk first; returns rows removed."""
+    objs = list(queryset.select_related(*select_related).order_by('-pk')[:batch_size])
+    if not objs:
+        return 0
+    collector = Collector(using=router.db_for_write(queryset.model))
+    collector.collect(objs)
+    deleted, _ = collector.delete()
+    return deleted
+
+
+def post_steps(post_id: int) -> list[Step]:
+    return [
+        ('likes', Like.objects.filter(post_id=post_id), ('post',)),
+        ('comments', Comment.objects.filter(post_id=post_id), ()),
+        ('revisions', PostRevision.objects.filter(post_id=post_id), ()),
+        ('post', Post.objects.filter(pk=post_id), ()),
+    ]
+
+
+def user_steps(user_id: int) -> list[Step]:
+    return [
+        ('likes', Like.objects.filter(user_id=user_id), ('post',)),
+        # replies to the user's comments would otherwise go in the cascade
+        ('comments', Comment.objects.filter(Q(author_id=user_id) | Q(parent__author_id=user_id)), ()),
+        ('user', User.objects.filter(pk=user_id), ()),
+    ]
+
+
+def hide_post(post: Post) -> None:
+    if post.status != Post.Status.DELETING:
+        post.status = Post.Status.DELETING
+        post.save(update_fields=['status', 'updated_at'])
+
+
+def hide_user_content(user_id: int) -> None:
+    """Moves all the user's posts and comments to the deleting status, one UPDATE each."""
+    now = timezone.now()
+    posts = Post.objects.filter(author_id=user_id).exclude(status=Post.Status.DELETING)
+    # locked so none is published between reading and hiding them
+    listed = list(
+        posts.filter(status=Post.Status.PUBLISHED, published_at__isnull=False)
+        .select_for_update()
+        .only('pk', 'title', 'slug', 'author_id', 'status', 'published_at', 'created_at')
+    )
+    posts.update(status=Post.Status.DELETING, updated_at=now)
+    if listed:
+        posts_unpublished.send(sender=Post, posts=[(post, post.published_at) for post in listed])
+
+    comments = Comment.objects.filter(author_id=user_id).exclude(status=Comment.Status.DELETING)
+    # take back what the visible ones have left of their trending weight, one bump per post
+    weights: dict[int, float] = {}
+    for post_id, created_at in comments.filter(status=Comment.Status.VISIBLE).values_list('post_id', 'created_at'):
+        left = settings.TRENDING_COMMENT_WEIGHT * Post.trending_decay((now - created_at).total_seconds())
+        weights[post_id] = weights.get(post_id, 0.0) + left
+    comments.update(status=Comment.Status.DELETING, updated_at=now)
+    for post_id, weight in weights.items():
+        Post.bump_trending(post_id, -weight)
+
+
+def request_deletion(target, requested_by=None) -> DeletionJob:
+    """Hide a Post or User now and queue the rest; an unfinished job for the same target is reused."""
+    if isinstance(target, Post):
+        target_type, label = DeletionJob.TargetType.POST, target.title
+    else:
+        target_type, label = DeletionJob.TargetType.USER, target.get_username()
+    with transaction.atomic():
+        job = DeletionJob.objects.filter(
+            target_type=target_type,
+            target_id=target.pk,
+            status__in=[DeletionJob.Status.PENDING, DeletionJob.Status.RUNNING],
+        ).first()
+        if job is None:
+            job = DeletionJob(
+                target_type=target_type, target_id=target.pk, label=label[:200], requested_by=requested_by
+            )
+            job.remaining_rows = remaining(job)
+            job.save()
+        if target_type == DeletionJob.TargetType.POST:
+            hide_post(target)
+        else:
+            if target.is_active:
+                target.is_active = False
+                target.save(update_fields=['is_active'])
+            hide_user_content(target.pk)
+    return job
+
+
+def _next_step(job: DeletionJob) -> Optional[Step]:
+    if job.target_type == DeletionJob.TargetType.POST:
+        steps = post_steps(job.target_id)
+    else:
+        steps = []
+        # the user's posts, each taken apart like a deleted post
+        post_id = Post.objects.filter(author_id=job.target_id).order_by('pk').values_list('pk', flat=True).first()
+        if post_id:
+            steps += [(f'posts:{name}', queryset, related) for name, queryset, related in post_steps(post_id)]
+        steps += user_steps(job.target_id)
+    for step in steps:
+        if step[1].exists():
+            return step
+    return None
+
+
+def advance(job: DeletionJob, batch_size: Optional[int] = None) -> bool:
+    """Run one batch of ``job``; returns False once there is nothing left to delete."""
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    step = _next_step(job)
+    if step is None:
+        job.status = DeletionJob.Status.DONE
+        job.step = ''
+        job.remaining_rows = 0
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'step', 'remaining_rows', 'finished_at', 'updated_at'])
+        return False
+    name, queryset, related = step
+    with transaction.atomic():
+        deleted = delete_batch(queryset, batch_size, related)
+    job.status = DeletionJob.Status.RUNNING
+    job.step = name
+    job.deleted_rows += deleted
+    # cascaded rows (e.g. tag links) are not in the estimate
+    job.remaining_rows = max(job.remaining_rows - deleted, 0)
+    job.batches += 1
+    job.save(update_fields=['status', 'step', 'deleted_rows', 'remaining_rows', 'batches', 'updated_at'])
+    return True
+
+
+def _counted(target_type: str, target_id: int) -> list[QuerySet]:
+    if target_type == DeletionJob.TargetType.POST:
+        return [queryset for _, queryset, _ in post_steps(target_id)]
+    # rows under the user's own posts go with those posts, not in the user's steps
+    own = Q(post__author_id=target_id)
+    return [
+        Like.objects.filter(own),
+        Comment.objects.filter(own),
+        PostRevision.objects.filter(own),
+        Post.objects.filter(author_id=target_id),
+        Like.objects.filter(user_id=target_id).exclude(own),
+        Comment.objects.filter(Q(author_id=target_id) | Q(parent__author_id=target_id)).exclude(own),
+        User.objects.filter(pk=target_id),
+    ]
+
+
+def remaining(job: DeletionJob) -> int:
+    """Rows still to delete, counted the way the steps will delete them.
+
+    A fixed handful of COUNTs whatever the number of posts; ``request_deletion``
+    stores the result on the job, and ``advance`` keeps it up to date.
+    """
+    if job.status == DeletionJob.Status.DONE:
+        return 0
+    return sum(queryset.count() for queryset in _counted(job.target_type, job.target_id))
+
+
+def summary(target) -> dict[str, int]:
+    """Rows deleting a Post or User would remove, per model, with the same COUNTs as ``remaining``."""
+    target_type = DeletionJob.TargetType.POST if isinstance(target, Post) else DeletionJob.TargetType.USER
+    counts: dict[str, int] = {}
+    for queryset in _counted(target_type, target.pk):
+        name = str(queryset.model._meta.verbose_name_plural)
+        counts[name] = counts.get(name, 0) + queryset.count()
+    return {name: n for name, n in counts.items() if n}
+
+
+def process(
+    batch_size: Optional[int] = None,
+    max_seconds: Optional[float] = None,
+    pause: float = 0,
+) -> Iterator[DeletionJob]:
+    """Advance pending jobs, oldest first, until they are done or ``max_seconds`` have passed.
+
+    Sleeps ``pause`` seconds between batches so other writers get the locks.
+    Yields each job as it finishes or fails; a failed job keeps its error and
+    is left alone until it is retried from the admin.
+    """
+    started = time.monotonic()
+    jobs = DeletionJob.objects.filter(
+        status__in=[DeletionJob.Status.PENDING, DeletionJob.Status.RUNNING]
+    ).order_by('created_at')
+    for job in jobs:
+        try:
+            while advance(job, batch_size):
+                if max_seconds is not None and time.monotonic() - started >= max_seconds:
+                    return
+                if pause:
+                    time.sleep(pause)
+        except Exception as exc:
+            job.status = DeletionJob.Status.FAILED
+            job.error = repr(exc)
+            job.save(update_fields=['status', 'error', 'updated_at'])
+        yield job
@@ -0,0 +1,132 @@
+"""Near-duplicate comment detection with MinHash and LSH.
+
+A comment is reduced to the set of its character 5-grams ("shingles") after
+stripping markup and normalizing case, "ё" and punctuation. Its MinHash
+signature keeps, for each of ``NUM_PERM`` hash functions, the smallest hash
+over those shingles; the share of equal positions in two signatures estimates
+the Jaccard similarity of the shingle sets. Texts with fewer than
+``MIN_SHINGLES`` shingles are not judged: two-word replies repeat honestly.
+
+The signature is split into ``BANDS`` bands of ``ROWS`` values and every band
+is hashed to a ``CommentLSHBucket`` row. Comments sharing any bucket are
+candidates, so a lookup is a handful of indexed equality reads over the
+recent window, whatever the total number of comments. With 16 bands of 4 rows
+pairs above ~0.5 similarity almost always collide; candidates are then checked
+against ``COMMENT_DUPLICATE_THRESHOLD`` with their stored signatures.
+"""
+from __future__ import annotations
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+import zlib
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+import bleach
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from news.models import Comment
+
+from .models import CommentFingerprint, CommentLSHBucket
+
+SHINGLE_SIZE = 5
+# ~12 characters after normalizing: short link spam is judged, "gg wp" is not
+MIN_SHINGLES = 8
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+MAX_CANDIDATES = 200
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}Q')
+_non_word = re.compile(r'[\W_]+')
+
+
+class Verdict(NamedTuple):
+    signature: tuple[int, ...]
+    cluster_id: Optional[int]
+    similarity: float
+
+    @property
+    def is_duplicate(self) -> bool:
+        return self.cluster_id is not None and self.similarity >= settings.COMMENT_DUPLICATE_THRESHOLD
+
+
+def shingles(body: str) -> set[int]:
+    text = bleach.clean(body, tags=[], strip=True)
+    text = unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е')
+    text = _non_word.sub(' ', text).strip()
+    return {
+        zlib.crc32(text[i:i + SHINGLE_SIZE].encode())
+        for i in range(len(text) - SHINGLE_SIZE + 1)
+    }
+
+
+def minhash(values: set[int]) -> tuple[int, ...]:
+    return tuple(min((a * x + b) % _PRIME for x in values) for a, b in _PERMUTATIONS)
+
+
+def similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+def band_keys(signature: tuple[int, ...]) -> list[tuple[int, int]]:
+    packed = _SIGNATURE.pack(*signature)
+    keys = []
+    for band in range(BANDS):
+        chunk = packed[band * ROWS * 8:(band + 1) * ROWS * 8]
+        digest = hashlib.blake2b(chunk, digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return keys
+
+
+def inspect(body: str) -> Optional[Verdict]:
+    """Compares ``body`` with recent comments; None when it is too short to judge."""
+    values = shingles(body)
+    if len(values) < MIN_SHINGLES:
+        return None
+    signature = minhash(values)
+    since = timezone.now() - timedelta(hours=settings.COMMENT_DUPLICATE_WINDOW_HOURS)
+    same_bucket = Q()
+    for band, key in band_keys(signature):
+        same_bucket |= Q(band=band, key=key)
+    candidates = (
+        CommentLSHBucket.objects.filter(same_bucket, created_at__gte=since)
+        .values_list('comment_id', flat=True)
+        .distinct()[:MAX_CANDIDATES]
+    )
+    best = Verdict(signature, None, 0.0)
+    rows = CommentFingerprint.objects.filter(comment_id__in=list(candidates)).values_list('cluster_id', 'signature')
+    for cluster_id, stored in rows:
+        score = similarity(signature, _SIGNATURE.unpack(bytes(stored)))
+        if score > best.similarity:
+            best = Verdict(signature, cluster_id, score)
+    return best
+
+
+def record(comment: Comment, verdict: Verdict) -> CommentFingerprint:
+    with transaction.atomic():
+        fingerprint = CommentFingerprint.objects.create(
+            comment=comment,
+            signature=_SIGNATURE.pack(*verdict.signature),
+            cluster_id=verdict.cluster_id if verdict.is_duplicate else comment.pk,
+            similarity=verdict.similarity,
+        )
+        CommentLSHBucket.objects.bulk_create(
+            CommentLSHBucket(band=band, key=key, comment=comment, created_at=comment.created_at)
+            for band, key in band_keys(verdict.signature)
+        )
+    return fingerprint
+
+
+def prune(now=None) -> int:
+    cutoff = (now or timezone.now()) - timedelta(hours=settings.COMMENT_DUPLICATE_WINDOW_HOURS)
+    deleted, _ = CommentLSHBucket.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
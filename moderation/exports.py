@@ -0,0 +1,85 @@
+"""Row sources for the streaming exports in ``ExportView``.
+
+Rows are read with ``values_list(...).iterator(chunk_size)`` and encoded a
+chunk at a time, so an export holds one chunk in memory however many rows it
+has.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Iterator, Optional
+
+from news.models import Comment, Like
+
+from .models import ModerationAction
+
+DATASETS = {
+    'moderation-actions': (
+        ModerationAction,
+        ['id', 'created_at', 'moderator__username', 'action', 'target_type', 'target_id', 'reason'],
+    ),
+    'comments': (
+        Comment,
+        ['id', 'created_at', 'post_id', 'parent_id', 'author__username', 'status', 'body'],
+    ),
+    'likes': (
+        Like,
+        ['id', 'created_at', 'post_id', 'user__username'],
+    ),
+}
+CHUNK_SIZE = 2000
+
+
+def rows(dataset: str, since: Optional[date] = None, until: Optional[date] = None) -> Iterator[tuple]:
+    """Rows created from the start of ``since`` to the end of ``until`` (UTC), oldest first."""
+    model, fields = DATASETS[dataset]
+    queryset = model.objects.all()
+    if since:
+        queryset = queryset.filter(created_at__gte=datetime.combine(since, time.min, tzinfo=dt_timezone.utc))
+    if until:
+        queryset = queryset.filter(created_at__lt=datetime.combine(until + timedelta(days=1), time.min, tzinfo=dt_timezone.utc))
+    return queryset.order_by('created_at', 'id').values_list(*fields).iterator(chunk_size=CHUNK_SIZE)
+
+
+def _text(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _chunks(source: Iterator[tuple]) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in source:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(dataset: str, source: Iterator[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(DATASETS[dataset][1])
+    for chunk in _chunks(source):
+        writer.writerows([_text(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_jsonl(dataset: str, source: Iterator[tuple]) -> Iterator[str]:
+    fields = DATASETS[dataset][1]
+    for chunk in _chunks(source):
+        yield ''.join(
+            json.dumps(dict(zip(fields, map(_text, row))), ensure_ascii=False) + '\n' for row in chunk
+        )
+
+
+FORMATS = {
+    'csv': (iter_csv, 'text/csv; charset=utf-8'),
+    'jsonl': (iter_jsonl, 'application/x-ndjson; charset=utf-8'),
+}
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from moderation import deletion
+from moderation.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = (
+        'Delete queued posts and users batch by batch. Stops after --max-seconds; '
+        'the next run picks up where this one stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument('--max-seconds', type=float)
+        parser.add_argument('--pause', type=float, default=0.05, help='seconds to sleep between batches')
+
+    def handle(self, *args, **options):
+        finished = 0
+        for job in deletion.process(options['batch_size'], options['max_seconds'], options['pause']):
+            if job.status == DeletionJob.Status.FAILED:
+                self.stderr.write(f'{job}: {job.error}')
+            elif job.status == DeletionJob.Status.DONE:
+                finished += 1
+        self.stdout.write(self.style.SUCCESS(f'Finished {finished} deletion jobs.'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from moderation import duplicates
+
+
+class Command(BaseCommand):
+    help = 'Delete LSH buckets of comments older than COMMENT_DUPLICATE_WINDOW_HOURS.'
+
+    def handle(self, *args, **options):
+        deleted = duplicates.prune()
+        self.stdout.write(self.style.SUCCESS(f'Pruned {deleted} comment buckets.'))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from moderation import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the daily engagement rollups for the days since the last run. '
+        '--since YYYY-MM-DD recomputes from that day instead.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since')
+        parser.add_argument('--chunk-days', type=int, default=rollups.CHUNK_DAYS)
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_date(options['since'])
+            if since is None:
+                raise CommandError('--since must be a YYYY-MM-DD date')
+        days = rollups.run(since=since, chunk_days=options['chunk_days'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {days} days through {rollups.watermark()}.'))
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:52
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0008_post_revision'),
+        ('moderation', '0002_rename_moderation_target_idx_moderation__target__deb4a3_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentFingerprint',
+            fields=[
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fingerprint', serialize=False, to='news.comment')),
+                ('signature', models.BinaryField()),
+                ('cluster_id', models.PositiveIntegerField(db_index=True)),
+                ('similarity', models.FloatField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CommentLSHBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField()),
+                ('key', models.BigIntegerField()),
+                ('created_at', models.DateTimeField()),
+                ('comment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.comment')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['band', 'key', 'created_at'], name='moderation__band_a7a566_idx'), models.Index(fields=['created_at'], name='moderation__created_28a6f1_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moderation', '0003_comment_fingerprints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlockedWord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('phrase', models.CharField(max_length=200, unique=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['phrase'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('moderation', '0006_deletion_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueueClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('post', 'Post'), ('comment', 'Comment')], max_length=10)),
+                ('target_id', models.PositiveIntegerField()),
+                ('claimed_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField()),
+                ('moderator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['target_type', 'moderator'], name='moderation__target__fa8e4d_idx'), models.Index(fields=['target_type', 'expires_at'], name='moderation__target__6f6697_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='queueclaim',
+            constraint=models.UniqueConstraint(fields=('target_type', 'target_id'), name='moderation_one_claim_per_item'),
+        ),
+    ]
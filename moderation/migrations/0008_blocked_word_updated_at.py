@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:48
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moderation', '0007_queue_claims'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blockedword',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moderation', '0008_blocked_word_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deletionjob',
+            name='remaining_rows',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
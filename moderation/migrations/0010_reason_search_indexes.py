@@ -0,0 +1,38 @@
+from django.db import migrations
+
+# Admin search over the reason: icontains on PostgreSQL (trigram), istartswith
+# elsewhere, which SQLite answers from a NOCASE index (see news 0015).
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS moderation_action_reason_trgm_idx '
+            'ON moderation_moderationaction USING gin (UPPER(reason) gin_trgm_ops)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS moderation_action_reason_nocase_idx '
+            'ON moderation_moderationaction (reason COLLATE NOCASE)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS moderation_action_reason_trgm_idx')
+    elif vendor == 'sqlite':
+        schema_editor.execute('DROP INDEX IF EXISTS moderation_action_reason_nocase_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('moderation', '0009_deletion_job_remaining_rows'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
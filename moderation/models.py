@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core import outbox
 
 
 class ModerationAction(models.Model):
@@ -33,4 +37,195 @@ class ModerationAction(models.Model):
     def __str__(self) -> str:
         return f"{self.moderator} {self.action} {self.target_type}:{self.target_id}"
 
+    def save(self, *args, **kwargs):
+        # the outbox event commits together with the action
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def as_event(self) -> tuple[str, str, dict]:
+        """(topic, key, payload) for core.outbox."""
+        return 'moderation.action', f'{self.target_type}:{self.target_id}', {
+            'id': self.pk,
+            'target_type': self.target_type,
+            'target_id': self.target_id,
+            'action': self.action,
+            'reason': self.reason,
+            'moderator_id': self.moderator_id,
+            'created_at': self.created_at.isoformat(),
+        }
+
+
+class CommentFingerprint(models.Model):
+    """MinHash signature of a comment (see moderation/duplicates.py).
+
+    Near-duplicates share a ``cluster_id``: the pk of the first comment of the
+    group. ``similarity`` is the estimated Jaccard similarity to the closest
+    earlier comment, 0 when none was found.
+    """
+
+    comment = models.OneToOneField('news.Comment', on_delete=models.CASCADE, primary_key=True, related_name='fingerprint')
+    signature = models.BinaryField()
+    cluster_id = models.PositiveIntegerField(db_index=True)
+    similarity = models.FloatField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"comment:{self.comment_id} cluster:{self.cluster_id}"
+
+
+class CommentLSHBucket(models.Model):
+    """One LSH band of a recent comment's signature; rows older than the window are pruned."""
+
+    band = models.PositiveSmallIntegerField()
+    key = models.BigIntegerField()
+    comment = models.ForeignKey('news.Comment', on_delete=models.CASCADE, related_name='+')
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['band', 'key', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.band}:{self.key} -> {self.comment_id}"
+
+
+class BlockedWord(models.Model):
+    """A banned word or phrase checked on every comment and post (moderation/wordfilter.py).
+
+    Matches whole words; a trailing ``*`` also matches longer words starting
+    with the phrase (``блят*``).
+    """
+
+    phrase = models.CharField(max_length=200, unique=True)
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['phrase']
+
+    def __str__(self) -> str:
+        return self.phrase
+
+
+@receiver(post_save, sender=ModerationAction)
+def emit_moderation_action(sender, instance: ModerationAction, created: bool, **kwargs):
+    if created:
+        outbox.emit(*instance.as_event())
+
+
+class DailyEngagement(models.Model):
+    """Site-wide totals for one UTC day, filled by ``manage.py rollup_engagement``."""
+
+    day = models.DateField(unique=True)
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    likes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['day']
+
+    def __str__(self) -> str:
+        return f"{self.day}: {self.posts}/{self.comments}/{self.likes}"
+
+
+class DailyAuthorEngagement(models.Model):
+    """Per-author numbers for one UTC day, with the meaning of accounts.AuthorStats:
+    posts published, comments written and likes received on their posts."""
 
+    day = models.DateField()
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    posts = models.PositiveIntegerField(default=0)
+    comments = models.PositiveIntegerField(default=0)
+    likes_received = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'author'], name='moderation_author_day_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['author', 'day']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.author_id} {self.day}"
+
+
+class RollupWatermark(models.Model):
+    """Last day a rollup has processed; the next run starts again from that day."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    day = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f"{self.name} through {self.day}"
+
+
+class DeletionJob(models.Model):
+    """A post or user being deleted in small batches by ``manage.py process_deletions``.
+
+    The target is hidden when the job is created (see moderation/deletion.py);
+    ``step`` and ``deleted_rows`` show how far the batches have got, and
+    ``remaining_rows`` estimates what is left.
+    """
+
+    class TargetType(models.TextChoices):
+        POST = 'post', 'Post'
+        USER = 'user', 'User'
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'Pending'
+        RUNNING = 'running', 'Running'
+        DONE = 'done', 'Done'
+        FAILED = 'failed', 'Failed'
+
+    target_type = models.CharField(max_length=10, choices=TargetType.choices)
+    target_id = models.PositiveIntegerField()
+    label = models.CharField(max_length=200, blank=True)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    step = models.CharField(max_length=30, blank=True)
+    deleted_rows = models.PositiveIntegerField(default=0)
+    remaining_rows = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    requested_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['target_type', 'target_id']),
+        ]
+        ordering = ['-created_at']
+
+    def __str__(self) -> str:
+        return f"delete {self.target_type}:{self.target_id} ({self.status})"
+
+
+class QueueClaim(models.Model):
+    """A queue item handed to one moderator until ``expires_at`` (see moderation/claims.py)."""
+
+    target_type = models.CharField(max_length=10, choices=ModerationAction.TargetType.choices)
+    target_id = models.PositiveIntegerField()
+    moderator = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    claimed_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['target_type', 'target_id'], name='moderation_one_claim_per_item'),
+        ]
+        indexes = [
+            models.Index(fields=['target_type', 'moderator']),
+            models.Index(fields=['target_type', 'expires_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.target_type}:{self.target_id} -> {self.moderator_id}"
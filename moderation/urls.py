@@ -5,11 +5,14 @@ from . import views
 
 urlpatterns = [
     path('', views.ModerationDashboardView.as_view(), name='moderation_dashboard'),
+    path('engagement/', views.EngagementDashboardView.as_view(), name='moderation_engagement'),
     path('posts/', views.PostQueueView.as_view(), name='moderation_posts'),
     path('comments/', views.CommentQueueView.as_view(), name='moderation_comments'),
+    path('export/<slug:dataset>.<slug:fmt>', views.ExportView.as_view(), name='moderation_export'),
     path('posts/<int:pk>/approve/', views.PostApproveView.as_view(), name='moderation_post_approve'),
     path('posts/<int:pk>/reject/', views.PostRejectView.as_view(), name='moderation_post_reject'),
     path('comments/<int:pk>/hide/', views.CommentHideView.as_view(), name='moderation_comment_hide'),
+    path('comments/groups/<int:cluster_id>/hide/', views.CommentClusterHideView.as_view(), name='moderation_comment_cluster_hide'),
     path('comments/<int:pk>/unhide/', views.CommentUnhideView.as_view(), name='moderation_comment_unhide'),
 ]
 
@@ -1,14 +1,26 @@
 from __future__ import annotations
 
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
-from django.http import HttpResponseRedirect
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseBadRequest, HttpResponseRedirect, StreamingHttpResponse
+from django.utils.dateparse import parse_date
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils import timezone
 from django.views.generic import TemplateView, ListView, View
 
+from core import outbox
 from news.models import Post, Comment
 
+from . import claims, exports, rollups, wordfilter
+from .models import CommentFingerprint, ModerationAction, DailyAuthorEngagement, DailyEngagement
+
 
 class ModeratorsOnlyMixin(UserPassesTestMixin):
     def test_func(self):
@@ -31,30 +43,191 @@ class ModerationDashboardView(LoginRequiredMixin, ModeratorsOnlyMixin, TemplateV
         context = super().get_context_data(**kwargs)
         context['pending_posts'] = Post.objects.filter(status=Post.Status.DRAFT).count()
         context['hidden_comments'] = Comment.objects.filter(status=Comment.Status.HIDDEN).count()
+        context['export_datasets'] = list(exports.DATASETS)
         return context
 
 
-class PostQueueView(LoginRequiredMixin, ModeratorsOnlyMixin, ListView):
+class EngagementDashboardView(ModerationDashboardView):
+    """Posts, comments and likes per day and the most active authors.
+
+    Reads only the rollups of moderation/rollups.py, so it is as fresh as the
+    last ``manage.py rollup_engagement`` run.
+    """
+
+    template_name = 'moderation/engagement.html'
+    default_days = 30
+    max_days = 366
+    day_options = (7, 30, 90, 365)
+    top_authors = 20
+
+    def get_days(self) -> int:
+        try:
+            days = int(self.request.GET.get('days', self.default_days))
+        except ValueError:
+            days = self.default_days
+        return max(1, min(days, self.max_days))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        days = self.get_days()
+        last = rollups.watermark() or timezone.now().date()
+        first = last - timedelta(days=days - 1)
+        stored = {row.day: row for row in DailyEngagement.objects.filter(day__gte=first, day__lte=last)}
+        daily = [
+            stored.get(first + timedelta(days=i)) or DailyEngagement(day=first + timedelta(days=i))
+            for i in range(days)
+        ]
+        peak = max([max(row.posts, row.comments, row.likes) for row in daily] + [1])
+        for row in daily:
+            row.bars = {
+                name: round(100 * getattr(row, name) / peak) for name in ('posts', 'comments', 'likes')
+            }
+        context.update(
+            days=days,
+            first_day=first,
+            last_day=last,
+            daily=daily,
+            totals={name: sum(getattr(row, name) for row in daily) for name in ('posts', 'comments', 'likes')},
+            authors=(
+                DailyAuthorEngagement.objects.filter(day__gte=first, day__lte=last)
+                .values('author__username')
+                .annotate(posts=Sum('posts'), comments=Sum('comments'), likes_received=Sum('likes_received'))
+                .order_by('-likes_received', '-posts', 'author__username')[:self.top_authors]
+            ),
+        )
+        return context
+
+
+class ExportView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
+    """Streams a dataset of moderation.exports as CSV or JSON Lines.
+
+    ``?since=YYYY-MM-DD&until=YYYY-MM-DD`` limit it to rows created on those
+    days (inclusive, UTC).
+    """
+
+    @staticmethod
+    def parse_day(value: str):
+        if not value:
+            return None
+        day = parse_date(value)  # ValueError for impossible dates
+        if day is None:
+            raise ValueError(value)
+        return day
+
+    def get(self, request, dataset: str, fmt: str) -> StreamingHttpResponse:
+        if dataset not in exports.DATASETS or fmt not in exports.FORMATS:
+            raise Http404
+        try:
+            since = self.parse_day(request.GET.get('since', ''))
+            until = self.parse_day(request.GET.get('until', ''))
+        except ValueError:
+            return HttpResponseBadRequest('since/until must be YYYY-MM-DD dates')
+        encode, content_type = exports.FORMATS[fmt]
+        response = StreamingHttpResponse(
+            encode(dataset, exports.rows(dataset, since, until)), content_type=content_type
+        )
+        span = '_'.join(str(day) for day in (since, until) if day)
+        filename = f"{dataset}{'_' + span if span else ''}.{fmt}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class ClaimedQueueMixin:
+    """Shows each moderator only the batch of items claimed for them (moderation/claims.py).
+
+    Views set ``target_type`` and define ``get_candidates()``, the items of
+    their queue ordered highest priority first.
+    """
+
+    target_type: str
+
+    def get_queryset(self):
+        candidates = claims.undecided(self.get_candidates(), self.target_type)
+        held = claims.claim(self.request.user, self.target_type, candidates)
+        return candidates.filter(pk__in=held)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['claimed_by_others'] = claims.claimed_by_others(self.target_type, self.request.user)
+        context['claim_lease_minutes'] = settings.MODERATION_CLAIM_LEASE_SECONDS // 60
+        return context
+
+
+class PostQueueView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimedQueueMixin, ListView):
     template_name = 'moderation/posts_queue.html'
     context_object_name = 'posts'
-    paginate_by = 20
+    target_type = ModerationAction.TargetType.POST
 
-    def get_queryset(self):
-        return Post.objects.filter(status=Post.Status.DRAFT).select_related('author').order_by('-created_at')
+    def get_candidates(self):
+        # drafts of authors with a bigger audience first, then the longest waiting
+        return (
+            Post.objects.filter(status=Post.Status.DRAFT)
+            .select_related('author')
+            .annotate(priority=Coalesce('author__author_stats__likes_received', 0))
+            .order_by('-priority', 'created_at')
+        )
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for post in context['posts']:
+            post.blocked_words = wordfilter.find(post.title, post.summary, post.body)
+        return context
 
-class CommentQueueView(LoginRequiredMixin, ModeratorsOnlyMixin, ListView):
+
+class CommentQueueView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimedQueueMixin, ListView):
     template_name = 'moderation/comments_queue.html'
     context_object_name = 'comments'
-    paginate_by = 20
+    target_type = ModerationAction.TargetType.COMMENT
 
-    def get_queryset(self):
-        return Comment.objects.filter(status=Comment.Status.HIDDEN).select_related('author', 'post').order_by('-created_at')
+    def get_candidates(self):
+        # near-duplicates (moderation/duplicates.py) are claimed and listed together, biggest group first
+        cluster_size = (
+            CommentFingerprint.objects.filter(cluster_id=OuterRef('fingerprint__cluster_id'))
+            .values('cluster_id')
+            .annotate(n=Count('pk'))
+            .values('n')
+        )
+        return (
+            Comment.objects.filter(status=Comment.Status.HIDDEN)
+            .select_related('author', 'post', 'fingerprint')
+            .annotate(cluster_size=Subquery(cluster_size))
+            .annotate(priority=Coalesce('cluster_size', 1))
+            .order_by('-priority', F('fingerprint__cluster_id').desc(nulls_last=True), 'created_at')
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        for comment in context['comments']:
+            comment.blocked_words = wordfilter.find(comment.body)
+        return context
+
+
+class ClaimGuardMixin:
+    """Refuses to act on an item another moderator has claimed, and frees the claim once acted on.
 
+    Only a POST that went through (a 2xx or 3xx response) frees it: a GET,
+    a refused request or an error leaves the item with its moderator.
+    """
+
+    target_type: str
+    queue_url_name: str
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method == 'POST' and claims.held_by_other(self.target_type, kwargs['pk'], request.user):
+            messages.warning(request, 'Этим уже занимается другой модератор.')
+            return redirect(self.queue_url_name)
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method == 'POST' and response.status_code < 400:
+            claims.release(self.target_type, [kwargs['pk']])
+        return response
+
+
+class PostApproveView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimGuardMixin, View):
+    target_type = ModerationAction.TargetType.POST
+    queue_url_name = 'moderation_posts'
 
-class PostApproveView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
     def post(self, request, pk: int) -> HttpResponseRedirect:
-        post = get_object_or_404(Post, pk=pk)
+        post = get_object_or_404(Post.objects.exclude(status=Post.Status.DELETING), pk=pk)
         if post.status != Post.Status.PUBLISHED:
             post.status = Post.Status.PUBLISHED
             post.save(update_fields=['status', 'updated_at'])
@@ -70,9 +243,12 @@ class PostApproveView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
         return redirect('moderation_posts')
 
 
-class PostRejectView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
+class PostRejectView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimGuardMixin, View):
+    target_type = ModerationAction.TargetType.POST
+    queue_url_name = 'moderation_posts'
+
     def post(self, request, pk: int) -> HttpResponseRedirect:
-        post = get_object_or_404(Post, pk=pk)
+        post = get_object_or_404(Post.objects.exclude(status=Post.Status.DELETING), pk=pk)
         # В текущей модели нет статуса pending_review; оставляем draft, просто логируем.
         from .models import ModerationAction
         ModerationAction.objects.create(
@@ -86,9 +262,12 @@ class PostRejectView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
         return redirect('moderation_posts')
 
 
-class CommentHideView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
+class CommentHideView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimGuardMixin, View):
+    target_type = ModerationAction.TargetType.COMMENT
+    queue_url_name = 'moderation_comments'
+
     def post(self, request, pk: int) -> HttpResponseRedirect:
-        comment = get_object_or_404(Comment, pk=pk)
+        comment = get_object_or_404(Comment.objects.exclude(status=Comment.Status.DELETING), pk=pk)
         if comment.status != Comment.Status.HIDDEN:
             comment.status = Comment.Status.HIDDEN
             comment.save(update_fields=['status', 'updated_at'])
@@ -104,9 +283,49 @@ class CommentHideView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
         return redirect('moderation_comments')
 
 
-class CommentUnhideView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
+class CommentClusterHideView(LoginRequiredMixin, ModeratorsOnlyMixin, View):
+    """Hides every still visible comment of a near-duplicate group.
+
+    Comments another moderator has claimed are left to them; the claims on the
+    hidden ones are freed, as ClaimGuardMixin does for single items.
+    """
+
+    def post(self, request, cluster_id: int) -> HttpResponseRedirect:
+        from .models import ModerationAction
+        comments = list(
+            Comment.objects.filter(fingerprint__cluster_id=cluster_id, status=Comment.Status.VISIBLE)
+        )
+        taken = claims.held_by_others(ModerationAction.TargetType.COMMENT, [c.pk for c in comments], request.user)
+        comments = [comment for comment in comments if comment.pk not in taken]
+        with transaction.atomic():
+            for comment in comments:
+                comment.status = Comment.Status.HIDDEN
+                comment.save(update_fields=['status', 'updated_at'])
+            # bulk_create sends no post_save, so the outbox events are written here
+            actions = ModerationAction.objects.bulk_create(
+                ModerationAction(
+                    target_type=ModerationAction.TargetType.COMMENT,
+                    target_id=comment.pk,
+                    action=ModerationAction.Action.HIDE,
+                    reason=request.POST.get('reason', '')[:255] or f'near-duplicate group {cluster_id}',
+                    moderator=request.user,
+                )
+                for comment in comments
+            )
+            outbox.emit_many(action.as_event() for action in actions)
+        claims.release(ModerationAction.TargetType.COMMENT, [comment.pk for comment in comments])
+        messages.info(request, f'Скрыто похожих комментариев: {len(comments)}.')
+        if taken:
+            messages.warning(request, f'Занято другим модератором: {len(taken)}.')
+        return redirect('moderation_comments')
+
+
+class CommentUnhideView(LoginRequiredMixin, ModeratorsOnlyMixin, ClaimGuardMixin, View):
+    target_type = ModerationAction.TargetType.COMMENT
+    queue_url_name = 'moderation_comments'
+
     def post(self, request, pk: int) -> HttpResponseRedirect:
-        comment = get_object_or_404(Comment, pk=pk)
+        comment = get_object_or_404(Comment.objects.exclude(status=Comment.Status.DELETING), pk=pk)
         if comment.status != Comment.Status.VISIBLE:
             comment.status = Comment.Status.VISIBLE
             comment.save(update_fields=['status', 'updated_at'])
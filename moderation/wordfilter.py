@@ -0,0 +1,167 @@
+"""Blocked-word matching with an Aho-Corasick automaton.
+
+Both the phrases and the checked text are normalized the same way: markup
+stripped, casefolded, "ё" folded to "е", common substitutions undone (digits
+and symbols standing in for letters, Cyrillic letters that look like Latin
+ones) and everything else collapsed to single spaces. A letter repeated three
+or more times becomes the letter and ``+`` ("stretched"); shorter runs are
+kept as they are, so "as" does not match "ass". Each phrase is compiled as
+written and with up to ``MAX_STRETCHED`` of its letters stretched, so
+"aaasss" still matches it. Phrases are then matched with surrounding spaces,
+i.e. as whole words, unless they end with ``*``.
+
+The automaton is compiled once per process and reused until ``BlockedWord``
+changes. A change made in this process drops it right away (see the receiver
+below); changes made elsewhere are noticed by comparing the table's latest
+``updated_at`` and row count, which is checked at most every
+``BLOCKED_WORDS_CHECK_SECONDS``. Matching walks the text once, so its cost
+depends on the text length and not on the number of phrases.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from collections import deque
+from itertools import combinations
+from typing import Optional
+
+import bleach
+from django.conf import settings
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import BlockedWord
+
+SUBSTITUTIONS = str.maketrans({
+    '0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '@': 'a', '$': 's', '|': 'i',
+    # Cyrillic letters that look like Latin ones, so "сука" and "cyka" meet
+    'а': 'a', 'в': 'b', 'е': 'e', 'к': 'k', 'м': 'm', 'н': 'h', 'о': 'o', 'р': 'p', 'с': 'c', 'т': 't',
+    'у': 'y', 'х': 'x',
+})
+MAX_STRETCHED = 2
+_non_word = re.compile(r'[\W_]+')
+_stretched = re.compile(r'(\w)\1{2,}')
+_runs = re.compile(r'(\w)\1*(?!\+)')
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е').translate(SUBSTITUTIONS)
+    text = _non_word.sub(' ', text)
+    return ' ' + _stretched.sub(r'\1+', text).strip() + ' '
+
+
+def pattern_keys(phrase: str) -> list[str]:
+    """The phrase's key as written, then with each combination of up to MAX_STRETCHED letters stretched."""
+    key = normalize(phrase.rstrip('*'))
+    if phrase.endswith('*'):
+        key = key.rstrip()
+    runs = [match.span() for match in _runs.finditer(key)]
+    keys = [key]
+    for count in range(1, MAX_STRETCHED + 1):
+        for chosen in combinations(runs, count):
+            variant = key
+            for start, end in reversed(chosen):
+                variant = variant[:start] + variant[start] + '+' + variant[end:]
+            keys.append(variant)
+    return keys
+
+
+class Automaton:
+    def __init__(self, phrases: list[str]):
+        self.phrases = phrases
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[list[int]] = [[]]
+        for index, phrase in enumerate(phrases):
+            for key in pattern_keys(phrase):
+                if key.strip():
+                    self._insert(key, index)
+        self._link()
+
+    def _insert(self, key: str, index: int) -> None:
+        node = 0
+        for char in key:
+            nxt = self.goto[node].get(char)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][char] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append(index)
+
+    def _link(self) -> None:
+        # breadth-first, so fail links always point to already linked, shallower nodes
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0) if node else 0
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def find(self, text: str) -> list[str]:
+        found: set[int] = set()
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if out[node]:
+                found.update(out[node])
+        return [self.phrases[i] for i in sorted(found)]
+
+
+_lock = threading.Lock()
+_automaton: Optional[Automaton] = None
+_version = None
+_checked_at = 0.0
+
+
+def current_version() -> tuple:
+    # the count catches deletions, updated_at everything else
+    stats = BlockedWord.objects.aggregate(changed_at=Max('updated_at'), count=Count('id'))
+    return stats['changed_at'], stats['count']
+
+
+def automaton() -> Automaton:
+    global _automaton, _version, _checked_at
+    now = time.monotonic()
+    if _automaton is not None and now - _checked_at < settings.BLOCKED_WORDS_CHECK_SECONDS:
+        return _automaton
+    with _lock:
+        version = current_version()
+        if _automaton is None or version != _version:
+            phrases = list(BlockedWord.objects.filter(is_active=True).values_list('phrase', flat=True))
+            _automaton, _version = Automaton(phrases), version
+        _checked_at = now
+    return _automaton
+
+
+@receiver(post_save, sender=BlockedWord)
+@receiver(post_delete, sender=BlockedWord)
+def forget_automaton(sender, **kwargs):
+    global _automaton
+    with _lock:
+        _automaton = None
+
+
+def find(*texts: str) -> list[str]:
+    """Blocked phrases found in any of ``texts`` (HTML allowed)."""
+    matcher = automaton()
+    if not matcher.phrases:
+        return []
+    found = []
+    for text in texts:
+        for phrase in matcher.find(normalize(bleach.clean(text or '', tags=[], strip=True))):
+            if phrase not in found:
+                found.append(phrase)
+    return found
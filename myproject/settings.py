@@ -60,6 +60,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -67,6 +68,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'core.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -90,6 +92,12 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'myproject.wsgi.application'
+ASGI_APPLICATION = 'myproject.asgi.application'
+
+# 'wsgi' (sync gunicorn workers) or 'asgi' (gunicorn with uvicorn workers), see start.sh.
+# Under ASGI the read-only views (feeds, post detail, profiles) are served by their async variants.
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi').strip().lower()
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'true' if SERVER_MODE == 'asgi' else 'false').lower() in ('1', 'true', 'yes', 'on')
 
 
 # Database
@@ -98,8 +106,9 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Prefer DATABASE_URL (e.g., Postgres) if provided, else fallback to SQLite
 DATABASE_URL = os.getenv('DATABASE_URL')
 if DATABASE_URL and dj_database_url:
+    # persistent connections are not reused across requests under ASGI, so don't keep them open
     DATABASES = {
-        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=True)
+        'default': dj_database_url.parse(DATABASE_URL, conn_max_age=0 if SERVER_MODE == 'asgi' else 600, ssl_require=True)
     }
 elif DATABASE_URL and not dj_database_url:
     # DATABASE_URL provided but dj_database_url missing -> fail fast with helpful message
@@ -108,9 +117,44 @@ else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': os.getenv('SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
+    }
+    # Production nodes on SQLite: WAL + tuned pragmas on every connection and
+    # BEGIN IMMEDIATE transactions, see core/sqlite_backend/base.py
+    if os.getenv('SQLITE_PRODUCTION_MODE', 'false').lower() in ('1', 'true', 'yes', 'on'):
+        DATABASES['default']['ENGINE'] = 'core.sqlite_backend'
+        DATABASES['default']['OPTIONS'] = {
+            'pragmas': {
+                'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '20000')),
+                'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024))),
+                'cache_size': -int(os.getenv('SQLITE_CACHE_SIZE_KB', str(64 * 1024))),
+            },
         }
+
+# Optional read replica for feed, post detail and profile reads (see core/db_router.py).
+# DATABASE_REPLICA_URL points at a streaming replica; SQLITE_REPLICA_PATH is a local stand-in:
+# a copy of the primary SQLite file (refresh it with `cp` to simulate replication).
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+SQLITE_REPLICA_PATH = os.getenv('SQLITE_REPLICA_PATH')
+if DATABASE_REPLICA_URL and dj_database_url:
+    DATABASES['replica'] = dj_database_url.parse(
+        DATABASE_REPLICA_URL, conn_max_age=DATABASES['default'].get('CONN_MAX_AGE', 0), ssl_require=True
+    )
+elif SQLITE_REPLICA_PATH:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': SQLITE_REPLICA_PATH,
     }
+if 'replica' in DATABASES:
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+# after a write the client reads from the primary for this long (read-your-own-writes)
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '10'))
+# replicas lagging more than this are skipped; lag is re-checked every REPLICA_LAG_CHECK_SECONDS
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv('REPLICA_LAG_CHECK_SECONDS', '5'))
 
 
 # Password validation
@@ -166,11 +210,86 @@ SECURE_HSTS_PRELOAD = not DEBUG
 
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.cache.InstrumentedLocMemCache',
         'LOCATION': 'unique-news-site-cache',
     }
 }
 
+# Post view counting (news/pageviews.py): a visitor is counted once per post per
+# dedup window; hits are buffered per process and flushed in batches.
+POST_VIEWS_DEDUP_SECONDS = int(os.getenv('POST_VIEWS_DEDUP_SECONDS', '1800'))
+POST_VIEWS_FLUSH_SECONDS = int(os.getenv('POST_VIEWS_FLUSH_SECONDS', '10'))
+POST_VIEWS_FLUSH_SIZE = int(os.getenv('POST_VIEWS_FLUSH_SIZE', '200'))
+
+# Trending list (Post.bump_trending): each like/comment adds its weight, which halves
+# every TRENDING_HALF_LIFE_HOURS; run `manage.py decay_trending_scores` periodically.
+TRENDING_HALF_LIFE_HOURS = float(os.getenv('TRENDING_HALF_LIFE_HOURS', '24'))
+TRENDING_LIKE_WEIGHT = 1.0
+TRENDING_COMMENT_WEIGHT = 2.0
+
+# Post revisions (news/revisions.py) are stored as compressed diffs against the
+# previous revision, with a full copy every POST_REVISION_SNAPSHOT_EVERY revisions.
+POST_REVISION_SNAPSHOT_EVERY = int(os.getenv('POST_REVISION_SNAPSHOT_EVERY', '10'))
+
+# Near-duplicate comment detection (moderation/duplicates.py): a new comment whose
+# estimated similarity to one from the last COMMENT_DUPLICATE_WINDOW_HOURS reaches
+# COMMENT_DUPLICATE_THRESHOLD is hidden and queued for moderators.
+COMMENT_DUPLICATE_THRESHOLD = float(os.getenv('COMMENT_DUPLICATE_THRESHOLD', '0.8'))
+COMMENT_DUPLICATE_WINDOW_HOURS = int(os.getenv('COMMENT_DUPLICATE_WINDOW_HOURS', '72'))
+
+# Admin changelists (core/paginator.py) show the planner's row estimate instead of an
+# exact COUNT(*) once it reaches this many rows (PostgreSQL only).
+ADMIN_ESTIMATED_COUNT_THRESHOLD = int(os.getenv('ADMIN_ESTIMATED_COUNT_THRESHOLD', '100000'))
+
+# /metrics (core/metrics.py): readable by superusers, by scrapers sending
+# "Authorization: Bearer $METRICS_TOKEN", and by these client addresses when they
+# connect directly (never through a proxy, whose address every client would share).
+# Each gunicorn worker writes its counters to METRICS_DIR every METRICS_FLUSH_SECONDS
+# so that the endpoint reports all workers; leave it empty for a single process.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '').split(',') if ip.strip()]
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+
+# Moderation queues (moderation/claims.py): items handed to each moderator at once and
+# how long they stay reserved for them without a page reload.
+MODERATION_CLAIM_BATCH = int(os.getenv('MODERATION_CLAIM_BATCH', '20'))
+MODERATION_CLAIM_LEASE_SECONDS = int(os.getenv('MODERATION_CLAIM_LEASE_SECONDS', '600'))
+
+# Rows removed per transaction by manage.py process_deletions (moderation/deletion.py)
+DELETION_BATCH_SIZE = int(os.getenv('DELETION_BATCH_SIZE', '500'))
+
+# Live comments and likes on post pages (news/live.py, ASGI only): how often each process
+# checks the outbox, the keep-alive interval and how long one SSE connection lasts.
+LIVE_POLL_SECONDS = float(os.getenv('LIVE_POLL_SECONDS', '1'))
+LIVE_KEEPALIVE_SECONDS = float(os.getenv('LIVE_KEEPALIVE_SECONDS', '15'))
+LIVE_MAX_SECONDS = float(os.getenv('LIVE_MAX_SECONDS', '300'))
+
+# Transactional outbox (core/outbox.py): consumers that manage.py relay_outbox delivers
+# domain events to. OUTBOX_HTTP_URL / OUTBOX_JSONL_PATH set up the usual two.
+OUTBOX_CONSUMERS = {}
+if os.getenv('OUTBOX_HTTP_URL'):
+    OUTBOX_CONSUMERS['http'] = {'SINK': 'http', 'OPTIONS': {'url': os.getenv('OUTBOX_HTTP_URL')}}
+if os.getenv('OUTBOX_JSONL_PATH'):
+    OUTBOX_CONSUMERS['jsonl'] = {'SINK': 'jsonl', 'OPTIONS': {'path': os.getenv('OUTBOX_JSONL_PATH')}}
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv('OUTBOX_RELAY_BATCH_SIZE', '200'))
+# Ids skipped by readers of the outbox are looked for this long before their transaction
+# is taken as rolled back; longer transactions than this would lose their events.
+OUTBOX_GAP_TIMEOUT_SECONDS = float(os.getenv('OUTBOX_GAP_TIMEOUT_SECONDS', '600'))
+OUTBOX_RETENTION_DAYS = int(os.getenv('OUTBOX_RETENTION_DAYS', '7'))
+
+# How often a process applies typeahead changes (news/suggest.py) logged by other processes.
+SUGGEST_CHECK_SECONDS = float(os.getenv('SUGGEST_CHECK_SECONDS', '5'))
+
+# How often a process compares its blocked-word automaton (moderation/wordfilter.py) with the table.
+BLOCKED_WORDS_CHECK_SECONDS = float(os.getenv('BLOCKED_WORDS_CHECK_SECONDS', '5'))
+
+# Pages rendered by core.warmup before gunicorn forks workers (WARM_START, gunicorn.conf.py)
+WARMUP_URLS = ['/']
+
+# Monthly sitemap shards (news/sitemaps.py) are cached until a post of their month changes.
+SITEMAP_CACHE_SECONDS = int(os.getenv('SITEMAP_CACHE_SECONDS', str(24 * 3600)))
+
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -19,9 +19,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/moderation/', include('moderation.urls')),
     path('admin/', admin.site.urls),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('', include('news.urls')),
     path('', include('accounts.urls')),
 ]
@@ -1,23 +1,50 @@
 from django.contrib import admin
-from .models import Post, Comment, Like
+
+from core.admin import FastChangeListMixin
+from moderation.admin import BatchedDeletionAdminMixin
+
+from .models import Post, Comment, Like, Tag
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(BatchedDeletionAdminMixin, FastChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'title', 'author', 'status', 'published_at', 'created_at')
     list_filter = ('status', 'published_at', 'created_at')
-    search_fields = ('title', 'summary', 'slug')
+    list_select_related = ('author',)
+    raw_id_fields = ('author',)
+    exact_search_fields = ('slug', 'pk')
+    prefix_search_fields = ('author__username',)
+    trigram_search_fields = ('title', 'summary')
     date_hierarchy = 'published_at'
+    filter_horizontal = ('tags',)
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'kind', 'posts_count')
+    list_filter = ('kind',)
+    search_fields = ('name', 'slug')
+    prepopulated_fields = {'slug': ('name',)}
+    readonly_fields = ('posts_count',)
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'post', 'author', 'status', 'created_at')
     list_filter = ('status', 'created_at')
-    search_fields = ('body',)
+    list_select_related = ('post', 'author')
+    raw_id_fields = ('post', 'parent', 'author')
+    exact_search_fields = ('post_id', 'pk')
+    prefix_search_fields = ('author__username',)
+    trigram_search_fields = ('body',)
 
 
 @admin.register(Like)
-class LikeAdmin(admin.ModelAdmin):
+class LikeAdmin(FastChangeListMixin, admin.ModelAdmin):
     list_display = ('id', 'post', 'user', 'created_at')
-    search_fields = ('user__username', 'post__title')
+    list_filter = ('created_at',)
+    list_select_related = ('post', 'user')
+    raw_id_fields = ('post', 'user')
+    exact_search_fields = ('post_id',)
+    prefix_search_fields = ('user__username',)
+    trigram_search_fields = ('post__title',)
@@ -0,0 +1,130 @@
+"""Async variants of the read-only views, served when running under ASGI.
+
+They reuse the querysets and templates of the sync views in ``news.views`` and
+only swap the database round-trips for the async ORM. Rendering of the
+returned ``TemplateResponse`` is done by Django's async handler in a worker
+thread, so context processors keep working unchanged.
+"""
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+from django.urls import reverse
+from django.views import View
+
+from . import live
+from .forms import CommentForm
+from .models import Post, Like
+from .pageviews import record_view
+from .views import (
+    PostListView,
+    InterestingPostListView,
+    TopWeekPostListView,
+    TopMonthPostListView,
+    PostDetailView,
+    MostReadPostListView,
+    TrendingPostListView,
+)
+
+
+async def aresolve_user(request: HttpRequest):
+    # request.user is lazy and backed by the session/auth tables, which may not be
+    # touched from the event loop. Resolve it once in a thread; afterwards the
+    # cached object is safe to use from async code and templates.
+    await sync_to_async(lambda: request.user.is_authenticated)()
+    return request.user
+
+
+class AsyncListMixin:
+    """Runs a ListView's count and page fetch through the async ORM."""
+
+    async def get(self, request, *args, **kwargs):
+        await aresolve_user(request)
+        self.object_list = self.get_queryset()
+        self.object_count = await self.object_list.acount()
+        context = self.get_context_data()
+        objects = [obj async for obj in context['object_list']]
+        context['object_list'] = objects
+        context_object_name = self.get_context_object_name(self.object_list)
+        if context_object_name is not None:
+            context[context_object_name] = objects
+        if context.get('page_obj') is not None:
+            context['page_obj'].object_list = objects
+        return self.render_to_response(context)
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        paginator = super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+        # already counted asynchronously; keeps Paginator from issuing a sync COUNT(*)
+        paginator.count = self.object_count
+        return paginator
+
+
+class AsyncPostListView(AsyncListMixin, PostListView):
+    pass
+
+
+class AsyncInterestingPostListView(AsyncListMixin, InterestingPostListView):
+    pass
+
+
+class AsyncTopWeekPostListView(AsyncListMixin, TopWeekPostListView):
+    pass
+
+
+class AsyncTopMonthPostListView(AsyncListMixin, TopMonthPostListView):
+    pass
+
+
+class AsyncMostReadPostListView(AsyncListMixin, MostReadPostListView):
+    pass
+
+
+class AsyncTrendingPostListView(AsyncListMixin, TrendingPostListView):
+    pass
+
+
+class AsyncPostDetailView(PostDetailView):
+    async def get(self, request, *args, **kwargs):
+        user = await aresolve_user(request)
+        try:
+            post = await self.get_queryset().aget()
+        except Post.DoesNotExist:
+            raise Http404
+        self.check_visibility(post)
+        self.object = post
+
+        # DetailView's own context only; the sync queries of PostDetailView are replaced below
+        context = super(PostDetailView, self).get_context_data(object=post)
+        context['comments'] = [c async for c in self.get_comments(post)]
+        context['related_posts'] = [link.related async for link in self.get_related_posts(post)]
+        context['comment_form'] = CommentForm()
+        context['likes_count'] = await post.likes.acount()
+        context['user_liked'] = user.is_authenticated and await Like.objects.filter(post=post, user=user).aexists()
+        if post.status == Post.Status.PUBLISHED:
+            await sync_to_async(record_view)(request, post.pk)
+            if settings.SERVER_MODE == 'asgi':
+                context['live_events_url'] = reverse('post_events', args=[post.pk])
+        return self.render_to_response(context)
+
+
+class PostEventsView(View):
+    """Server-Sent Events with a published post's new comments and like counts (news/live.py).
+
+    Only routed under ASGI: a sync worker would hold a thread per reader.
+    """
+
+    async def get(self, request, pk: int) -> StreamingHttpResponse:
+        if not await Post.objects.filter(pk=pk, status=Post.Status.PUBLISHED).aexists():
+            raise Http404
+        last_event_id = request.headers.get('Last-Event-ID', '')
+        response = StreamingHttpResponse(
+            live.stream(pk, int(last_event_id) if last_event_id.isdigit() else None),
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        # nginx would otherwise buffer the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
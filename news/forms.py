@@ -9,7 +9,14 @@ import bleach
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
-        fields = ['title', 'summary', 'body', 'cover', 'status']
+        fields = ['title', 'summary', 'body', 'cover', 'status', 'tags']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # set by moderation.deletion only
+        self.fields['status'].choices = [
+            choice for choice in self.fields['status'].choices if choice[0] != Post.Status.DELETING
+        ]
 
     def clean_body(self):
         data = self.cleaned_data.get('body', '')
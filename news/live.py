@@ -0,0 +1,180 @@
+"""Live comment and like updates for post pages, pushed over Server-Sent Events.
+
+Every process runs at most one watcher task on its event loop. It reads the
+outbox (core/outbox.py) for ``comment.created``, ``like.created`` and
+``like.deleted`` events of the posts somebody is watching, every
+``LIVE_POLL_SECONDS`` and only while there are subscribers. Like the relay,
+it keeps its place with a ``core.outbox.Cursor``, so an event committed
+after a later one was read is still pushed. Each event is turned into an SSE frame once (a visible comment rendered to HTML, a like
+into the post's new like count) and the same string is queued for every
+subscriber of that post, so a connected reader costs a queue and nothing
+per poll.
+
+A reader that does not keep up (its queue fills) is disconnected; the
+browser reconnects with ``Last-Event-ID`` and ``replay`` sends what it
+missed. Streams also end after ``LIVE_MAX_SECONDS``, because Django does
+not notice a client going away during a streaming response and the
+subscription would otherwise outlive it.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.template.loader import render_to_string
+
+from core import outbox
+from core.models import OutboxEvent
+
+from .models import Comment, Like
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ('comment.created', 'like.created', 'like.deleted')
+QUEUE_SIZE = 100
+REPLAY_LIMIT = 200
+
+
+def frame(event_id: int, name: str, data: dict) -> str:
+    return f'id: {event_id}\nevent: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+
+
+async def frames_for(events: list[OutboxEvent]) -> list[tuple[int, str]]:
+    """``(post_id, frame)`` for each event that readers should see."""
+    comment_ids = [event.payload['id'] for event in events if event.topic == 'comment.created']
+    comments = {
+        comment.pk: comment
+        async for comment in Comment.objects.filter(pk__in=comment_ids, status=Comment.Status.VISIBLE).select_related('author')
+    }
+    liked = {event.payload['post_id'] for event in events if event.topic != 'comment.created'}
+    counts = {}
+    for post_id in liked:
+        counts[post_id] = await Like.objects.filter(post_id=post_id).acount()
+    frames, last_like = [], {}
+    for event in events:
+        post_id = event.payload['post_id']
+        if event.topic == 'comment.created':
+            comment = comments.get(event.payload['id'])
+            if comment is not None:
+                html = render_to_string('news/_comment_content.html', {'comment': comment})
+                frames.append((post_id, frame(event.pk, 'comment', {
+                    'id': comment.pk, 'parent_id': comment.parent_id, 'html': html,
+                })))
+        else:
+            last_like[post_id] = event.pk
+    # one like count per post and poll, however many likes came in
+    for post_id, event_id in last_like.items():
+        frames.append((post_id, frame(event_id, 'likes', {'count': counts[post_id]})))
+    return frames
+
+
+async def pending_events(after: int, post_ids, limit: Optional[int] = None) -> list[OutboxEvent]:
+    queryset = OutboxEvent.objects.filter(
+        pk__gt=after, topic__in=TOPICS, key__in=[f'post:{pk}' for pk in post_ids]
+    ).order_by('pk')
+    if limit:
+        queryset = queryset[:limit]
+    return [event async for event in queryset]
+
+
+async def replay(post_id: int, last_event_id: int) -> list[str]:
+    """Frames a reconnecting reader missed since ``Last-Event-ID``."""
+    events = await pending_events(last_event_id, [post_id], REPLAY_LIMIT)
+    return [text for _, text in await frames_for(events)]
+
+
+class Hub:
+    """Per-process fan-out from the outbox to the SSE streams of this event loop."""
+
+    def __init__(self):
+        self.subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self.cursor: Optional[outbox.Cursor] = None
+        self.task: Optional[asyncio.Task] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self, post_id: int) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # a new event loop (tests, a restarted worker): nothing of the old one survives
+            self.subscribers.clear()
+            self.cursor, self.task, self.loop = None, None, loop
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.subscribers[post_id].add(queue)
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.watch())
+        return queue
+
+    def unsubscribe(self, post_id: int, queue: asyncio.Queue) -> None:
+        queues = self.subscribers.get(post_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self.subscribers[post_id]
+
+    def publish(self, post_id: int, text: str) -> None:
+        for queue in list(self.subscribers.get(post_id, ())):
+            try:
+                queue.put_nowait(text)
+            except asyncio.QueueFull:
+                # too slow: end its stream, the browser reconnects and replays
+                self.unsubscribe(post_id, queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    async def poll(self) -> None:
+        if self.cursor is None:
+            self.cursor = await sync_to_async(outbox.Cursor.at_end)(OutboxEvent.objects.all())
+        # ids of every new event move the cursor; only the watched posts' events are loaded
+        pending = OutboxEvent.objects.filter(self.cursor.pending()).order_by('pk')
+        seen = [row async for row in pending.values_list('pk', 'topic', 'key')]
+        keys = {f'post:{pk}' for pk in self.subscribers}
+        wanted = [pk for pk, topic, key in seen if topic in TOPICS and key in keys]
+        self.cursor.advance(pk for pk, _, _ in seen)
+        if wanted:
+            events = [event async for event in OutboxEvent.objects.filter(pk__in=wanted).order_by('pk')]
+            for post_id, text in await frames_for(events):
+                self.publish(post_id, text)
+
+    async def watch(self) -> None:
+        while self.subscribers:
+            try:
+                # no request cycle closes the connection polls run on: drop it once
+                # it is past CONN_MAX_AGE or broken, as request_finished would
+                await sync_to_async(close_old_connections)()
+                await self.poll()
+            except Exception:
+                logger.exception('Live updates poll failed')
+            await asyncio.sleep(settings.LIVE_POLL_SECONDS)
+        # the next reader starts from what is new then, not from where this one stopped
+        self.cursor = None
+
+
+hub = Hub()
+
+
+async def stream(post_id: int, last_event_id: Optional[int] = None) -> AsyncIterator[str]:
+    queue = hub.subscribe(post_id)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_MAX_SECONDS
+    try:
+        yield 'retry: 3000\n\n'
+        if last_event_id is not None:
+            for text in await replay(post_id, last_event_id):
+                yield text
+        while (left := deadline - loop.time()) > 0:
+            try:
+                text = await asyncio.wait_for(queue.get(), timeout=min(settings.LIVE_KEEPALIVE_SECONDS, left))
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if text is None:
+                break
+            yield text
+    finally:
+        hub.unsubscribe(post_id, queue)
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from core import outbox
+from core.models import OutboxEvent
+from news import related
+from news.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Refresh "read next" neighbours from co-likes. By default only posts affected by likes and '
+        'unlikes since the previous run are recomputed; the first run, and --full, recompute every published post.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--top-k', type=int, default=related.TOP_K)
+
+    def handle(self, *args, **options):
+        position = None if options['full'] else related.cursor()
+        if position is None:
+            # taken before the likes are read: events written meanwhile are read by the next run
+            position = outbox.Cursor.at_end(OutboxEvent.objects.all())
+            post_ids = list(
+                Post.objects.filter(status=Post.Status.PUBLISHED).order_by('pk').values_list('pk', flat=True).iterator()
+            )
+        else:
+            post_ids = related.posts_to_refresh(position)
+        count = related.refresh(post_ids, batch_size=options['batch_size'], top_k=options['top_k'])
+        outbox.save_cursor(related.CONSUMER, position)
+        self.stdout.write(self.style.SUCCESS(f'Related posts refreshed for {count} posts.'))
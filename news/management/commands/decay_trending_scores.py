@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from news.models import Post, Comment, Like
+
+# scores decayed below this are cleared so later runs can skip the post
+MIN_SCORE = 1e-4
+
+
+class Command(BaseCommand):
+    help = (
+        'Re-base all trending scores to the current time so they are comparable. '
+        'Run periodically (e.g. every 15 minutes); --rebuild recomputes them from likes and comments.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--rebuild', action='store_true')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        rebuild = options['rebuild']
+        now = timezone.now()
+        queryset = Post.objects.all() if rebuild else Post.objects.filter(trending_score__gt=0)
+        last_pk = 0
+        updated = 0
+        while True:
+            with transaction.atomic():
+                posts = list(
+                    queryset.select_for_update()
+                    .filter(pk__gt=last_pk)
+                    .order_by('pk')
+                    .only('pk', 'trending_score', 'trending_at')[:batch_size]
+                )
+                if not posts:
+                    break
+                if rebuild:
+                    scores = self.scores_from_events([p.pk for p in posts], now)
+                for post in posts:
+                    if rebuild:
+                        score = scores.get(post.pk, 0.0)
+                    else:
+                        score = post.trending_score * Post.trending_decay((now - (post.trending_at or now)).total_seconds())
+                    post.trending_score = score if score >= MIN_SCORE else 0.0
+                    post.trending_at = now if post.trending_score else None
+                Post.objects.bulk_update(posts, ['trending_score', 'trending_at'])
+            updated += len(posts)
+            last_pk = posts[-1].pk
+        self.stdout.write(self.style.SUCCESS(f'Trending scores updated for {updated} posts.'))
+
+    def scores_from_events(self, post_ids, now):
+        scores = defaultdict(float)
+        events = [
+            (Like.objects.filter(post_id__in=post_ids), settings.TRENDING_LIKE_WEIGHT),
+            (Comment.objects.filter(post_id__in=post_ids, status=Comment.Status.VISIBLE), settings.TRENDING_COMMENT_WEIGHT),
+        ]
+        for queryset, weight in events:
+            for post_id, created_at in queryset.values_list('post_id', 'created_at').iterator():
+                scores[post_id] += weight * Post.trending_decay((now - created_at).total_seconds())
+        return scores
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand
+
+from news.models import Post, Comment, Like, Tag
+
+EXPORTS = {
+    'tag': (
+        Tag,
+        ['name', 'slug', 'kind'],
+    ),
+    'post': (
+        Post,
+        ['id', 'title', 'slug', 'summary', 'body', 'cover', 'author__username', 'status',
+         'published_at', 'created_at', 'updated_at', 'views_count'],
+    ),
+    'post_tag': (
+        Post.tags.through,
+        ['post_id', 'tag__slug'],
+    ),
+    'comment': (
+        Comment,
+        ['id', 'post_id', 'parent_id', 'author__username', 'body', 'status', 'created_at', 'updated_at'],
+    ),
+    'like': (
+        Like,
+        ['id', 'post_id', 'user__username', 'created_at'],
+    ),
+}
+
+
+# users and tags are referred to by their natural keys, not by primary key
+RENAMES = {'author__username': 'author', 'user__username': 'user', 'tag__slug': 'tag'}
+
+
+def json_default(value):
+    # full microsecond precision, unlike DjangoJSONEncoder
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def open_output(path: str):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+class Command(BaseCommand):
+    help = 'Stream tags, posts, comments and likes to a JSON Lines file (use import_news to load it).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Output path ('-' for stdout, '.gz' to compress)")
+        parser.add_argument('--types', nargs='+', choices=list(EXPORTS), default=list(EXPORTS))
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        out = open_output(options['output'])
+        try:
+            # parents before children so the file can be imported in one pass
+            for kind in EXPORTS:
+                if kind not in options['types']:
+                    continue
+                model, fields = EXPORTS[kind]
+                started = time.monotonic()
+                rows = 0
+                for row in model.objects.order_by('pk').values(*fields).iterator(chunk_size=options['chunk_size']):
+                    row = {RENAMES.get(key, key): value for key, value in row.items()}
+                    row['type'] = kind
+                    out.write(json.dumps(row, ensure_ascii=False, default=json_default))
+                    out.write('\n')
+                    rows += 1
+                elapsed = max(time.monotonic() - started, 1e-6)
+                self.stderr.write(f'{kind}: {rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)')
+        finally:
+            if out is not sys.stdout:
+                out.close()
@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import bleach
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.template.defaultfilters import slugify
+from django.utils.dateparse import parse_datetime
+
+from accounts.models import Profile
+from core import outbox
+from news import related, suggest
+from news.models import (
+    Post, Comment, Like, Tag, ALLOWED_TAGS, ALLOWED_ATTRIBUTES, ALLOWED_PROTOCOLS,
+    comment_event, like_event, post_event,
+)
+
+# import order: flushing a type first flushes everything it references
+DEPENDS_ON = {'tag': [], 'post': [], 'post_tag': ['tag', 'post'], 'comment': ['post'], 'like': ['post']}
+# field naming the user a row belongs to
+USER_KEYS = {'post': 'author', 'comment': 'author', 'like': 'user'}
+
+
+def open_input(path: str):
+    if path == '-':
+        return sys.stdin
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    return open(path, encoding='utf-8')
+
+
+def sanitize(html: str) -> str:
+    return bleach.clean(
+        html or '',
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        protocols=ALLOWED_PROTOCOLS,
+        strip=True,
+    )
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    # bulk_create runs auto_now/auto_now_add pre_save hooks; keep the exported values instead
+    fields = [f for m in models for f in m._meta.concrete_fields if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    help = (
+        'Load tags, posts, comments and likes from a JSON Lines file produced by export_news. '
+        'Rows keep their primary keys; authors are matched by username and tags by slug.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Input path ('-' for stdin, '.gz' for compressed)")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--create-users', action='store_true', help='Create missing authors with unusable passwords')
+        parser.add_argument('--ignore-conflicts', action='store_true', help='Skip rows whose primary key already exists')
+
+    def handle(self, *args, **options):
+        self.chunk_size = options['chunk_size']
+        self.create_users = options['create_users']
+        self.ignore_conflicts = options['ignore_conflicts']
+        self.user_ids: dict[str, int] = {}
+        self.tag_ids: dict[str, int] = {}
+        # posts and readers of the imported likes, for the related posts
+        self.liked_posts: set[int] = set()
+        self.likers: set[int] = set()
+        self.buffers = {kind: [] for kind in DEPENDS_ON}
+        self.imported = {kind: 0 for kind in DEPENDS_ON}
+        self.skipped = 0
+        # ids of skipped posts and comments, whose comments, replies and likes are skipped too
+        self.skipped_ids = {kind: set() for kind in DEPENDS_ON}
+        started = time.monotonic()
+
+        source = open_input(options['input'])
+        try:
+            with preserve_timestamps(Post, Comment, Like):
+                for line_no, line in enumerate(source, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                        kind = row.pop('type')
+                    except (ValueError, KeyError) as exc:
+                        raise CommandError(f'line {line_no}: {exc}')
+                    if kind not in self.buffers:
+                        raise CommandError(f'line {line_no}: unknown type {kind!r}')
+                    self.buffers[kind].append(row)
+                    if len(self.buffers[kind]) >= self.chunk_size:
+                        self.flush(kind)
+                        self.report(started)
+                for kind in DEPENDS_ON:
+                    self.flush(kind)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.reset_sequences()
+        # bulk_create bypasses the receivers that maintain the denormalized data
+        call_command('rebuild_archive_index', stdout=self.stdout)
+        call_command('recompute_author_stats', stdout=self.stdout)
+        call_command('rebuild_tag_counts', stdout=self.stdout)
+        call_command('decay_trending_scores', rebuild=True, stdout=self.stdout)
+        refreshed = related.refresh(related.affected_posts(self.liked_posts, self.likers))
+        self.stdout.write(self.style.SUCCESS(f'Related posts refreshed for {refreshed} posts.'))
+        suggest.invalidate()
+        self.report(started)
+        if self.skipped:
+            self.stderr.write(f'skipped {self.skipped} rows with unknown authors or tags, or of skipped posts/comments')
+
+    def report(self, started: float) -> None:
+        total = sum(self.imported.values())
+        elapsed = max(time.monotonic() - started, 1e-6)
+        counts = ', '.join(f'{kind}s={n}' for kind, n in self.imported.items())
+        self.stderr.write(f'{counts} ({total / elapsed:.0f} rows/s)')
+
+    def flush(self, kind: str) -> None:
+        for dependency in DEPENDS_ON[kind]:
+            self.flush(dependency)
+        rows, self.buffers[kind] = self.buffers[kind], []
+        if not rows:
+            return
+        if kind in USER_KEYS:
+            self.resolve_users({row[USER_KEYS[kind]] for row in rows})
+        if kind == 'post_tag':
+            self.resolve_tags({row['tag'] for row in rows})
+        objects = []
+        for row in rows:
+            obj = None if self.orphaned(kind, row) else getattr(self, f'build_{kind}')(row)
+            if obj is None:
+                self.skipped += 1
+                if 'id' in row:
+                    self.skipped_ids[kind].add(row['id'])
+                continue
+            objects.append(obj)
+        if not objects:
+            return
+        model = type(objects[0])
+        with transaction.atomic():
+            events = list(self.events(kind, self.new_objects(model, objects)))
+            # tags are matched by slug, so those already here are kept
+            model.objects.bulk_create(objects, ignore_conflicts=self.ignore_conflicts or kind == 'tag')
+            # bulk_create sends no post_save, so the outbox events are written here
+            outbox.emit_many(events)
+        if kind == 'like':
+            self.liked_posts.update(like.post_id for like in objects)
+            self.likers.update(like.user_id for like in objects)
+        self.imported[kind] += len(objects)
+
+    def new_objects(self, model, objects: list) -> list:
+        if not self.ignore_conflicts or objects[0].pk is None:
+            return objects
+        existing = set(model.objects.filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+        return [obj for obj in objects if obj.pk not in existing]
+
+    def events(self, kind: str, objects: list):
+        for obj in objects:
+            if kind == 'post' and obj._current_listed_at() is not None:
+                yield 'post.published', f'post:{obj.pk}', post_event(obj, obj.published_at)
+            elif kind == 'comment':
+                yield 'comment.created', f'post:{obj.post_id}', comment_event(obj)
+            elif kind == 'like':
+                yield 'like.created', f'post:{obj.post_id}', like_event(obj)
+
+    def orphaned(self, kind: str, row: dict) -> bool:
+        if kind in ('tag', 'post'):
+            return False
+        if row['post_id'] in self.skipped_ids['post']:
+            return True
+        return kind == 'comment' and row.get('parent_id') in self.skipped_ids['comment']
+
+    def resolve_users(self, usernames: set) -> None:
+        missing = [name for name in usernames if name not in self.user_ids]
+        if not missing:
+            return
+        self.user_ids.update(User.objects.filter(username__in=missing).values_list('username', 'id'))
+        to_create = [name for name in missing if name not in self.user_ids]
+        if to_create and self.create_users:
+            users = []
+            for name in to_create:
+                user = User(username=name)
+                user.set_unusable_password()
+                users.append(user)
+            with transaction.atomic():
+                User.objects.bulk_create(users)
+                created = dict(User.objects.filter(username__in=to_create).values_list('username', 'id'))
+                Profile.objects.bulk_create([Profile(user_id=user_id) for user_id in created.values()])
+            self.user_ids.update(created)
+
+    def resolve_tags(self, slugs: set) -> None:
+        missing = [slug for slug in slugs if slug not in self.tag_ids]
+        if missing:
+            self.tag_ids.update(Tag.objects.filter(slug__in=missing).values_list('slug', 'id'))
+
+    def build_tag(self, row: dict) -> Tag:
+        return Tag(name=row['name'], slug=row['slug'], kind=row.get('kind') or Tag.Kind.HERO)
+
+    def build_post(self, row: dict) -> Optional[Post]:
+        author_id = self.user_ids.get(row['author'])
+        if author_id is None:
+            return None
+        return Post(
+            id=row['id'],
+            title=row['title'],
+            slug=row.get('slug') or slugify(row['title']),
+            summary=row.get('summary') or '',
+            body=sanitize(row.get('body')),
+            cover=row.get('cover') or None,
+            author_id=author_id,
+            status=row.get('status') or Post.Status.DRAFT,
+            published_at=parse_datetime(row['published_at']) if row.get('published_at') else None,
+            created_at=parse_datetime(row['created_at']),
+            updated_at=parse_datetime(row.get('updated_at') or row['created_at']),
+            views_count=row.get('views_count') or 0,
+        )
+
+    def build_post_tag(self, row: dict):
+        tag_id = self.tag_ids.get(row['tag'])
+        if tag_id is None:
+            return None
+        return Post.tags.through(post_id=row['post_id'], tag_id=tag_id)
+
+    def build_comment(self, row: dict) -> Optional[Comment]:
+        author_id = self.user_ids.get(row['author'])
+        if author_id is None:
+            return None
+        return Comment(
+            id=row['id'],
+            post_id=row['post_id'],
+            parent_id=row.get('parent_id'),
+            author_id=author_id,
+            body=sanitize(row.get('body')),
+            status=row.get('status') or Comment.Status.VISIBLE,
+            created_at=parse_datetime(row['created_at']),
+            updated_at=parse_datetime(row.get('updated_at') or row['created_at']),
+        )
+
+    def build_like(self, row: dict) -> Optional[Like]:
+        user_id = self.user_ids.get(row['user'])
+        if user_id is None:
+            return None
+        return Like(
+            id=row['id'],
+            post_id=row['post_id'],
+            user_id=user_id,
+            created_at=parse_datetime(row['created_at']),
+        )
+
+    def reset_sequences(self) -> None:
+        statements = connection.ops.sequence_reset_sql(no_style(), [Post, Comment, Like, User])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
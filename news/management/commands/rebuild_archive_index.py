@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from news.models import Post, PostArchiveMonth
+
+
+class Command(BaseCommand):
+    help = 'Recompute per-month published post counts used by the archive.'
+
+    def handle(self, *args, **options):
+        rows = (
+            Post.objects.filter(status=Post.Status.PUBLISHED, published_at__isnull=False)
+            .annotate(year=ExtractYear('published_at'), month=ExtractMonth('published_at'))
+            .values('year', 'month')
+            .annotate(posts_count=Count('id'))
+            .order_by()
+        )
+        months = [PostArchiveMonth(**row) for row in rows]
+        with transaction.atomic():
+            PostArchiveMonth.objects.all().delete()
+            PostArchiveMonth.objects.bulk_create(months)
+        self.stdout.write(self.style.SUCCESS(f'Archive index rebuilt: {len(months)} months.'))
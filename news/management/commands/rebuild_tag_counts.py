@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from news.models import Post, Tag
+
+
+class Command(BaseCommand):
+    help = 'Recompute the number of published posts per tag.'
+
+    def handle(self, *args, **options):
+        published = (
+            Post.tags.through.objects.filter(
+                tag_id=OuterRef('pk'), post__status=Post.Status.PUBLISHED, post__published_at__isnull=False
+            )
+            .values('tag_id')
+            .annotate(n=Count('id'))
+            .values('n')
+        )
+        updated = Tag.objects.update(
+            posts_count=Coalesce(Subquery(published, output_field=IntegerField()), Value(0))
+        )
+        self.stdout.write(self.style.SUCCESS(f'Tag counts rebuilt: {updated} tags.'))
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:34
+
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def populate_archive_months(apps, schema_editor):
+    Post = apps.get_model('news', 'Post')
+    PostArchiveMonth = apps.get_model('news', 'PostArchiveMonth')
+    rows = (
+        Post.objects.filter(status='published', published_at__isnull=False)
+        .annotate(year=ExtractYear('published_at'), month=ExtractMonth('published_at'))
+        .values('year', 'month')
+        .annotate(posts_count=Count('id'))
+        .order_by()
+    )
+    PostArchiveMonth.objects.bulk_create([PostArchiveMonth(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0002_comment_parent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postarchivemonth',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='unique_archive_month'),
+        ),
+        migrations.RunPython(populate_archive_months, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_post_views_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='trending_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='trending_score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', '-trending_score'], name='news_post_trending_idx'),
+        ),
+    ]
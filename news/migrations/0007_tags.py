@@ -0,0 +1,32 @@
+# Generated by Django 4.2.30 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_related_post'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('kind', models.CharField(choices=[('hero', 'Герои'), ('patch', 'Патчи'), ('tournament', 'Турниры')], default='hero', max_length=10)),
+                ('posts_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['kind', 'name'],
+                'indexes': [models.Index(fields=['kind', '-posts_count'], name='news_tag_cloud_idx')],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', to='news.tag'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Django's icontains is UPPER(column) LIKE UPPER(%s) on PostgreSQL, so the
+# trigram indexes are built over UPPER(column). Other databases have no
+# trigram support and the admin does not offer substring search there.
+INDEXES = [
+    ('news_post_title_trgm_idx', 'news_post', 'title'),
+    ('news_comment_body_trgm_idx', 'news_comment', 'body'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0009_created_at_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
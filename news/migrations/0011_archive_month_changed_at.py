@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:31
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0010_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postarchivemonth',
+            name='changed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
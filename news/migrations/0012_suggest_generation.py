@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0011_archive_month_changed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('generation', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 14:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0012_suggest_generation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=10)),
+                ('target_id', models.BigIntegerField()),
+                ('label', models.CharField(blank=True, max_length=200)),
+                ('url', models.CharField(blank=True, max_length=300)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.DeleteModel(
+            name='SuggestGeneration',
+        ),
+    ]
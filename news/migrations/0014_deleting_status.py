@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0013_suggest_change_log'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('visible', 'Visible'), ('hidden', 'Hidden'), ('deleting', 'Deleting')], default='visible', max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='status',
+            field=models.CharField(choices=[('draft', 'Draft'), ('published', 'Published'), ('deleting', 'Deleting')], db_index=True, default='draft', max_length=10),
+        ),
+    ]
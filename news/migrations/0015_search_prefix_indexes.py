@@ -0,0 +1,45 @@
+from django.db import migrations
+
+# The admin searches these columns with icontains on PostgreSQL (trigram
+# indexes, see 0010) and with istartswith elsewhere. SQLite answers a
+# case-insensitive LIKE prefix from an index only when the index uses the
+# NOCASE collation. Django does not track these indexes: on SQLite a later
+# migration that remakes one of these tables drops them and must add them back.
+TRIGRAM_INDEXES = [
+    ('news_post_summary_trgm_idx', 'news_post', 'summary'),
+]
+NOCASE_INDEXES = [
+    ('news_post_title_nocase_idx', 'news_post', 'title'),
+    ('news_post_summary_nocase_idx', 'news_post', 'summary'),
+    ('news_comment_body_nocase_idx', 'news_comment', 'body'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        for name, table, column in TRIGRAM_INDEXES:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+            )
+    elif vendor == 'sqlite':
+        for name, table, column in NOCASE_INDEXES:
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({column} COLLATE NOCASE)')
+
+
+def drop_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    indexes = {'postgresql': TRIGRAM_INDEXES, 'sqlite': NOCASE_INDEXES}.get(vendor, [])
+    for name, _, _ in indexes:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0014_deleting_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
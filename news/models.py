@@ -1,14 +1,24 @@
 from __future__ import annotations
 
+from collections import Counter
+from datetime import datetime
 from typing import Optional
 
 import bleach
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from django.template.defaultfilters import slugify
 from django.urls import reverse
 from django.utils import timezone
 
+from core import metrics, outbox
+
+from .signals import post_published, post_unpublished, posts_unpublished
+
 
 ALLOWED_TAGS = [
     'a', 'p', 'ul', 'ol', 'li', 'strong', 'em', 'code', 'pre', 'img', 'blockquote', 'br', 'h2', 'h3', 'h4'
@@ -20,10 +30,57 @@ ALLOWED_ATTRIBUTES = {
 ALLOWED_PROTOCOLS = ['http', 'https']
 
 
+class Tag(models.Model):
+    """A hero, patch or tournament a post can be filed under.
+
+    ``posts_count`` is the number of published posts with the tag, kept up to
+    date on tagging and on publish/unpublish (``manage.py rebuild_tag_counts``
+    recomputes it), so tag clouds and tag feeds never count over ``Post``.
+    """
+
+    class Kind(models.TextChoices):
+        HERO = 'hero', 'Герои'
+        PATCH = 'patch', 'Патчи'
+        TOURNAMENT = 'tournament', 'Турниры'
+
+    name = models.CharField(max_length=100)
+    slug = models.SlugField(max_length=100, unique=True)
+    kind = models.CharField(max_length=10, choices=Kind.choices, default=Kind.HERO)
+    posts_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', '-posts_count'], name='news_tag_cloud_idx'),
+        ]
+        ordering = ['kind', 'name']
+
+    def __str__(self) -> str:
+        return self.name
+
+    def get_absolute_url(self) -> str:
+        return reverse('tag_detail', kwargs={'slug': self.slug})
+
+    def save(self, *args, **kwargs):
+        if not self.slug:
+            self.slug = slugify(self.name)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def bump(cls, tag_counts: dict[int, int], sign: int) -> None:
+        """Adds ``sign * n`` to the count of every ``tag_id: n`` in ``tag_counts``."""
+        by_delta: dict[int, list[int]] = {}
+        for tag_id, n in tag_counts.items():
+            by_delta.setdefault(sign * n, []).append(tag_id)
+        for delta, tag_ids in by_delta.items():
+            cls.objects.filter(pk__in=tag_ids).update(posts_count=Greatest(F('posts_count') + delta, 0))
+
+
 class Post(models.Model):
     class Status(models.TextChoices):
         DRAFT = 'draft', 'Draft'
         PUBLISHED = 'published', 'Published'
+        # queued in moderation.deletion: hidden from everyone, no longer editable
+        DELETING = 'deleting', 'Deleting'
 
     title = models.CharField(max_length=200)
     slug = models.SlugField()
@@ -35,18 +92,50 @@ class Post(models.Model):
     published_at = models.DateTimeField(blank=True, null=True, db_index=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # flushed in batches by news.pageviews, lags real traffic by up to POST_VIEWS_FLUSH_SECONDS
+    views_count = models.PositiveIntegerField(default=0)
+    # time-decayed engagement, valid as of trending_at; see Post.bump_trending
+    trending_score = models.FloatField(default=0)
+    trending_at = models.DateTimeField(blank=True, null=True)
+    tags = models.ManyToManyField(Tag, related_name='posts', blank=True)
 
     class Meta:
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['published_at']),
             models.Index(fields=['author']),
+            models.Index(fields=['status', '-views_count'], name='news_post_most_read_idx'),
+            models.Index(fields=['status', '-trending_score'], name='news_post_trending_idx'),
         ]
         ordering = ['-published_at', '-created_at']
 
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        if 'status' in loaded and 'published_at' in loaded:
+            instance._listed_at = instance._current_listed_at()
+        return instance
+
+    def _current_listed_at(self):
+        # the date a post is publicly listed under, None while it is not listed
+        if self.status == Post.Status.PUBLISHED and self.published_at:
+            return self.published_at
+        return None
+
+    def _stored_listed_at(self):
+        if hasattr(self, '_listed_at'):
+            return self._listed_at
+        if self.pk is None:
+            return None
+        stored = Post.objects.filter(pk=self.pk).values('status', 'published_at').first()
+        if stored and stored['status'] == Post.Status.PUBLISHED:
+            return stored['published_at']
+        return None
+
     def get_absolute_url(self) -> str:
         if not self.published_at:
             year = self.created_at.year
@@ -56,6 +145,31 @@ class Post(models.Model):
             month = self.published_at.month
         return reverse('post_detail', kwargs={'year': year, 'month': month, 'slug': self.slug})
 
+    @staticmethod
+    def trending_decay(seconds: float) -> float:
+        # weight left after `seconds`: halves every TRENDING_HALF_LIFE_HOURS
+        return 0.5 ** (max(seconds, 0.0) / (settings.TRENDING_HALF_LIFE_HOURS * 3600))
+
+    @classmethod
+    def bump_trending(cls, post_id: int, weight: float, happened_at: Optional[datetime] = None) -> None:
+        """Decays the stored score to now and adds ``weight`` (aged from ``happened_at``).
+
+        Each like or comment adds its weight when created; removing one subtracts
+        the weight it has left today. ``manage.py decay_trending_scores``
+        periodically re-bases every score to the same time so they stay comparable.
+        """
+        now = timezone.now()
+        if happened_at is not None:
+            weight *= cls.trending_decay((now - happened_at).total_seconds())
+        with transaction.atomic():
+            row = cls.objects.select_for_update().filter(pk=post_id).values('trending_score', 'trending_at').first()
+            if row is None:
+                return
+            score = row['trending_score']
+            if row['trending_at'] is not None:
+                score *= cls.trending_decay((now - row['trending_at']).total_seconds())
+            cls.objects.filter(pk=post_id).update(trending_score=max(score + weight, 0.0), trending_at=now)
+
     def _ensure_unique_slug_in_month(self) -> None:
         # Ensure uniqueness of slug within the publication month.
         ref_dt = self.published_at or self.created_at or timezone.now()
@@ -87,10 +201,18 @@ class Post(models.Model):
             self.slug = slugify(self.title)
 
     def save(self, *args, **kwargs):
+        # publish/unpublish receivers (counters, outbox events) commit together with the post
+        with transaction.atomic():
+            self._save(*args, **kwargs)
+
+    def _save(self, *args, **kwargs):
         is_new = self.pk is None
         is_publishing = self.status == Post.Status.PUBLISHED and not self.published_at
         if is_publishing:
             self.published_at = timezone.now()
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'published_at'}
+        listed_before = self._stored_listed_at()
         # sanitize and slug before first save
         self.clean()
         super().save(*args, **kwargs)
@@ -100,11 +222,20 @@ class Post(models.Model):
         if self.slug != old_slug:
             super().save(update_fields=['slug'])
 
+        listed_now = self._current_listed_at()
+        if listed_now != listed_before:
+            if listed_before is not None:
+                post_unpublished.send(sender=Post, post=self, published_at=listed_before)
+            if listed_now is not None:
+                post_published.send(sender=Post, post=self, published_at=listed_now)
+        self._listed_at = listed_now
+
 
 class Comment(models.Model):
     class Status(models.TextChoices):
         VISIBLE = 'visible', 'Visible'
         HIDDEN = 'hidden', 'Hidden'
+        DELETING = 'deleting', 'Deleting'
 
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', db_index=True)
     parent = models.ForeignKey(
@@ -125,6 +256,7 @@ class Comment(models.Model):
         indexes = [
             models.Index(fields=['post', 'created_at']),
             models.Index(fields=['parent', 'created_at']),
+            models.Index(fields=['created_at']),
         ]
         ordering = ['created_at']
 
@@ -140,6 +272,20 @@ class Comment(models.Model):
     def __str__(self) -> str:
         return f"Comment by {self.author} on {self.post}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            # lets receivers tell a hide/unhide apart from other edits
+            instance._stored_status = instance.status
+        return instance
+
+    def save(self, *args, **kwargs):
+        # post_save receivers (counters, outbox event) commit together with the comment
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._stored_status = self.status
+
 
 class Like(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes', db_index=True)
@@ -150,6 +296,329 @@ class Like(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['post', 'user'], name='unique_like_per_user_post')
         ]
+        indexes = [
+            models.Index(fields=['created_at']),
+        ]
 
     def __str__(self) -> str:
         return f"Like by {self.user} on {self.post}"
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class PostRevision(models.Model):
+    """One saved version of a post's title and body.
+
+    ``data`` is the zlib-compressed body: the full text when ``is_snapshot``,
+    otherwise a line diff against the previous revision. See news/revisions.py.
+    """
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='revisions')
+    number = models.PositiveIntegerField()
+    author = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    title = models.CharField(max_length=200)
+    is_snapshot = models.BooleanField(default=False)
+    data = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'number'], name='unique_post_revision_number')
+        ]
+        ordering = ['-number']
+
+    def __str__(self) -> str:
+        return f"{self.post_id} r{self.number}"
+
+
+class RelatedPost(models.Model):
+    """Precomputed "read next" neighbours of a post, from co-likes (see news/related.py)."""
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'related'], name='unique_related_post')
+        ]
+        indexes = [
+            models.Index(fields=['post', '-score']),
+            models.Index(fields=['computed_at']),
+        ]
+        ordering = ['-score']
+
+    def __str__(self) -> str:
+        return f"{self.post_id} -> {self.related_id} ({self.score:.3f})"
+
+
+class PostArchiveMonth(models.Model):
+    """Number of published posts per publication month.
+
+    Maintained from ``post_published``/``post_unpublished`` so the archive
+    sidebar never has to scan ``Post``; ``manage.py rebuild_archive_index``
+    recomputes it from scratch. ``changed_at`` moves whenever a listed post of
+    the month changes and versions the cached sitemap shard.
+    """
+
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    posts_count = models.PositiveIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='unique_archive_month')
+        ]
+        ordering = ['-year', '-month']
+
+    def __str__(self) -> str:
+        return f"{self.year}-{self.month:02d}: {self.posts_count}"
+
+    @classmethod
+    def bump(cls, year: int, month: int, delta: int) -> None:
+        updated = cls.objects.filter(year=year, month=month).update(
+            posts_count=Greatest(F('posts_count') + delta, 0)
+        )
+        if updated or delta <= 0:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(year=year, month=month, posts_count=delta)
+        except IntegrityError:
+            # created concurrently
+            cls.objects.filter(year=year, month=month).update(posts_count=F('posts_count') + delta)
+
+
+class SuggestChange(models.Model):
+    """One change to the typeahead index of news/suggest.py.
+
+    Written in the transaction of the change it describes; other processes
+    replay the rows they have not seen instead of rebuilding their index.
+    """
+
+    kind = models.CharField(max_length=10)
+    target_id = models.BigIntegerField()
+    # blank once the post or user has left the index
+    label = models.CharField(max_length=200, blank=True)
+    url = models.CharField(max_length=300, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.kind}:{self.target_id}"
+
+
+@receiver(post_published, sender=Post)
+def count_published_post(sender, post: Post, published_at, **kwargs):
+    PostArchiveMonth.bump(published_at.year, published_at.month, 1)
+
+
+@receiver(post_unpublished, sender=Post)
+def uncount_unpublished_post(sender, post: Post, published_at, **kwargs):
+    PostArchiveMonth.bump(published_at.year, published_at.month, -1)
+
+
+@receiver(posts_unpublished, sender=Post)
+def uncount_unpublished_posts(sender, posts: list, **kwargs):
+    months = Counter((published_at.year, published_at.month) for _, published_at in posts)
+    for (year, month), n in months.items():
+        PostArchiveMonth.bump(year, month, -n)
+
+
+def invalidate_sitemap_month(year: int, month: int) -> None:
+    # cached shards are keyed by changed_at (see news/sitemaps.py); it lives in the
+    # database so every worker sees the change, unlike a key in the per-process cache
+    PostArchiveMonth.objects.filter(year=year, month=month).update(changed_at=timezone.now())
+
+
+@receiver(post_published, sender=Post)
+@receiver(post_unpublished, sender=Post)
+def refresh_sitemap_on_listing(sender, post: Post, published_at, **kwargs):
+    invalidate_sitemap_month(published_at.year, published_at.month)
+
+
+@receiver(posts_unpublished, sender=Post)
+def refresh_sitemap_on_unlisting(sender, posts: list, **kwargs):
+    for year, month in {(published_at.year, published_at.month) for _, published_at in posts}:
+        invalidate_sitemap_month(year, month)
+
+
+@receiver(post_save, sender=Post)
+def refresh_sitemap_on_edit(sender, instance: Post, **kwargs):
+    # lastmod of a listed post changes with every save
+    listed_at = instance._current_listed_at()
+    if listed_at is not None:
+        invalidate_sitemap_month(listed_at.year, listed_at.month)
+
+
+@receiver(pre_delete, sender=Post)
+def unlist_deleted_post(sender, instance: Post, **kwargs):
+    listed_at = instance._stored_listed_at()
+    if listed_at is not None:
+        post_unpublished.send(sender=Post, post=instance, published_at=listed_at)
+
+
+def listed_tag_counts(post_ids=None, tag_ids=None) -> dict[int, int]:
+    """Number of published posts per tag among the given posts and/or tags."""
+    links = Post.tags.through.objects.filter(post__status=Post.Status.PUBLISHED, post__published_at__isnull=False)
+    if post_ids is not None:
+        links = links.filter(post_id__in=post_ids)
+    if tag_ids is not None:
+        links = links.filter(tag_id__in=tag_ids)
+    return dict(links.values_list('tag_id').annotate(n=Count('id')).order_by())
+
+
+def post_tag_counts(post: Post) -> dict[int, int]:
+    # the status in the database may already be the new one, so don't filter on it
+    return dict.fromkeys(Post.tags.through.objects.filter(post_id=post.pk).values_list('tag_id', flat=True), 1)
+
+
+@receiver(post_published, sender=Post)
+def count_post_tags(sender, post: Post, **kwargs):
+    Tag.bump(post_tag_counts(post), 1)
+
+
+@receiver(post_unpublished, sender=Post)
+def uncount_post_tags(sender, post: Post, **kwargs):
+    Tag.bump(post_tag_counts(post), -1)
+
+
+@receiver(posts_unpublished, sender=Post)
+def uncount_posts_tags(sender, posts: list, **kwargs):
+    links = Post.tags.through.objects.filter(post_id__in=[post.pk for post, _ in posts])
+    Tag.bump(dict(links.values_list('tag_id').annotate(n=Count('id')).order_by()), -1)
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def count_tagging(sender, instance, action, reverse, pk_set, **kwargs):
+    # post.tags.* when not reverse, tag.posts.* when reverse; only links to
+    # published posts are counted, judged by what is in the database
+    if reverse:
+        affected = lambda: listed_tag_counts(post_ids=pk_set, tag_ids=[instance.pk])
+    else:
+        affected = lambda: listed_tag_counts(post_ids=[instance.pk], tag_ids=pk_set)
+    if action == 'post_add':
+        # pk_set holds only the links that were actually created
+        Tag.bump(affected(), 1)
+    elif action in ('pre_remove', 'pre_clear'):
+        # pk_set of a removal also lists links that do not exist, and
+        # post_clear has none at all, so count before the rows go away
+        instance._tag_counts_removed = affected()
+    elif action in ('post_remove', 'post_clear'):
+        Tag.bump(instance.__dict__.pop('_tag_counts_removed', {}), -1)
+
+
+@receiver(post_save, sender=Like)
+def trend_on_like(sender, instance: Like, created: bool, **kwargs):
+    if created:
+        Post.bump_trending(instance.post_id, settings.TRENDING_LIKE_WEIGHT)
+
+
+@receiver(post_delete, sender=Like)
+def untrend_on_unlike(sender, instance: Like, **kwargs):
+    Post.bump_trending(instance.post_id, -settings.TRENDING_LIKE_WEIGHT, happened_at=instance.created_at)
+
+
+@receiver(post_save, sender=Comment)
+def trend_on_comment(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        if instance.status == Comment.Status.VISIBLE:
+            Post.bump_trending(instance.post_id, settings.TRENDING_COMMENT_WEIGHT)
+        return
+    before = instance.__dict__.get('_stored_status')
+    visible = instance.status == Comment.Status.VISIBLE
+    if before is None or (before == Comment.Status.VISIBLE) == visible:
+        return
+    # hidden by moderation (or shown again): take back, or return, what it has left of its weight
+    sign = 1 if visible else -1
+    Post.bump_trending(instance.post_id, sign * settings.TRENDING_COMMENT_WEIGHT, happened_at=instance.created_at)
+
+
+@receiver(post_delete, sender=Comment)
+def untrend_on_comment_delete(sender, instance: Comment, **kwargs):
+    if instance.status == Comment.Status.VISIBLE:
+        Post.bump_trending(instance.post_id, -settings.TRENDING_COMMENT_WEIGHT, happened_at=instance.created_at)
+
+
+@receiver(post_save, sender=Like)
+def count_like(sender, instance: Like, created: bool, **kwargs):
+    if created:
+        metrics.inc('news_likes_total', action='created')
+
+
+@receiver(post_delete, sender=Like)
+def count_unlike(sender, instance: Like, **kwargs):
+    metrics.inc('news_likes_total', action='deleted')
+
+
+@receiver(post_save, sender=Comment)
+def count_comment_write(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        metrics.inc('news_comments_total', status=instance.status)
+
+
+def post_event(post: Post, published_at) -> dict:
+    return {
+        'id': post.pk,
+        'title': post.title,
+        'slug': post.slug,
+        'url': post.get_absolute_url(),
+        'author_id': post.author_id,
+        'published_at': published_at.isoformat(),
+    }
+
+
+@receiver(post_published, sender=Post)
+def emit_post_published(sender, post: Post, published_at, **kwargs):
+    outbox.emit('post.published', f'post:{post.pk}', post_event(post, published_at))
+
+
+@receiver(post_unpublished, sender=Post)
+def emit_post_unpublished(sender, post: Post, published_at, **kwargs):
+    outbox.emit('post.unpublished', f'post:{post.pk}', post_event(post, published_at))
+
+
+@receiver(posts_unpublished, sender=Post)
+def emit_posts_unpublished(sender, posts: list, **kwargs):
+    outbox.emit_many(
+        ('post.unpublished', f'post:{post.pk}', post_event(post, published_at)) for post, published_at in posts
+    )
+
+
+def comment_event(comment: Comment) -> dict:
+    return {
+        'id': comment.pk,
+        'post_id': comment.post_id,
+        'parent_id': comment.parent_id,
+        'author_id': comment.author_id,
+        'status': comment.status,
+        'body': comment.body,
+        'created_at': comment.created_at.isoformat(),
+    }
+
+
+def like_event(like: Like) -> dict:
+    return {'id': like.pk, 'post_id': like.post_id, 'user_id': like.user_id}
+
+
+@receiver(post_save, sender=Comment)
+def emit_comment_created(sender, instance: Comment, created: bool, **kwargs):
+    if created:
+        outbox.emit('comment.created', f'post:{instance.post_id}', comment_event(instance))
+
+
+@receiver(post_save, sender=Like)
+def emit_like_created(sender, instance: Like, created: bool, **kwargs):
+    if created:
+        outbox.emit('like.created', f'post:{instance.post_id}', like_event(instance))
+
+
+@receiver(post_delete, sender=Like)
+def emit_like_deleted(sender, instance: Like, **kwargs):
+    outbox.emit('like.deleted', f'post:{instance.post_id}', like_event(instance))
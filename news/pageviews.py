@@ -0,0 +1,96 @@
+"""Buffered post view counting.
+
+``record_view`` is called on every post detail hit. A visitor is counted at
+most once per post within ``POST_VIEWS_DEDUP_SECONDS`` (tracked in the cache),
+and counted hits are accumulated in a per-process buffer instead of issuing an
+``UPDATE`` per request. The buffer is written as one batched ``UPDATE`` when it
+holds ``POST_VIEWS_FLUSH_SIZE`` hits or ``POST_VIEWS_FLUSH_SECONDS`` have
+passed since the last flush, and once more when the process exits. A flush that
+fails inside a request is logged and its hits are kept for the next one.
+"""
+from __future__ import annotations
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import Case, F, Value, When
+from django.http import HttpRequest
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+FLUSH_CHUNK = 500
+
+_lock = threading.Lock()
+_pending: Counter = Counter()
+_pending_hits = 0
+_last_flush = time.monotonic()
+
+
+def visitor_key(request: HttpRequest) -> str:
+    if request.user.is_authenticated:
+        return f'u{request.user.pk}'
+    session_key = getattr(request, 'session', None) and request.session.session_key
+    if session_key:
+        return f's{session_key}'
+    fingerprint = f"{request.META.get('REMOTE_ADDR', '')}|{request.META.get('HTTP_USER_AGENT', '')}"
+    return 'a' + hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()
+
+
+def record_view(request: HttpRequest, post_id: int) -> None:
+    global _pending_hits
+    seen_key = f'post_view:{post_id}:{visitor_key(request)}'
+    if not cache.add(seen_key, 1, timeout=settings.POST_VIEWS_DEDUP_SECONDS):
+        return
+    with _lock:
+        _pending[post_id] += 1
+        _pending_hits += 1
+        due = (
+            _pending_hits >= settings.POST_VIEWS_FLUSH_SIZE
+            or time.monotonic() - _last_flush >= settings.POST_VIEWS_FLUSH_SECONDS
+        )
+    if due:
+        try:
+            flush()
+        except DatabaseError:
+            # counting a view must never break the page (e.g. SQLite "database is locked")
+            logger.warning('Post view flush failed, %d hits kept for the next one', _pending_hits, exc_info=True)
+
+
+def flush() -> int:
+    """Writes buffered hits to the database; returns the number of posts updated."""
+    global _pending_hits, _last_flush
+    with _lock:
+        batch = dict(_pending)
+        _pending.clear()
+        _pending_hits = 0
+        _last_flush = time.monotonic()
+    if not batch:
+        return 0
+    post_ids = list(batch)
+    written = 0
+    try:
+        for start in range(0, len(post_ids), FLUSH_CHUNK):
+            chunk = post_ids[start:start + FLUSH_CHUNK]
+            increment = Case(*(When(pk=pk, then=Value(batch[pk])) for pk in chunk), default=Value(0))
+            Post.objects.filter(pk__in=chunk).update(views_count=F('views_count') + increment)
+            written += len(chunk)
+    except DatabaseError:
+        # keep the unwritten hits for the next flush rather than losing them
+        unwritten = {pk: batch[pk] for pk in post_ids[written:]}
+        with _lock:
+            _pending.update(unwritten)
+            _pending_hits += sum(unwritten.values())
+        raise
+    return len(post_ids)
+
+
+atexit.register(flush)
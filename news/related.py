@@ -0,0 +1,150 @@
+"""Item-item "read next" recommendations from co-likes.
+
+Two posts are similar when the same readers liked both. For a batch of
+target posts the computation is a sparse matrix product done with dicts:
+the likers of each target (rows of the like matrix) are joined with
+everything those readers liked, giving co-like counts, which are then
+normalised by popularity (cosine similarity)::
+
+    sim(i, j) = co_likes(i, j) / sqrt(likes(i) * likes(j))
+
+Readers with more than ``MAX_USER_LIKES`` likes are ignored: they add a lot
+of pairs and very little signal. The ``TOP_K`` best neighbours of every
+target are stored in ``RelatedPost``; the detail page only reads them.
+
+Between runs the ``like.created`` and ``like.deleted`` outbox events say
+which posts to refresh. The place reached in the outbox is kept as the
+offset of the ``related`` consumer (``OutboxOffset``), gaps included, so a
+like committed late or taken back is still seen by the next run.
+"""
+from __future__ import annotations
+
+import math
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from core import outbox
+from core.models import OutboxEvent, OutboxOffset
+
+from .models import Post, Like, RelatedPost
+
+TOP_K = 5
+MAX_USER_LIKES = 500
+ID_CHUNK = 500
+EVENT_BATCH = 5000
+CONSUMER = 'related'
+LIKE_TOPICS = ('like.created', 'like.deleted')
+
+
+def _chunks(ids: list, size: int = ID_CHUNK):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _like_counts(post_ids: Iterable[int]) -> dict[int, int]:
+    counts: dict[int, int] = {}
+    for chunk in _chunks(list(post_ids)):
+        counts.update(
+            Like.objects.filter(post_id__in=chunk).values_list('post_id').annotate(n=Count('id')).order_by()
+        )
+    return counts
+
+
+def similar_posts(post_ids: list[int], top_k: int = TOP_K) -> dict[int, list[tuple[int, float]]]:
+    """Top-k co-liked published posts for each of ``post_ids``."""
+    likers: dict[int, set[int]] = defaultdict(set)
+    for chunk in _chunks(post_ids):
+        for post_id, user_id in Like.objects.filter(post_id__in=chunk).values_list('post_id', 'user_id').iterator():
+            likers[post_id].add(user_id)
+
+    users = list({user_id for ids in likers.values() for user_id in ids})
+    heavy = {
+        user_id
+        for chunk in _chunks(users)
+        for user_id, n in Like.objects.filter(user_id__in=chunk).values_list('user_id').annotate(n=Count('id')).order_by()
+        if n > MAX_USER_LIKES
+    }
+    liked_by: dict[int, list[int]] = defaultdict(list)
+    for chunk in _chunks([u for u in users if u not in heavy]):
+        rows = Like.objects.filter(user_id__in=chunk, post__status=Post.Status.PUBLISHED).values_list('user_id', 'post_id')
+        for user_id, post_id in rows.iterator():
+            liked_by[user_id].append(post_id)
+
+    co_likes: dict[int, Counter] = {}
+    for post_id, users_of_post in likers.items():
+        counter = Counter()
+        for user_id in users_of_post:
+            counter.update(liked_by.get(user_id, ()))
+        counter.pop(post_id, None)
+        if counter:
+            co_likes[post_id] = counter
+
+    popularity = _like_counts({j for counter in co_likes.values() for j in counter} | set(co_likes))
+    result = {}
+    for post_id, counter in co_likes.items():
+        scored = [
+            (other_id, n / math.sqrt(popularity[post_id] * popularity[other_id]))
+            for other_id, n in counter.items()
+        ]
+        scored.sort(key=lambda item: (-item[1], -item[0]))
+        result[post_id] = scored[:top_k]
+    return result
+
+
+def store_related(post_ids: list[int], neighbours: dict[int, list[tuple[int, float]]], computed_at: datetime) -> None:
+    rows = [
+        RelatedPost(post_id=post_id, related_id=related_id, score=score, computed_at=computed_at)
+        for post_id in post_ids
+        for related_id, score in neighbours.get(post_id, ())
+    ]
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=post_ids).delete()
+        RelatedPost.objects.bulk_create(rows)
+
+
+def cursor() -> Optional[outbox.Cursor]:
+    """Place in the outbox reached by the last refresh; None until a full one has run."""
+    if not OutboxOffset.objects.filter(consumer=CONSUMER).exists():
+        return None
+    return outbox.cursor(CONSUMER)
+
+
+def posts_to_refresh(position: outbox.Cursor) -> list[int]:
+    """Posts whose neighbours may have changed with the like events past ``position``.
+
+    A like or unlike by a reader changes the co-like counts between the liked
+    post and everything else that reader liked, so all of those are
+    refreshed. ``position`` is moved past the events read.
+    """
+    post_ids: set[int] = set()
+    user_ids: set[int] = set()
+    while True:
+        ids = list(OutboxEvent.objects.filter(position.pending()).order_by('pk').values_list('pk', flat=True)[:EVENT_BATCH])
+        if not ids:
+            break
+        likes = OutboxEvent.objects.filter(pk__in=ids, topic__in=LIKE_TOPICS).values_list('payload', flat=True)
+        for payload in likes:
+            post_ids.add(payload['post_id'])
+            user_ids.add(payload['user_id'])
+        position.advance(ids)
+    return affected_posts(post_ids, user_ids)
+
+
+def affected_posts(post_ids: Iterable[int], user_ids: Iterable[int]) -> list[int]:
+    """``post_ids`` and every post liked by one of ``user_ids``, the readers whose likes changed."""
+    affected = set(post_ids)
+    for chunk in _chunks(list(set(user_ids))):
+        affected.update(Like.objects.filter(user_id__in=chunk).values_list('post_id', flat=True).iterator())
+    return sorted(affected)
+
+
+def refresh(post_ids: list[int], batch_size: int = 200, top_k: int = TOP_K) -> int:
+    computed_at = timezone.now()
+    for batch in _chunks(post_ids, batch_size):
+        store_related(batch, similar_posts(batch, top_k=top_k), computed_at)
+    return len(post_ids)
@@ -0,0 +1,108 @@
+"""Delta-compressed revision history for post bodies.
+
+Every ``POST_REVISION_SNAPSHOT_EVERY``-th revision (and the first one) stores
+the whole body; the others store a line diff against the revision before them.
+A diff is a list of operations, either ``[start, end]`` (copy these lines of
+the previous body) or a string (insert this text), JSON-encoded and
+zlib-compressed. Rebuilding any revision therefore reads at most one snapshot
+and ``POST_REVISION_SNAPSHOT_EVERY - 1`` diffs.
+"""
+from __future__ import annotations
+
+import difflib
+import json
+import zlib
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import Post, PostRevision
+
+
+def _pack(value) -> bytes:
+    return zlib.compress(json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def _unpack(data) -> object:
+    return json.loads(zlib.decompress(bytes(data)))
+
+
+def make_delta(old: str, new: str) -> list:
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_lines[j1:j2]))
+    return ops
+
+
+def apply_delta(old: str, ops: list) -> str:
+    old_lines = old.splitlines(keepends=True)
+    return ''.join(''.join(old_lines[op[0]:op[1]]) if isinstance(op, list) else op for op in ops)
+
+
+def body_at(post: Post, number: int) -> str:
+    """The body as of revision ``number`` of ``post``."""
+    snapshot = (
+        PostRevision.objects.filter(post=post, number__lte=number, is_snapshot=True)
+        .order_by('-number')
+        .values_list('number', flat=True)
+        .first()
+    )
+    if snapshot is None:
+        raise PostRevision.DoesNotExist(f'No snapshot before revision {number} of post {post.pk}')
+    chain = (
+        PostRevision.objects.filter(post=post, number__gte=snapshot, number__lte=number)
+        .order_by('number')
+        .values_list('is_snapshot', 'data')
+    )
+    body = ''
+    for is_snapshot, data in chain:
+        body = _unpack(data) if is_snapshot else apply_delta(body, _unpack(data))
+    return body
+
+
+def record_revision(post: Post, user=None, *, title: Optional[str] = None, body: Optional[str] = None) -> Optional[PostRevision]:
+    """Stores the title and body of ``post`` unless they equal the latest revision.
+
+    ``title``/``body`` override the values on the instance. Call it in the
+    transaction that saved the post, after ``lock_post``, so concurrent edits
+    get consecutive numbers instead of colliding on one.
+    """
+    title = post.title if title is None else title
+    body = post.body if body is None else body
+    every = max(settings.POST_REVISION_SNAPSHOT_EVERY, 1)
+    with transaction.atomic():
+        latest = PostRevision.objects.filter(post=post).order_by('-number').values('number', 'title').first()
+        previous_body = body_at(post, latest['number']) if latest else None
+        if latest and latest['title'] == title and previous_body == body:
+            return None
+        number = latest['number'] + 1 if latest else 1
+        is_snapshot = (number - 1) % every == 0
+        data = _pack(body if is_snapshot else make_delta(previous_body, body))
+        return PostRevision.objects.create(
+            post=post, number=number, author=user, title=title, is_snapshot=is_snapshot, data=data
+        )
+
+
+def lock_post(post: Post) -> None:
+    """Holds the row of ``post`` until the transaction ends: its saves and revisions go one at a time."""
+    Post.objects.select_for_update().filter(pk=post.pk).values_list('pk', flat=True).first()
+
+
+def ensure_baseline(post: Post) -> None:
+    """Records the stored version of a post that predates revision history."""
+    if PostRevision.objects.filter(post=post).exists():
+        return
+    stored = Post.objects.filter(pk=post.pk).values('title', 'body').first()
+    if stored:
+        record_revision(post, user=None, title=stored['title'], body=stored['body'])
+
+
+def diff_lines(old: str, new: str) -> list[str]:
+    return list(difflib.unified_diff(old.splitlines(), new.splitlines(), lineterm='', n=3))[2:]
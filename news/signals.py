@@ -0,0 +1,18 @@
+"""Signals sent by the news models.
+
+``post_published`` is sent when a post becomes publicly listed and
+``post_unpublished`` when it stops being listed (moved back to draft or
+deleted). Both carry ``post`` and ``published_at`` - the date the post is,
+or was, listed under. They are not sent for queryset ``update()`` or
+``bulk_create()``; the rebuild commands cover those paths.
+
+``posts_unpublished`` is sent instead of ``post_unpublished`` when many posts
+are taken off the listings with one ``update()`` (see moderation/deletion.py).
+It carries ``posts``, a list of ``(post, published_at)`` pairs, so receivers
+can fix their counters with a query per batch rather than per post.
+"""
+from django.dispatch import Signal
+
+post_published = Signal()
+post_unpublished = Signal()
+posts_unpublished = Signal()
@@ -0,0 +1,81 @@
+"""Sitemap index plus one shard per publication month.
+
+A shard is rendered from ``values_list`` rows over the ``published_at`` index,
+never from model instances, and streamed to the client while being collected
+for the cache. The cached copy is keyed by ``PostArchiveMonth.changed_at``, which the Post
+receivers in news/models.py move when a post of that month is published,
+edited or removed, so other months stay cached.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterator
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Post, PostArchiveMonth
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_CLOSE = '</urlset>\n'
+CHUNK_SIZE = 2000
+
+
+def month_range(year: int, month: int) -> tuple[datetime, datetime]:
+    start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+    end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def shard_cache_key(base_url: str, year: int, month: int) -> str:
+    changed_at = PostArchiveMonth.objects.filter(year=year, month=month).values_list('changed_at', flat=True).first()
+    version = changed_at.timestamp() if changed_at else 0
+    return f'sitemap:{year}-{month:02d}:v{version}:{base_url}'
+
+
+def render_index(base_url: str) -> str:
+    months = PostArchiveMonth.objects.filter(posts_count__gt=0).values_list('year', 'month')
+    parts = [XML_HEADER, '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n']
+    for year, month in months:
+        loc = base_url + reverse('sitemap_shard', kwargs={'year': year, 'month': month})
+        parts.append(f'<sitemap><loc>{escape(loc)}</loc></sitemap>\n')
+    parts.append('</sitemapindex>\n')
+    return ''.join(parts)
+
+
+def iter_shard(base_url: str, year: int, month: int) -> Iterator[str]:
+    start, end = month_range(year, month)
+    # every post of the shard shares the year/month part of its URL
+    url_template = base_url + reverse('post_detail', kwargs={'year': year, 'month': month, 'slug': 'SLUG'})
+    prefix, suffix = url_template.split('SLUG')
+    rows = (
+        Post.objects.filter(status=Post.Status.PUBLISHED, published_at__gte=start, published_at__lt=end)
+        .order_by('published_at')
+        .values_list('slug', 'updated_at')
+    )
+    yield XML_HEADER + URLSET_OPEN
+    chunk = []
+    for slug, updated_at in rows.iterator(chunk_size=CHUNK_SIZE):
+        chunk.append(f'<url><loc>{escape(prefix + slug + suffix)}</loc><lastmod>{updated_at.date().isoformat()}</lastmod></url>\n')
+        if len(chunk) >= CHUNK_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+    chunk.append(URLSET_CLOSE)
+    yield ''.join(chunk)
+
+
+def shard_content(base_url: str, year: int, month: int) -> Iterator[str]:
+    """Cached shard if there is one, else the rendered shard, cached once fully sent."""
+    key = shard_cache_key(base_url, year, month)
+    cached = cache.get(key)
+    if cached is not None:
+        yield cached
+        return
+    parts = []
+    for part in iter_shard(base_url, year, month):
+        parts.append(part)
+        yield part
+    cache.set(key, ''.join(parts), settings.SITEMAP_CACHE_SECONDS)
@@ -0,0 +1,237 @@
+"""In-memory typeahead over published post titles and usernames.
+
+Each process keeps a sorted array of normalized keys and answers prefix
+queries with ``bisect``, so a lookup never touches the database. A title is
+indexed from the start of each of its first ``MAX_WORDS`` words, so "invo"
+also finds "Patch notes: Invoker". Keys are casefolded, with "ё" folded to "е"
+and punctuation collapsed to single spaces.
+
+The index is built once per process (see ``warm``; under gunicorn before
+the workers fork). After that the receivers below record every change as a
+``SuggestChange`` row in the transaction making it, and patch the local
+index once that transaction commits. Every ``SUGGEST_CHECK_SECONDS`` a lookup
+reads the rows it has not seen yet, written by other processes, and applies
+just those. Only a process that has not looked for longer than the log is
+kept (``CHANGE_RETENTION``) builds its index again, and so does every
+process once ``invalidate`` has logged a rebuild.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import timedelta
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import reverse
+from django.utils import timezone
+
+from core import outbox
+
+from .models import Post, SuggestChange
+from .signals import post_unpublished, posts_unpublished
+
+MAX_WORDS = 8
+CHANGE_RETENTION = 24 * 3600
+# logged by invalidate(): every process rebuilds instead of replaying
+REBUILD = 'rebuild'
+_non_word = re.compile(r'[\W_]+')
+
+
+class Entry(NamedTuple):
+    kind: str
+    pk: int
+    label: str
+    url: str
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize('NFKC', text).casefold().replace('ё', 'е')
+    return _non_word.sub(' ', text).strip()
+
+
+def entry_keys(entry: Entry) -> list[str]:
+    words = normalize(entry.label).split()
+    if entry.kind == 'user':
+        return [' '.join(words)] if words else []
+    return [' '.join(words[i:]) for i in range(min(len(words), MAX_WORDS))]
+
+
+def post_entry(pk: int, title: str, published_at, slug: str) -> Entry:
+    url = reverse('post_detail', kwargs={'year': published_at.year, 'month': published_at.month, 'slug': slug})
+    return Entry('post', pk, title, url)
+
+
+def user_entry(pk: int, username: str) -> Entry:
+    return Entry('user', pk, username, reverse('profile_public', args=[username]))
+
+
+class PrefixIndex:
+    def __init__(self):
+        self.keys: list[tuple[str, str, int]] = []
+        self.entries: dict[tuple[str, int], Entry] = {}
+        # place in the SuggestChange log; None until the index is built
+        self.cursor: Optional[outbox.Cursor] = None
+        self.checked_at = 0.0
+        self.lock = threading.RLock()
+        self.sync_lock = threading.Lock()
+
+    def add(self, entry: Entry) -> None:
+        with self.lock:
+            self.remove(entry.kind, entry.pk)
+            self.entries[entry.kind, entry.pk] = entry
+            for key in entry_keys(entry):
+                insort(self.keys, (key, entry.kind, entry.pk))
+
+    def remove(self, kind: str, pk: int) -> None:
+        with self.lock:
+            entry = self.entries.pop((kind, pk), None)
+            if entry is None:
+                return
+            for key in entry_keys(entry):
+                i = bisect_left(self.keys, (key, kind, pk))
+                if i < len(self.keys) and self.keys[i] == (key, kind, pk):
+                    del self.keys[i]
+
+    def load(self, entries: list[Entry], cursor: Optional[outbox.Cursor]) -> None:
+        keys = sorted((key, e.kind, e.pk) for e in entries for key in entry_keys(e))
+        with self.lock:
+            self.keys = keys
+            self.entries = {(e.kind, e.pk): e for e in entries}
+            self.cursor = cursor
+            self.checked_at = time.monotonic()
+
+    def apply(self, changes: list[SuggestChange]) -> None:
+        """Replay log rows, oldest first; a row states the item as it is after the change."""
+        with self.lock:
+            if self.cursor is None:
+                return
+            for change in changes:
+                if change.label:
+                    self.add(Entry(change.kind, change.target_id, change.label, change.url))
+                else:
+                    self.remove(change.kind, change.target_id)
+            self.cursor.advance(change.pk for change in changes)
+
+    def lookup(self, query: str, kind: str, limit: int) -> list[Entry]:
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        found: list[Entry] = []
+        seen = set()
+        with self.lock:
+            i = bisect_left(self.keys, (prefix,))
+            while i < len(self.keys) and len(found) < limit:
+                key, entry_kind, pk = self.keys[i]
+                if not key.startswith(prefix):
+                    break
+                if entry_kind == kind and pk not in seen:
+                    seen.add(pk)
+                    found.append(self.entries[entry_kind, pk])
+                i += 1
+        return found
+
+
+index = PrefixIndex()
+
+
+def rebuild() -> None:
+    # rows older than any process still replaying from them
+    SuggestChange.objects.filter(created_at__lt=timezone.now() - timedelta(seconds=CHANGE_RETENTION)).delete()
+    # taken before the rows are read, so changes made meanwhile are replayed on top
+    cursor = outbox.Cursor.at_end(SuggestChange.objects.all())
+    posts = Post.objects.filter(status=Post.Status.PUBLISHED, published_at__isnull=False).values_list(
+        'pk', 'title', 'published_at', 'slug'
+    )
+    users = get_user_model().objects.filter(is_active=True).values_list('pk', 'username')
+    entries = [post_entry(*row) for row in posts.iterator()] + [user_entry(*row) for row in users.iterator()]
+    index.load(entries, cursor)
+
+
+def sync() -> None:
+    """Apply the changes other processes logged since the last look."""
+    if not index.sync_lock.acquire(blocking=False):
+        # another thread is at it
+        return
+    try:
+        with index.lock:
+            pending = index.cursor.pending()
+        # read without holding the index lock, so lookups go on meanwhile
+        changes = list(SuggestChange.objects.filter(pending).order_by('pk'))
+        if any(change.kind == REBUILD for change in changes):
+            rebuild()
+            return
+        index.apply(changes)
+        index.checked_at = time.monotonic()
+    finally:
+        index.sync_lock.release()
+
+
+def invalidate() -> None:
+    """Rebuild the index in every process, after changes the receivers did not see (bulk loads)."""
+    SuggestChange.objects.create(kind=REBUILD, target_id=0)
+    transaction.on_commit(rebuild)
+
+
+def warm() -> None:
+    since = time.monotonic() - index.checked_at
+    if index.cursor is None or since > CHANGE_RETENTION / 2:
+        rebuild()
+    elif since >= settings.SUGGEST_CHECK_SECONDS:
+        sync()
+
+
+def suggest(query: str, limit: int = 8) -> dict[str, list[Entry]]:
+    warm()
+    return {'posts': index.lookup(query, 'post', limit), 'users': index.lookup(query, 'user', limit)}
+
+
+def _changed_many(changes: list[tuple[str, int, Optional[Entry]]]) -> None:
+    """Logs each ``(kind, pk, entry)`` (entry None to drop the item) for every process and applies them here once committed."""
+    rows = SuggestChange.objects.bulk_create(
+        SuggestChange(kind=kind, target_id=pk, label=entry.label if entry else '', url=entry.url if entry else '')
+        for kind, pk, entry in changes
+        if index.cursor is None or index.entries.get((kind, pk)) != entry
+    )
+    if rows:
+        transaction.on_commit(lambda: index.apply(rows))
+
+
+def _changed(kind: str, pk: int, entry: Optional[Entry]) -> None:
+    _changed_many([(kind, pk, entry)])
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance: Post, **kwargs):
+    if instance._current_listed_at() is not None:
+        _changed('post', instance.pk, post_entry(instance.pk, instance.title, instance.published_at, instance.slug))
+
+
+@receiver(post_unpublished, sender=Post)
+def unindex_post(sender, post: Post, **kwargs):
+    _changed('post', post.pk, None)
+
+
+@receiver(posts_unpublished, sender=Post)
+def unindex_posts(sender, posts: list, **kwargs):
+    _changed_many([('post', post.pk, None) for post, _ in posts])
+
+
+@receiver(post_save, sender=get_user_model())
+def index_user(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not {'username', 'is_active'} & set(update_fields):
+        # e.g. last_login on every sign-in
+        return
+    _changed('user', instance.pk, user_entry(instance.pk, instance.username) if instance.is_active else None)
+
+
+@receiver(post_delete, sender=get_user_model())
+def unindex_user(sender, instance, **kwargs):
+    _changed('user', instance.pk, None)
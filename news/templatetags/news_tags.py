@@ -0,0 +1,16 @@
+from django import template
+
+from news.models import PostArchiveMonth, Tag
+
+register = template.Library()
+
+
+@register.inclusion_tag('news/_archive_sidebar.html')
+def archive_sidebar():
+    # reads the precomputed month index only, never the post table
+    return {'archive_months': PostArchiveMonth.objects.filter(posts_count__gt=0)}
+
+
+@register.inclusion_tag('news/_tag_cloud.html')
+def tag_cloud(limit: int = 20):
+    return {'cloud_tags': Tag.objects.filter(posts_count__gt=0).order_by('-posts_count', 'name')[:limit]}
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 
 from .views import (
@@ -11,17 +12,57 @@ from .views import (
     InterestingPostListView,
     TopWeekPostListView,
     TopMonthPostListView,
+    MostReadPostListView,
+    TrendingPostListView,
+    PostYearArchiveView,
+    PostMonthArchiveView,
+    TagListView,
+    TagPostListView,
+    PostHistoryView,
+    PostRevisionDiffView,
+    PostRevisionRestoreView,
+    SitemapIndexView,
+    SitemapShardView,
+    SuggestView,
 )
 
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import (
+        AsyncPostListView as PostListView,
+        AsyncPostDetailView as PostDetailView,
+        AsyncInterestingPostListView as InterestingPostListView,
+        AsyncTopWeekPostListView as TopWeekPostListView,
+        AsyncTopMonthPostListView as TopMonthPostListView,
+        AsyncMostReadPostListView as MostReadPostListView,
+        AsyncTrendingPostListView as TrendingPostListView,
+    )
+
 urlpatterns = [
     path('', PostListView.as_view(), name='post_list'),
     path('interesting/', InterestingPostListView.as_view(), name='post_interesting'),
     path('top/week/', TopWeekPostListView.as_view(), name='post_top_week'),
     path('top/month/', TopMonthPostListView.as_view(), name='post_top_month'),
+    path('trending/', TrendingPostListView.as_view(), name='post_trending'),
+    path('most-read/', MostReadPostListView.as_view(), name='post_most_read'),
+    path('suggest/', SuggestView.as_view(), name='suggest'),
+    path('sitemap.xml', SitemapIndexView.as_view(), name='sitemap_index'),
+    path('sitemap-<int:year>-<int:month>.xml', SitemapShardView.as_view(), name='sitemap_shard'),
+    path('tags/', TagListView.as_view(), name='tag_list'),
+    path('tags/<slug:slug>/', TagPostListView.as_view(), name='tag_detail'),
     path('create/', PostCreateView.as_view(), name='post_create'),
+    path('<int:year>/', PostYearArchiveView.as_view(), name='post_archive_year'),
+    path('<int:year>/<int:month>/', PostMonthArchiveView.as_view(), name='post_archive_month'),
     path('<int:year>/<int:month>/<slug:slug>/', PostDetailView.as_view(), name='post_detail'),
     path('<int:pk>/edit/', PostUpdateView.as_view(), name='post_edit'),
+    path('<int:pk>/history/', PostHistoryView.as_view(), name='post_history'),
+    path('<int:pk>/history/<int:number>/', PostRevisionDiffView.as_view(), name='post_revision_diff'),
+    path('<int:pk>/history/<int:number>/restore/', PostRevisionRestoreView.as_view(), name='post_revision_restore'),
     path('<int:year>/<int:month>/<slug:slug>/like/', LikeToggleView.as_view(), name='post_like_toggle'),
     path('<int:year>/<int:month>/<slug:slug>/comment/', CommentCreateView.as_view(), name='comment_create'),
     path('comments/<int:pk>/delete/', CommentDeleteView.as_view(), name='comment_delete'),
 ]
+
+if settings.SERVER_MODE == 'asgi':
+    from .async_views import PostEventsView
+
+    urlpatterns.append(path('<int:pk>/events/', PostEventsView.as_view(), name='post_events'))
@@ -1,25 +1,33 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.core.cache import cache
-from django.db.models import Count, Q, Prefetch
-from django.http import Http404, HttpRequest, HttpResponse
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Prefetch, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpRequest, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
 from django.utils.decorators import method_decorator
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, View
+from django.utils.formats import date_format
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, TemplateView, View
 from django.utils import timezone
 
+from moderation import duplicates, wordfilter
+
 from .forms import PostForm, CommentForm
-from .models import Post, Comment, Like
+from . import revisions, sitemaps, suggest
+from .models import Post, Comment, Like, PostRevision, RelatedPost, Tag
+from .pageviews import record_view
 
 
 class PostListView(ListView):
     model = Post
+    read_from_replica = True
     context_object_name = 'posts'
     template_name = 'news/post_list.html'
     paginate_by = 10
@@ -37,6 +45,7 @@ class PostListView(ListView):
 
 class InterestingPostListView(ListView):
     model = Post
+    read_from_replica = True
     context_object_name = 'posts'
     template_name = 'news/post_list.html'
     paginate_by = 10
@@ -64,6 +73,7 @@ class InterestingPostListView(ListView):
 
 class TopWeekPostListView(ListView):
     model = Post
+    read_from_replica = True
     context_object_name = 'posts'
     template_name = 'news/post_list.html'
     paginate_by = 10
@@ -92,6 +102,7 @@ class TopWeekPostListView(ListView):
 
 class TopMonthPostListView(ListView):
     model = Post
+    read_from_replica = True
     context_object_name = 'posts'
     template_name = 'news/post_list.html'
     paginate_by = 10
@@ -117,28 +128,204 @@ class TopMonthPostListView(ListView):
         context['page_title'] = 'Топ за месяц'
         return context
 
+class MostReadPostListView(ListView):
+    model = Post
+    read_from_replica = True
+    context_object_name = 'posts'
+    template_name = 'news/post_list.html'
+    paginate_by = 10
+
+    def get_queryset(self):
+        queryset = (
+            Post.objects.filter(status=Post.Status.PUBLISHED)
+            .select_related('author')
+            .annotate(
+                comments_count=Count(
+                    'comments',
+                    filter=Q(comments__status=Comment.Status.VISIBLE),
+                )
+            )
+            .annotate(likes_count=Count('likes'))
+            .order_by('-views_count', '-published_at')
+        )
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = 'Самое читаемое'
+        return context
+
+
+class TrendingPostListView(ListView):
+    model = Post
+    read_from_replica = True
+    context_object_name = 'posts'
+    template_name = 'news/post_list.html'
+    paginate_by = 10
+
+    def get_queryset(self):
+        # counts as correlated subqueries: evaluated for the 10 rows on the page only,
+        # so the ordering itself is a plain read of the (status, -trending_score) index
+        def count_of(queryset):
+            return Coalesce(
+                Subquery(
+                    queryset.filter(post=OuterRef('pk')).order_by().values('post').annotate(n=Count('pk')).values('n'),
+                    output_field=IntegerField(),
+                ),
+                Value(0),
+            )
+
+        queryset = (
+            Post.objects.filter(status=Post.Status.PUBLISHED)
+            .select_related('author')
+            .annotate(
+                comments_count=count_of(Comment.objects.filter(status=Comment.Status.VISIBLE)),
+                likes_count=count_of(Like.objects.all()),
+            )
+            .order_by('-trending_score', '-published_at')
+        )
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = 'В тренде'
+        return context
+
+
+class PostYearArchiveView(PostListView):
+    # half-open datetime ranges keep the published_at index usable, unlike __year/__month lookups
+    def get_period(self) -> tuple[datetime, datetime]:
+        year = self.kwargs['year']
+        try:
+            return datetime(year, 1, 1, tzinfo=dt_timezone.utc), datetime(year + 1, 1, 1, tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise Http404
+
+    def get_queryset(self):
+        start, end = self.get_period()
+        return super().get_queryset().filter(published_at__gte=start, published_at__lt=end)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['page_title'] = f"Архив за {self.kwargs['year']} год"
+        return context
+
+
+class PostMonthArchiveView(PostYearArchiveView):
+    def get_period(self) -> tuple[datetime, datetime]:
+        year, month = self.kwargs['year'], self.kwargs['month']
+        try:
+            start = datetime(year, month, 1, tzinfo=dt_timezone.utc)
+            end = datetime(year + month // 12, month % 12 + 1, 1, tzinfo=dt_timezone.utc)
+        except ValueError:
+            raise Http404
+        return start, end
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        start, _ = self.get_period()
+        context['page_title'] = f"Архив: {date_format(start, 'F Y')}"
+        return context
+
+
+class TagListView(ListView):
+    model = Tag
+    read_from_replica = True
+    context_object_name = 'tags'
+    template_name = 'news/tag_list.html'
+
+    def get_queryset(self):
+        return Tag.objects.filter(posts_count__gt=0).order_by('kind', '-posts_count', 'name')
+
+
+class TagPostListView(PostListView):
+    def get_tag(self) -> Tag:
+        if not hasattr(self, 'tag'):
+            self.tag = get_object_or_404(Tag, slug=self.kwargs['slug'])
+        return self.tag
+
+    def get_queryset(self):
+        return super().get_queryset().filter(tags=self.get_tag())
+
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        paginator = super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page, **kwargs
+        )
+        # maintained counter instead of COUNT(*) over the tagged posts
+        paginator.count = self.get_tag().posts_count
+        return paginator
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.get_tag()
+        context['page_title'] = f"Тег: {self.get_tag().name}"
+        return context
+
+
+class SuggestView(View):
+    """Typeahead for post titles and usernames, answered from news.suggest's in-memory index."""
+
+    limit = 8
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        query = request.GET.get('q', '')[:100]
+        found = suggest.suggest(query, limit=self.limit)
+        return JsonResponse({
+            kind: [{'label': entry.label, 'url': entry.url} for entry in entries]
+            for kind, entries in found.items()
+        })
+
+
+class SitemapIndexView(View):
+    def get(self, request: HttpRequest) -> HttpResponse:
+        base_url = request.build_absolute_uri('/').rstrip('/')
+        return HttpResponse(sitemaps.render_index(base_url), content_type='application/xml')
+
+
+class SitemapShardView(View):
+    def get(self, request: HttpRequest, year: int, month: int) -> HttpResponse:
+        try:
+            sitemaps.month_range(year, month)
+        except ValueError:
+            raise Http404
+        base_url = request.build_absolute_uri('/').rstrip('/')
+        return StreamingHttpResponse(sitemaps.shard_content(base_url, year, month), content_type='application/xml')
+
+
 class PostDetailView(DetailView):
     model = Post
+    read_from_replica = True
     template_name = 'news/post_detail.html'
     context_object_name = 'post'
+    related_posts_limit = 5
 
-    def get_object(self, queryset=None):
+    def get_queryset(self):
         year = self.kwargs['year']
         month = self.kwargs['month']
-        slug = self.kwargs['slug']
-        post = get_object_or_404(
-            Post,
+        return Post.objects.filter(
             Q(published_at__year=year, published_at__month=month) | Q(created_at__year=year, created_at__month=month),
-            slug=slug,
-        )
-        if post.status != Post.Status.PUBLISHED and self.request.user != post.author:
+            slug=self.kwargs['slug'],
+        ).select_related('author', 'author__author_stats').prefetch_related('tags')
+
+    def check_visibility(self, post: Post) -> None:
+        if post.status == Post.Status.DELETING or (
+            post.status != Post.Status.PUBLISHED and self.request.user != post.author
+        ):
             raise Http404
+
+    def get_object(self, queryset=None):
+        post = get_object_or_404(self.get_queryset())
+        self.check_visibility(post)
         return post
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        post = context['post']
-        comments = (
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if self.object.status == Post.Status.PUBLISHED:
+            record_view(request, self.object.pk)
+        return response
+
+    def get_comments(self, post: Post):
+        return (
             post.comments.filter(status=Comment.Status.VISIBLE, parent__isnull=True)
             .select_related('author')
             .prefetch_related(
@@ -150,30 +337,58 @@ class PostDetailView(DetailView):
                 )
             )
         )
-        context['comments'] = comments
+
+    def get_related_posts(self, post: Post):
+        """Precomputed neighbours (see news.related); hidden since then are skipped."""
+        return (
+            RelatedPost.objects.filter(post=post, related__status=Post.Status.PUBLISHED)
+            .select_related('related')
+            .order_by('-score')[:self.related_posts_limit]
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        post = context['post']
+        context['comments'] = self.get_comments(post)
+        context['related_posts'] = [link.related for link in self.get_related_posts(post)]
         context['comment_form'] = CommentForm()
         context['likes_count'] = post.likes.count()
         context['user_liked'] = self.request.user.is_authenticated and Like.objects.filter(post=post, user=self.request.user).exists()
         return context
 
 
-class PostCreateView(LoginRequiredMixin, CreateView):
+class BlockedWordsMixin:
+    """Sends posts containing blocked words to the moderation queue instead of publishing them."""
+
+    def hold_blocked_words(self, post: Post) -> None:
+        if post.status == Post.Status.PUBLISHED and wordfilter.find(post.title, post.summary, post.body):
+            post.status = Post.Status.DRAFT
+            messages.warning(self.request, 'Пост содержит запрещённые слова и отправлен на проверку модераторам.')
+
+
+class PostCreateView(LoginRequiredMixin, BlockedWordsMixin, CreateView):
     model = Post
     form_class = PostForm
     template_name = 'news/post_form.html'
 
     def form_valid(self, form):
         form.instance.author = self.request.user
-        response = super().form_valid(form)
+        self.hold_blocked_words(form.instance)
+        with transaction.atomic():
+            response = super().form_valid(form)
+            revisions.record_revision(self.object, self.request.user)
         messages.success(self.request, 'Пост сохранён.')
         return response
 
 
-class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, BlockedWordsMixin, UpdateView):
     model = Post
     form_class = PostForm
     template_name = 'news/post_form.html'
 
+    def get_queryset(self):
+        return Post.objects.exclude(status=Post.Status.DELETING)
+
     def test_func(self):
         post = self.get_object()
         return post.author == self.request.user
@@ -184,11 +399,90 @@ class PostUpdateView(LoginRequiredMixin, UserPassesTestMixin, UpdateView):
         return super().handle_no_permission()
 
     def form_valid(self, form):
-        response = super().form_valid(form)
+        self.hold_blocked_words(form.instance)
+        # the post and its revision are saved together, one editor at a time
+        with transaction.atomic():
+            revisions.lock_post(form.instance)
+            # posts written before revision history existed get their stored version kept first
+            revisions.ensure_baseline(form.instance)
+            response = super().form_valid(form)
+            revisions.record_revision(self.object, self.request.user)
         messages.success(self.request, 'Пост обновлён.')
         return response
 
 
+class PostRevisionMixin(LoginRequiredMixin, UserPassesTestMixin):
+    def get_post(self) -> Post:
+        if not hasattr(self, 'post_object'):
+            self.post_object = get_object_or_404(Post.objects.exclude(status=Post.Status.DELETING), pk=self.kwargs['pk'])
+        return self.post_object
+
+    def test_func(self):
+        return self.get_post().author == self.request.user
+
+    def handle_no_permission(self):
+        if self.request.user.is_authenticated:
+            raise Http404
+        return super().handle_no_permission()
+
+    def get_revision(self, number: int) -> PostRevision:
+        return get_object_or_404(PostRevision.objects.defer('data'), post=self.get_post(), number=number)
+
+
+class PostHistoryView(PostRevisionMixin, ListView):
+    context_object_name = 'revisions'
+    template_name = 'news/post_history.html'
+    paginate_by = 50
+
+    def get_queryset(self):
+        return self.get_post().revisions.select_related('author').defer('data').order_by('-number')
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['post'] = self.get_post()
+        return context
+
+
+class PostRevisionDiffView(PostRevisionMixin, TemplateView):
+    template_name = 'news/post_revision_diff.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        post = self.get_post()
+        revision = self.get_revision(self.kwargs['number'])
+        against = self.request.GET.get('against', '')
+        base = self.get_revision(int(against)) if against.isdigit() else (
+            post.revisions.defer('data').filter(number__lt=revision.number).order_by('-number').first()
+        )
+        old_body = revisions.body_at(post, base.number) if base else ''
+        context.update(
+            post=post,
+            revision=revision,
+            base=base,
+            title_changed=base is not None and base.title != revision.title,
+            diff_lines=revisions.diff_lines(old_body, revisions.body_at(post, revision.number)),
+        )
+        return context
+
+
+class PostRevisionRestoreView(PostRevisionMixin, BlockedWordsMixin, View):
+    def post(self, request: HttpRequest, pk: int, number: int) -> HttpResponse:
+        post = self.get_post()
+        revision = self.get_revision(number)
+        with transaction.atomic():
+            revisions.lock_post(post)
+            post.refresh_from_db()
+            revisions.ensure_baseline(post)
+            post.title = revision.title
+            post.body = revisions.body_at(post, number)
+            # an old revision may predate the blocked-word list, or the post's publication
+            self.hold_blocked_words(post)
+            post.save()
+            revisions.record_revision(post, request.user)
+        messages.success(request, f'Пост восстановлен из версии {number}.')
+        return redirect('post_history', pk=post.pk)
+
+
 class LikeToggleView(LoginRequiredMixin, View):
     def post(self, request: HttpRequest, year: int, month: int, slug: str) -> HttpResponse:
         post = get_object_or_404(Post, slug=slug, published_at__year=year, published_at__month=month)
@@ -238,10 +532,21 @@ class CommentCreateView(LoginRequiredMixin, View):
                 messages.error(request, 'Нельзя отвечать на ответ. Максимум один уровень вложенности.')
                 return redirect(post.get_absolute_url())
             comment.parent = parent_comment
+        verdict = duplicates.inspect(comment.body)
+        if verdict is not None and verdict.is_duplicate:
+            # near-copy of a recent comment, likely a raid; held for moderators
+            comment.status = Comment.Status.HIDDEN
+        elif wordfilter.find(comment.body):
+            comment.status = Comment.Status.HIDDEN
         comment.save()
+        if verdict is not None:
+            duplicates.record(comment, verdict)
 
         cache.set(cache_key, True, timeout=self.RATE_SECONDS)
-        messages.success(request, 'Комментарий добавлен.')
+        if comment.status == Comment.Status.HIDDEN:
+            messages.info(request, 'Комментарий отправлен на проверку модераторам.')
+        else:
+            messages.success(request, 'Комментарий добавлен.')
         return redirect(post.get_absolute_url())
 
 
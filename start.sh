@@ -4,4 +4,15 @@ set -e
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
 
-exec gunicorn myproject.wsgi --log-file -
+# counters of the previous deployment's workers (see METRICS_DIR in settings)
+if [ -n "${METRICS_DIR:-}" ]; then
+  rm -rf "$METRICS_DIR"
+fi
+
+# SERVER_MODE=asgi serves the async read views through uvicorn workers
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  exec gunicorn -c gunicorn.conf.py myproject.asgi:application -k uvicorn.workers.UvicornWorker
+fi
+
+# WARM_START=0 disables preloading and the warm-up (see gunicorn.conf.py)
+exec gunicorn -c gunicorn.conf.py myproject.wsgi
@@ -0,0 +1,17 @@
+import pytest
+from django.core.cache import cache
+
+from moderation import wordfilter
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def forget_blocked_words():
+    # the automaton outlives the rolled-back BlockedWord rows of the previous test
+    wordfilter.forget_automaton(sender=None)
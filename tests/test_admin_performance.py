@@ -0,0 +1,90 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import paginator as paginators
+from moderation.models import ModerationAction
+from news.models import Post, Comment, Like
+
+CHANGELISTS = ['news_post', 'news_comment', 'news_like', 'moderation_moderationaction']
+
+
+@pytest.fixture
+def admin_client(client, db):
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+    return client
+
+
+def populate(n):
+    for i in range(n):
+        user = User.objects.create(username=f'user{User.objects.count()}')
+        post = Post.objects.create(title=f'Post {user.pk}', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED)
+        Comment.objects.create(post=post, author=user, body=f'comment {i}')
+        Like.objects.create(post=post, user=user)
+        ModerationAction.objects.create(target_type='post', target_id=post.pk, action='approve', moderator=user)
+
+
+def changelist_queries(client, model):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse(f'admin:{model}_changelist'))
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('model', CHANGELISTS)
+def test_changelist_queries_do_not_grow_with_rows(admin_client, model):
+    populate(2)
+    few = changelist_queries(admin_client, model)
+    populate(15)
+    assert changelist_queries(admin_client, model) == few
+    # session, user, one count, the page and filter choices at most
+    assert few <= 8
+
+
+@pytest.mark.django_db
+def test_no_full_result_count_on_filtered_lists(admin_client):
+    populate(3)
+    with CaptureQueriesContext(connection) as queries:
+        admin_client.get(reverse('admin:news_comment_changelist'), {'status__exact': 'visible'})
+    assert sum('COUNT(' in q['sql'] for q in queries.captured_queries) == 1
+
+
+@pytest.mark.django_db
+def test_search_uses_prefix_lookups_off_postgres(admin_client):
+    populate(3)
+    user = User.objects.get(username='user1')
+    response = admin_client.get(reverse('admin:news_comment_changelist'), {'q': 'USER1'})
+    assert [c.author for c in response.context['cl'].result_list] == [user]
+    response = admin_client.get(reverse('admin:news_comment_changelist'), {'q': 'Comment 2'})
+    assert [c.body for c in response.context['cl'].result_list] == ['comment 2']
+    response = admin_client.get(reverse('admin:news_comment_changelist'), {'q': 'ment 2'})
+    assert list(response.context['cl'].result_list) == []
+    response = admin_client.get(reverse('admin:news_like_changelist'), {'q': f'post {user.pk}'})
+    assert [like.user for like in response.context['cl'].result_list] == [user]
+    response = admin_client.get(reverse('admin:moderation_moderationaction_changelist'), {'q': 'user1'})
+    assert [action.moderator for action in response.context['cl'].result_list] == [user]
+
+
+@pytest.mark.django_db
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='SQLite query plans')
+@pytest.mark.parametrize('model, index', [
+    (Post, 'news_post_title_nocase_idx'),
+    (Comment, 'news_comment_body_nocase_idx'),
+    (User, 'auth_user_username_nocase_idx'),
+])
+def test_prefix_search_is_answered_by_an_index(model, index):
+    field = {Post: 'title', Comment: 'body', User: 'username'}[model]
+    plan = model.objects.filter(**{f'{field}__istartswith': 'abc'}).explain()
+    assert index in plan
+
+
+@pytest.mark.django_db
+def test_paginator_uses_large_estimates(monkeypatch, settings):
+    settings.ADMIN_ESTIMATED_COUNT_THRESHOLD = 1000
+    monkeypatch.setattr(paginators, 'estimated_count', lambda queryset: 5_000_000)
+    assert paginators.EstimatedCountPaginator(Like.objects.order_by('pk'), 100).count == 5_000_000
+    monkeypatch.setattr(paginators, 'estimated_count', lambda queryset: 10)
+    assert paginators.EstimatedCountPaginator(Like.objects.order_by('pk'), 100).count == 0
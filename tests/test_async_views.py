@@ -0,0 +1,68 @@
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import Http404
+
+from accounts.async_views import AsyncPublicProfileView, AsyncUserPostsView
+from news.async_views import AsyncPostDetailView, AsyncPostListView
+from news.models import Post, Comment, Like
+
+
+def call(view_class, request, **kwargs):
+    request.user = getattr(request, 'user', AnonymousUser())
+    response = async_to_sync(view_class.as_view())(request, **kwargs)
+    return response.render()
+
+
+@pytest.mark.django_db
+def test_async_post_list_paginates(async_rf):
+    author = User.objects.create_user(username='author', password='p')
+    for i in range(12):
+        Post.objects.create(title=f'Post {i}', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+    resp = call(AsyncPostListView, async_rf.get('/', {'page': 2}))
+    assert resp.status_code == 200
+    assert resp.context_data['paginator'].count == 12
+    assert len(resp.context_data['posts']) == 2
+    assert b'Post 0' in resp.content
+
+
+@pytest.mark.django_db
+def test_async_post_detail(async_rf):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Detail', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Comment.objects.create(post=post, author=author, body='first!')
+    Like.objects.create(post=post, user=author)
+
+    request = async_rf.get(post.get_absolute_url())
+    request.user = author
+    kwargs = {'year': post.published_at.year, 'month': post.published_at.month, 'slug': post.slug}
+    resp = call(AsyncPostDetailView, request, **kwargs)
+    assert resp.status_code == 200
+    assert resp.context_data['likes_count'] == 1
+    assert resp.context_data['user_liked'] is True
+    assert b'first!' in resp.content
+
+
+@pytest.mark.django_db
+def test_async_post_detail_hides_drafts(async_rf):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Draft', body='<p>ok</p>', author=author)
+    kwargs = {'year': post.created_at.year, 'month': post.created_at.month, 'slug': post.slug}
+    with pytest.raises(Http404):
+        call(AsyncPostDetailView, async_rf.get('/'), **kwargs)
+
+
+@pytest.mark.django_db
+def test_async_profile_views(async_rf):
+    author = User.objects.create_user(username='author', password='p')
+    Post.objects.create(title='Mine', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+    resp = call(AsyncPublicProfileView, async_rf.get('/u/author/'), username='author')
+    assert resp.context_data['profile_user'] == author
+
+    resp = call(AsyncUserPostsView, async_rf.get('/u/author/posts/'), username='author')
+    assert b'Mine' in resp.content
+
+    with pytest.raises(Http404):
+        call(AsyncUserPostsView, async_rf.get('/u/nobody/posts/'), username='nobody')
@@ -0,0 +1,77 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import AuthorStats
+from news.models import Post, Comment, Like
+
+
+def stats(user):
+    return AuthorStats.objects.get(user=user)
+
+
+@pytest.mark.django_db
+def test_stats_follow_posts_likes_and_comments():
+    author = User.objects.create_user(username='author', password='p')
+    reader = User.objects.create_user(username='reader', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Post.objects.create(title='Draft', body='<p>ok</p>', author=author)
+    like = Like.objects.create(post=post, user=reader)
+    comment = Comment.objects.create(post=post, author=reader, body='hi')
+
+    assert (stats(author).posts_count, stats(author).likes_received) == (1, 1)
+    assert stats(reader).comments_count == 1
+
+    like.delete()
+    comment.delete()
+    assert stats(author).likes_received == 0
+    assert stats(reader).comments_count == 0
+
+    Post.objects.get(pk=post.pk).delete()
+    assert stats(author).posts_count == 0
+
+
+@pytest.mark.django_db
+def test_recompute_command_restores_counts():
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Like.objects.create(post=post, user=author)
+    AuthorStats.objects.all().delete()
+
+    call_command('recompute_author_stats', batch_size=1, stdout=StringIO())
+    assert (stats(author).posts_count, stats(author).likes_received, stats(author).comments_count) == (1, 1, 0)
+
+
+@pytest.mark.django_db
+def test_profile_loads_user_profile_and_stats_in_one_query(client, django_assert_num_queries):
+    author = User.objects.create_user(username='author', password='p')
+    Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    view_url = reverse('profile_public', kwargs={'username': 'author'})
+    # session lookup is skipped for anonymous clients, so this is the profile query alone
+    with django_assert_num_queries(1):
+        resp = client.get(view_url)
+    assert 'Постов: 1'.encode() in resp.content
+
+
+@pytest.mark.django_db
+def test_deleting_a_post_uncounts_its_likes_without_a_lookup_per_like():
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    kept = Post.objects.create(title='B', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    readers = [User.objects.create_user(username=f'reader{i}', password='p') for i in range(10)]
+    for reader in readers:
+        Like.objects.create(post=post, user=reader)
+    Like.objects.create(post=kept, user=readers[0])
+    assert stats(author).likes_received == 11
+
+    with CaptureQueriesContext(connection) as queries:
+        post.delete()
+
+    assert stats(author).likes_received == 1
+    stats_updates = [q for q in queries.captured_queries if 'UPDATE "accounts_authorstats"' in q['sql']]
+    assert len(stats_updates) <= 2  # likes once, posts_count once
@@ -0,0 +1,118 @@
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from core import metrics
+from core.metrics import Registry, registry
+from news.models import Like, Post
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(settings):
+    settings.METRICS_DIR = ''
+    registry.reset()
+    yield
+    registry.reset()
+
+
+def counter(data, name, **labels):
+    return data['counters'].get((name, tuple(sorted((k, str(v)) for k, v in labels.items()))), 0)
+
+
+def test_render_prometheus_text():
+    registry.inc('jobs_total', 2, kind='a"b')
+    registry.observe('latency_seconds', 0.02, route='/')
+    registry.observe('latency_seconds', 3, route='/')
+
+    text = metrics.render(metrics.collect())
+
+    assert '# TYPE jobs_total counter\njobs_total{kind="a\\"b"} 2\n' in text
+    assert 'latency_seconds_bucket{route="/",le="0.01"} 0\n' in text
+    assert 'latency_seconds_bucket{route="/",le="0.025"} 1\n' in text
+    assert 'latency_seconds_bucket{route="/",le="5.0"} 2\n' in text
+    assert 'latency_seconds_bucket{route="/",le="+Inf"} 2\n' in text
+    assert 'latency_seconds_sum{route="/"} 3.02\n' in text
+    assert 'latency_seconds_count{route="/"} 2\n' in text
+
+
+def test_collect_sums_other_processes(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    other = Registry()
+    other.inc('jobs_total', 3)
+    other.observe('latency_seconds', 0.2)
+    other.flush()
+    registry.inc('jobs_total', 1)
+    registry.observe('latency_seconds', 0.3)
+    registry.flush()
+    registry.inc('jobs_total', 1)  # not flushed yet, still collected live
+
+    data = metrics.collect()
+
+    assert counter(data, 'jobs_total') == 5
+    assert data['histograms'][('latency_seconds', ())][-1] == 2
+    assert len(list(tmp_path.glob('*.json'))) == 2
+    assert json.loads(other.path.read_text())['counters'] == [['jobs_total', [], 3]]
+
+
+def test_retired_workers_are_folded_into_one_file(settings, tmp_path):
+    settings.METRICS_DIR = str(tmp_path)
+    for value in (2, 3):
+        gone = Registry()
+        gone.inc('jobs_total', value)
+        gone.observe('latency_seconds', 0.2)
+        gone.path = tmp_path / f'{1000 + value}-1.json'
+        gone.flush()
+        metrics.retire(1000 + value)
+    registry.inc('jobs_total', 1)
+
+    data = metrics.collect()
+
+    assert [path.name for path in tmp_path.glob('*.json')] == [metrics.RETIRED]
+    assert counter(data, 'jobs_total') == 6
+    assert data['histograms'][('latency_seconds', ())][-1] == 2
+
+
+@pytest.mark.django_db
+def test_requests_queries_cache_and_writes_are_counted(client):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Metered post', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    cache.clear()
+    registry.reset()
+
+    assert client.get(post.get_absolute_url()).status_code == 200
+    Like.objects.create(post=post, user=author)
+    cache.set('present', 1)
+    cache.get_many(['present', 'absent'])
+
+    data = metrics.collect()
+    route = '/<int:year>/<int:month>/<slug:slug>/'
+    assert counter(data, 'http_requests_total', route=route, method='GET', status=200) == 1
+    assert data['histograms'][('http_request_duration_seconds', (('method', 'GET'), ('route', route)))][-1] == 1
+    assert counter(data, 'db_queries_total', route=route, database='default') > 0
+    assert counter(data, 'db_query_seconds_total', route=route, database='default') > 0
+    assert counter(data, 'cache_requests_total', cache='unique-news-site-cache', result='miss') >= 1
+    assert counter(data, 'cache_requests_total', cache='unique-news-site-cache', result='hit') >= 1
+    assert counter(data, 'news_likes_total', action='created') == 1
+
+
+@pytest.mark.django_db
+def test_endpoint_is_restricted(client, settings):
+    registry.inc('jobs_total')
+    assert client.get('/metrics').status_code == 404
+    settings.METRICS_ALLOWED_IPS = ['10.0.0.1']
+    assert client.get('/metrics', REMOTE_ADDR='10.0.0.1').status_code == 200
+    # relayed by a proxy at that address
+    assert client.get('/metrics', REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR='203.0.113.7').status_code == 404
+
+    settings.METRICS_TOKEN = 's3cret'
+    assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code == 404
+    assert client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret', HTTP_X_FORWARDED_FOR='203.0.113.7').status_code == 200
+
+    User.objects.create_user(username='root', password='p', is_superuser=True, is_staff=True)
+    client.login(username='root', password='p')
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert 'jobs_total 1' in response.content.decode()
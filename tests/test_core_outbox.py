@@ -0,0 +1,163 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+
+from core import outbox
+from core.models import OutboxEvent, OutboxOffset
+from news.models import Comment, Like, Post
+
+
+@pytest.fixture
+def events(db, settings):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Outbox post', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Comment.objects.create(post=post, author=author, body='first')
+    Like.objects.create(post=post, user=author).delete()
+    return post
+
+
+def test_changes_write_events_in_order(events, client):
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+    client.post(reverse('moderation_post_reject', args=[events.pk]))
+
+    assert list(OutboxEvent.objects.values_list('topic', 'key')) == [
+        ('post.published', f'post:{events.pk}'),
+        ('comment.created', f'post:{events.pk}'),
+        ('like.created', f'post:{events.pk}'),
+        ('like.deleted', f'post:{events.pk}'),
+        ('moderation.action', f'post:{events.pk}'),
+    ]
+    assert OutboxEvent.objects.first().payload['url'] == events.get_absolute_url()
+
+
+def test_event_and_change_commit_together(events, monkeypatch):
+    def broken(*args):
+        raise RuntimeError('outbox unavailable')
+
+    monkeypatch.setattr(outbox, 'emit', broken)
+    with pytest.raises(RuntimeError):
+        Comment.objects.create(post=events, author=events.author, body='lost')
+    assert not Comment.objects.filter(body='lost').exists()
+
+
+def test_jsonl_sink_and_offsets(events, settings, tmp_path):
+    path = tmp_path / 'events.jsonl'
+    settings.OUTBOX_CONSUMERS = {'archive': {'SINK': 'jsonl', 'OPTIONS': {'path': str(path)}}}
+
+    call_command('relay_outbox', batch_size=3, stdout=StringIO())
+    Like.objects.create(post=events, user=events.author)
+    call_command('relay_outbox', stdout=StringIO())
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [line['topic'] for line in lines] == [
+        'post.published', 'comment.created', 'like.created', 'like.deleted', 'like.created',
+    ]
+    assert [line['id'] for line in lines] == sorted(line['id'] for line in lines)
+    assert OutboxOffset.objects.get(consumer='archive').last_event_id == lines[-1]['id']
+
+    call_command('relay_outbox', prune=True, stdout=StringIO())
+    assert OutboxEvent.objects.count() == 5  # younger than OUTBOX_RETENTION_DAYS
+    assert outbox.prune(retention_days=0) == 5
+
+
+def test_event_committed_after_a_later_one_is_still_relayed(events, settings, monkeypatch):
+    sent = []
+
+    class Sink:
+        def send(self, batch):
+            sent.extend(event['id'] for event in batch)
+
+    first, second, *rest = OutboxEvent.objects.order_by('pk')
+    # the first event's transaction commits only after the relay read the second
+    first_pk = first.pk
+    first.delete()
+    first.pk = first_pk
+    outbox.relay('archive', Sink())
+    assert first.pk not in sent and second.pk in sent
+    assert outbox.offset('archive') == rest[-1].pk
+
+    OutboxEvent.objects.bulk_create([first])
+    outbox.relay('archive', Sink())
+    assert sent[-1] == first.pk
+    assert OutboxOffset.objects.get(consumer='archive').gaps == {}
+
+    # an id that never shows up is given up on after OUTBOX_GAP_TIMEOUT_SECONDS
+    gone = OutboxEvent.objects.create(topic='test', key='k', payload={})
+    OutboxEvent.objects.create(topic='test', key='k', payload={})
+    gone_pk = gone.pk
+    gone.delete()
+    outbox.relay('archive', Sink())
+    assert list(outbox.cursor('archive').gaps) == [gone_pk]
+    settings.OUTBOX_GAP_TIMEOUT_SECONDS = 0
+    assert outbox.relay('archive', Sink()) == 0
+    assert outbox.cursor('archive').gaps == {}
+
+
+def test_loop_prunes_by_retention_without_consumers(events, settings, monkeypatch):
+    settings.OUTBOX_CONSUMERS = {}
+    settings.OUTBOX_RETENTION_DAYS = 0
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 2:
+            raise KeyboardInterrupt
+        OutboxEvent.objects.create(topic='test', key='k', payload={})
+
+    monkeypatch.setattr('core.management.commands.relay_outbox.time.sleep', sleep)
+    out = StringIO()
+    with pytest.raises(KeyboardInterrupt):
+        call_command('relay_outbox', loop=True, prune=True, prune_interval=0, stdout=out)
+
+    assert out.getvalue().splitlines() == ['Pruned 4 events.', 'Pruned 1 events.']
+    assert not OutboxEvent.objects.exists()
+
+
+class Stub(BaseHTTPRequestHandler):
+    fail_next = 0
+    received = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if Stub.fail_next:
+            Stub.fail_next -= 1
+            self.send_response(503)
+        else:
+            Stub.received.append(body)
+            self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Stub)
+    Stub.received = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}/events'
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_sink_redelivers_after_failure(events, settings, stub_url):
+    settings.OUTBOX_CONSUMERS = {'indexer': {'SINK': 'http', 'OPTIONS': {'url': stub_url, 'timeout': 5}}}
+    Stub.fail_next = 1
+
+    with pytest.raises(CommandError):
+        call_command('relay_outbox', 'indexer', batch_size=3, stdout=StringIO(), stderr=StringIO())
+    assert outbox.offset('indexer') == 0
+
+    call_command('relay_outbox', 'indexer', batch_size=3, stdout=StringIO())
+
+    batches = [[event['topic'] for event in body['events']] for body in Stub.received]
+    assert batches == [['post.published', 'comment.created', 'like.created'], ['like.deleted']]
+    assert outbox.offset('indexer') == OutboxEvent.objects.last().pk
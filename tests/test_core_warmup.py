@@ -0,0 +1,50 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.management import call_command
+
+from core import warmup
+from core.management.commands.startup_report import parse_importtime
+from news import suggest
+from news.models import Post
+
+
+@pytest.mark.django_db
+def test_warmup_fills_caches(settings):
+    settings.WARMUP_URLS = ['/']
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Warm', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    suggest.index.load([], None)
+
+    timings = warmup.run()
+
+    assert list(timings) == ['templates', 'urls', 'pages', 'process caches']
+    assert warmup.compile_templates() > 10
+    key = make_template_fragment_key('post_card', [post.pk, post.updated_at.timestamp(), 0, 0])
+    assert cache.get(key) is not None
+    assert suggest.index.cursor is not None
+
+
+@pytest.mark.django_db
+def test_failing_step_does_not_stop_warmup(settings):
+    settings.WARMUP_URLS = ['/no-such-page/']
+    assert set(warmup.run()) == {'templates', 'urls', 'pages', 'process caches'}
+
+
+def test_parse_importtime():
+    output = (
+        'import time: self [us] | cumulative | imported package\n'
+        'import time:       120 |        120 |     bleach.html5lib_shim\n'
+        'import time:      3000 |       3120 |   bleach\n'
+    )
+    assert parse_importtime(output) == [('bleach.html5lib_shim', 120, 120), ('bleach', 3000, 3120)]
+
+
+def test_startup_report_command():
+    out = StringIO()
+    call_command('startup_report', '--skip-warmup', '--limit', '3', stdout=out)
+    assert 'Importing myproject.wsgi' in out.getvalue()
+    assert 'django' in out.getvalue()
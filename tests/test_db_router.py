@@ -0,0 +1,83 @@
+import pytest
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.http import HttpResponse
+from django.urls import reverse
+
+from core import db_router
+from core.db_router import PRIMARY_PIN_COOKIE, PrimaryReplicaRouter, ReplicaRoutingMiddleware
+from news.models import Post
+from news.views import PostCreateView, PostListView
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    monkeypatch.setattr(db_router, 'replica_configured', lambda: True)
+    monkeypatch.setattr(db_router, 'replica_is_fresh', lambda: True)
+
+
+def route(request, view_class):
+    """Runs a request through the middleware and reports where reads were routed."""
+    router = PrimaryReplicaRouter()
+    seen = {}
+
+    def get_response(req):
+        middleware.process_view(req, view_class.as_view(), (), {})
+        seen['post'] = router.db_for_read(Post)
+        seen['session'] = router.db_for_read(Session)
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    response = middleware(request)
+    return seen, response
+
+
+def test_feed_reads_go_to_replica(rf, replica):
+    seen, _ = route(rf.get('/'), PostListView)
+    assert seen == {'post': 'replica', 'session': 'default'}
+    # scope ends with the request
+    assert PrimaryReplicaRouter().db_for_read(Post) == 'default'
+
+
+def test_views_without_opt_in_read_primary(rf, replica):
+    seen, _ = route(rf.get('/create/'), PostCreateView)
+    assert seen['post'] == 'default'
+
+
+def test_write_pins_client_to_primary(rf, replica, settings):
+    settings.REPLICA_STICKY_SECONDS = 7
+    seen, response = route(rf.post('/'), PostListView)
+    assert seen['post'] == 'default'
+    assert response.cookies[PRIMARY_PIN_COOKIE]['max-age'] == 7
+
+    request = rf.get('/')
+    request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+    seen, _ = route(request, PostListView)
+    assert seen['post'] == 'default'
+
+
+def test_no_pin_cookie_without_replica(rf):
+    _, response = route(rf.post('/'), PostListView)
+    assert PRIMARY_PIN_COOKIE not in response.cookies
+
+
+def test_lagging_replica_is_skipped(monkeypatch, settings):
+    settings.REPLICA_LAG_CHECK_SECONDS = 0
+    settings.REPLICA_MAX_LAG_SECONDS = 5
+    monkeypatch.setattr(db_router, 'replica_lag_seconds', lambda: 30.0)
+    assert db_router.replica_is_fresh() is False
+    monkeypatch.setattr(db_router, 'replica_lag_seconds', lambda: None)
+    assert db_router.replica_is_fresh() is False
+    monkeypatch.setattr(db_router, 'replica_lag_seconds', lambda: 0.5)
+    assert db_router.replica_is_fresh() is True
+
+
+@pytest.mark.django_db
+def test_like_redirect_is_pinned(client, replica):
+    user = User.objects.create_user(username='u', password='p')
+    client.login(username='u', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED)
+    url = reverse('post_like_toggle', kwargs={'year': post.published_at.year, 'month': post.published_at.month, 'slug': post.slug})
+    resp = client.post(url)
+    assert resp.status_code == 302
+    assert PRIMARY_PIN_COOKIE in resp.cookies
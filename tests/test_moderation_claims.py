@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import AuthorStats
+from moderation.models import ModerationAction, QueueClaim
+from news.models import Post
+
+
+@pytest.fixture
+def moderators(db, settings):
+    settings.MODERATION_CLAIM_BATCH = 2
+    return [User.objects.create_superuser(username=name, password='p') for name in ('first', 'second')]
+
+
+@pytest.fixture
+def drafts(db):
+    newcomer = User.objects.create_user(username='newcomer', password='p')
+    star = User.objects.create_user(username='star', password='p')
+    AuthorStats.objects.filter(user=star).update(likes_received=50)
+    posts = [
+        Post.objects.create(title=f'Draft {i}', body='<p>ok</p>', author=newcomer if i < 3 else star)
+        for i in range(4)
+    ]
+    return posts
+
+
+def queue(client, user):
+    client.force_login(user)
+    response = client.get(reverse('moderation_posts'))
+    assert response.status_code == 200
+    return [post.pk for post in response.context['posts']]
+
+
+def test_moderators_get_disjoint_batches_by_priority(client, moderators, drafts):
+    first, second = moderators
+
+    mine = queue(client, first)
+    theirs = queue(client, second)
+
+    # the popular author's draft first, then the oldest
+    assert mine == [drafts[3].pk, drafts[0].pk]
+    assert theirs == [drafts[1].pk, drafts[2].pk]
+    assert queue(client, first) == mine
+    assert QueueClaim.objects.count() == 4
+
+
+def test_expired_claims_are_handed_out_again(client, moderators, drafts):
+    first, second = moderators
+    mine = queue(client, first)
+    QueueClaim.objects.filter(moderator=first).update(expires_at=timezone.now() - timedelta(seconds=1))
+
+    assert queue(client, second) == mine
+
+
+def test_claimed_item_cannot_be_decided_by_another_moderator(client, moderators, drafts):
+    first, second = moderators
+    post_pk = queue(client, first)[0]
+
+    client.force_login(second)
+    client.post(reverse('moderation_post_reject', args=[post_pk]))
+    assert not ModerationAction.objects.exists()
+
+    client.force_login(first)
+    client.post(reverse('moderation_post_reject', args=[post_pk]))
+    assert ModerationAction.objects.filter(target_id=post_pk, moderator=first).count() == 1
+    # rejected drafts stay drafts but leave the queue until the author edits them
+    assert post_pk not in queue(client, first)
+    assert post_pk not in queue(client, second)
+
+    Post.objects.get(pk=post_pk).save()
+    QueueClaim.objects.all().delete()
+    assert post_pk in queue(client, second)
+
+
+def test_claim_is_kept_unless_a_post_went_through(client, moderators, drafts):
+    first, second = moderators
+    post_pk = queue(client, first)[0]
+    url = reverse('moderation_post_approve', args=[post_pk])
+
+    assert client.get(url).status_code == 405
+    Post.objects.filter(pk=post_pk).update(status=Post.Status.DELETING)
+    assert client.post(url).status_code == 404
+    assert QueueClaim.objects.filter(target_id=post_pk, moderator=first).exists()
+
+    Post.objects.filter(pk=post_pk).update(status=Post.Status.DRAFT)
+    assert client.post(url).status_code == 302
+    assert not QueueClaim.objects.filter(target_id=post_pk).exists()
@@ -0,0 +1,182 @@
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+
+from accounts.models import AuthorStats
+from core.models import OutboxEvent
+from moderation import deletion
+from moderation.models import DeletionJob
+from news.models import Comment, Like, Post, PostArchiveMonth, PostRevision, Tag
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=name, password='p') for name in ('author', 'reader', 'other')]
+
+
+def make_post(author, title='Doomed post'):
+    return Post.objects.create(title=title, body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+
+def test_post_is_hidden_then_deleted_in_batches(users):
+    author, reader, other = users
+    tag = Tag.objects.create(name='Patch', slug='patch', kind=Tag.Kind.PATCH)
+    post = make_post(author)
+    post.tags.add(tag)
+    for user in (reader, other):
+        Like.objects.create(post=post, user=user)
+    root = Comment.objects.create(post=post, author=reader, body='root')
+    reply = Comment.objects.create(post=post, author=other, body='reply', parent=root)
+    Comment.objects.create(post=post, author=other, body='reply to reply', parent=reply)
+    PostRevision.objects.create(post=post, number=1, title=post.title, is_snapshot=True, data=b'')
+
+    job = deletion.request_deletion(post, author)
+
+    post.refresh_from_db()
+    assert post.status == Post.Status.DELETING
+    assert Tag.objects.get(pk=tag.pk).posts_count == 0
+    assert deletion.remaining(job) == job.remaining_rows == 7
+
+    call_command('process_deletions', batch_size=2, pause=0, stdout=StringIO())
+
+    job.refresh_from_db()
+    assert job.status == DeletionJob.Status.DONE
+    assert job.batches == 5  # likes, 2 x comments, revisions, post
+    assert not Post.objects.filter(pk=post.pk).exists()
+    assert not Comment.objects.exists() and not Like.objects.exists()
+    assert AuthorStats.objects.get(user=author).likes_received == 0
+    assert AuthorStats.objects.get(user=other).comments_count == 0
+    assert AuthorStats.objects.get(user=author).posts_count == 0
+
+
+def test_user_deletion_takes_posts_likes_and_replies(users):
+    spammer, reader, other = users
+    own = make_post(spammer, 'Spam post')
+    Like.objects.create(post=own, user=reader)
+    victim = make_post(other, 'Victim post')
+    Like.objects.create(post=victim, user=spammer)
+    spam = Comment.objects.create(post=victim, author=spammer, body='spam')
+    Comment.objects.create(post=victim, author=reader, body='reply', parent=spam)
+    kept = Comment.objects.create(post=victim, author=reader, body='kept')
+
+    job = deletion.request_deletion(spammer)
+    spammer.refresh_from_db()
+    assert not spammer.is_active
+    # own post, its like; the like, comment and reply on the victim; the user
+    assert job.remaining_rows == 6
+    assert deletion.request_deletion(spammer) == job
+
+    steps = set()
+    while deletion.advance(job, batch_size=1):
+        steps.add(job.step)
+
+    assert steps == {'posts:likes', 'posts:post', 'likes', 'comments', 'user'}
+    assert job.remaining_rows == 0
+    assert not User.objects.filter(pk=spammer.pk).exists()
+    assert list(Comment.objects.all()) == [kept]
+    assert AuthorStats.objects.get(user=other).likes_received == 0
+    assert Post.objects.get(pk=victim.pk)
+
+
+def test_user_content_is_hidden_at_once_with_counters_fixed(users, client):
+    spammer, reader, other = users
+    tag = Tag.objects.create(name='Spam', slug='spam')
+    posts = [make_post(spammer, f'Spam {i}') for i in range(3)]
+    for post in posts:
+        post.tags.add(tag)
+    draft = Post.objects.create(title='Draft', body='x', author=spammer)
+    victim = make_post(other, 'Victim post')
+    Comment.objects.create(post=victim, author=spammer, body='spam')
+    Comment.objects.create(post=victim, author=spammer, body='held', status=Comment.Status.HIDDEN)
+    kept = Comment.objects.create(post=victim, author=reader, body='kept')
+    month = PostArchiveMonth.objects.get()
+    assert month.posts_count == 4
+    assert Post.objects.get(pk=victim.pk).trending_score > 0
+
+    deletion.request_deletion(spammer)
+
+    assert set(Post.objects.filter(author=spammer).values_list('status', flat=True)) == {Post.Status.DELETING}
+    assert draft.pk in Post.objects.filter(status=Post.Status.DELETING).values_list('pk', flat=True)
+    assert list(Comment.objects.exclude(status=Comment.Status.DELETING)) == [kept]
+    assert PostArchiveMonth.objects.get().posts_count == 1
+    assert PostArchiveMonth.objects.get().changed_at > month.changed_at
+    assert Tag.objects.get(pk=tag.pk).posts_count == 0
+    assert AuthorStats.objects.get(user=spammer).posts_count == 0
+    # only kept's weight is left
+    assert Post.objects.get(pk=victim.pk).trending_score == pytest.approx(settings.TRENDING_COMMENT_WEIGHT, rel=1e-3)
+    assert OutboxEvent.objects.filter(topic='post.unpublished').count() == 3
+
+    response = client.get(victim.get_absolute_url())
+    assert 'spam' not in response.content.decode()
+
+
+def test_deleting_post_is_out_of_the_queue_and_not_editable(users, client):
+    author = users[0]
+    post = Post.objects.create(title='Draft to delete', body='x', author=author)
+    deletion.request_deletion(post)
+    admin = User.objects.create_superuser(username='admin', password='p')
+
+    client.force_login(author)
+    assert client.get(reverse('post_edit', args=[post.pk])).status_code == 404
+    assert client.get(reverse('post_history', args=[post.pk])).status_code == 404
+
+    client.force_login(admin)
+    response = client.get(reverse('moderation_posts'))
+    assert 'Draft to delete' not in response.content.decode()
+    client.post(reverse('moderation_post_approve', args=[post.pk]))
+    assert Post.objects.get(pk=post.pk).status == Post.Status.DELETING
+
+
+def test_admin_delete_page_shows_counts_without_collecting(users, client):
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+    post = make_post(users[0])
+    for user in users[1:]:
+        Like.objects.create(post=post, user=user)
+        Comment.objects.create(post=post, author=user, body='hi')
+
+    response = client.get(reverse('admin:news_post_delete', args=[post.pk]))
+
+    assert response.status_code == 200
+    content = response.content.decode()
+    assert 'likes: 2' in content.lower() and 'comments: 2' in content.lower()
+
+    response = client.post(reverse('admin:news_post_delete', args=[post.pk]), {'post': 'yes'})
+    assert response.status_code == 302
+    assert DeletionJob.objects.filter(target_type='post', target_id=post.pk).exists()
+
+
+def test_failed_job_is_reported_and_kept(users, monkeypatch):
+    job = deletion.request_deletion(make_post(users[0]))
+
+    def broken(*args):
+        raise RuntimeError('lock timeout')
+
+    monkeypatch.setattr(deletion, 'delete_batch', broken)
+    err = StringIO()
+    call_command('process_deletions', stdout=StringIO(), stderr=err)
+
+    job.refresh_from_db()
+    assert job.status == DeletionJob.Status.FAILED
+    assert 'lock timeout' in job.error and 'lock timeout' in err.getvalue()
+
+
+def test_admin_action_queues_deletion(users, client):
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+    post = make_post(users[0])
+
+    response = client.post(
+        reverse('admin:news_post_changelist'),
+        {'action': 'delete_in_batches', '_selected_action': [post.pk]},
+    )
+
+    assert response.status_code == 302
+    assert Post.objects.get(pk=post.pk).status == Post.Status.DELETING
+    job = DeletionJob.objects.get(target_type='post', target_id=post.pk)
+    response = client.get(reverse('admin:moderation_deletionjob_changelist'))
+    assert response.status_code == 200
+    assert '1 (0% готово)' in response.content.decode()
+    assert job.label == post.title
@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+
+from moderation import duplicates
+from moderation.models import CommentFingerprint, CommentLSHBucket, ModerationAction, QueueClaim
+from news.models import Post, Comment
+
+SPAM = 'Лучшие ставки на The International! Заходи на dota-bets.example и получи бонус 500 рублей прямо сейчас'
+
+
+@pytest.fixture
+def posts(db):
+    author = User.objects.create_user(username='author', password='p')
+    return [
+        Post.objects.create(title=f'P{i}', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+        for i in range(3)
+    ]
+
+
+def comment_as(client, username, post, body):
+    user, _ = User.objects.get_or_create(username=username)
+    client.force_login(user)
+    url = reverse('comment_create', kwargs={'year': post.published_at.year, 'month': post.published_at.month, 'slug': post.slug})
+    client.post(url, {'body': body})
+    return Comment.objects.filter(author=user).latest('pk')
+
+
+def test_similarity_estimates_jaccard():
+    a = duplicates.minhash(duplicates.shingles(SPAM))
+    b = duplicates.minhash(duplicates.shingles(SPAM.replace('500', '700').upper()))
+    c = duplicates.minhash(duplicates.shingles('Обзор нового патча: Invoker стал сильнее на линии, а керри потеряли фарм'))
+    assert duplicates.similarity(a, b) > 0.7
+    assert duplicates.similarity(a, c) < 0.2
+
+
+@pytest.mark.django_db
+def test_near_duplicates_are_hidden_and_grouped(client, posts):
+    first = comment_as(client, 'bot1', posts[0], SPAM)
+    second = comment_as(client, 'bot2', posts[1], SPAM.replace('500', '700') + '!!')
+    other = comment_as(client, 'reader', posts[2], 'Обзор нового патча: Invoker стал сильнее на линии, а керри потеряли фарм')
+    short = comment_as(client, 'reader2', posts[2], 'gg wp')
+
+    assert first.status == Comment.Status.VISIBLE
+    assert second.status == Comment.Status.HIDDEN
+    assert other.status == Comment.Status.VISIBLE
+    assert not CommentFingerprint.objects.filter(comment=short).exists()
+    assert second.fingerprint.cluster_id == first.pk
+    assert other.fingerprint.cluster_id == other.pk
+    assert CommentLSHBucket.objects.filter(comment=first).count() == duplicates.BANDS
+
+    admin = User.objects.create_superuser(username='admin', password='p')
+    client.force_login(admin)
+    response = client.get(reverse('moderation_comments'))
+    assert [(c.pk, c.cluster_size) for c in response.context['comments']] == [(second.pk, 2)]
+
+    client.post(reverse('moderation_comment_cluster_hide', args=[first.pk]))
+    first.refresh_from_db()
+    assert first.status == Comment.Status.HIDDEN
+    assert ModerationAction.objects.filter(target_id=first.pk, action=ModerationAction.Action.HIDE).exists()
+
+
+@pytest.mark.django_db
+def test_short_spam_is_caught_but_short_replies_are_not(client, posts):
+    first = comment_as(client, 'bot1', posts[0], 'dota-bets.example')
+    second = comment_as(client, 'bot2', posts[1], 'DOTA-BETS.example!')
+    replies = [comment_as(client, f'fan{i}', posts[2], 'gg wp') for i in range(2)]
+
+    assert first.status == Comment.Status.VISIBLE
+    assert second.status == Comment.Status.HIDDEN
+    assert second.fingerprint.cluster_id == first.pk
+    assert [reply.status for reply in replies] == [Comment.Status.VISIBLE] * 2
+
+
+@pytest.mark.django_db
+def test_cluster_hide_is_all_or_nothing(client, posts, monkeypatch):
+    first = comment_as(client, 'bot1', posts[0], SPAM)
+    second = comment_as(client, 'bot2', posts[1], SPAM + '!')
+    Comment.objects.filter(pk=second.pk).update(status=Comment.Status.VISIBLE)
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+
+    def broken(*args, **kwargs):
+        raise RuntimeError('outbox down')
+
+    monkeypatch.setattr('core.outbox.emit_many', broken)
+    with pytest.raises(RuntimeError):
+        client.post(reverse('moderation_comment_cluster_hide', args=[first.pk]))
+
+    assert set(Comment.objects.values_list('status', flat=True)) == {Comment.Status.VISIBLE}
+    assert not ModerationAction.objects.exists()
+
+
+@pytest.mark.django_db
+def test_cluster_hide_leaves_comments_claimed_by_others(client, posts):
+    first = comment_as(client, 'bot1', posts[0], SPAM)
+    second = comment_as(client, 'bot2', posts[1], SPAM.replace('500', '700'))
+    third = comment_as(client, 'bot3', posts[2], SPAM + '!')
+    Comment.objects.filter(pk=second.pk).update(status=Comment.Status.VISIBLE)
+    admin, other = (User.objects.create_superuser(username=name, password='p') for name in ('admin', 'other'))
+    expires_at = timezone.now() + timedelta(minutes=5)
+    QueueClaim.objects.create(target_type='comment', target_id=second.pk, moderator=other, expires_at=expires_at)
+    QueueClaim.objects.create(target_type='comment', target_id=first.pk, moderator=admin, expires_at=expires_at)
+
+    client.force_login(admin)
+    client.post(reverse('moderation_comment_cluster_hide', args=[first.pk]))
+
+    assert Comment.objects.get(pk=first.pk).status == Comment.Status.HIDDEN
+    assert Comment.objects.get(pk=second.pk).status == Comment.Status.VISIBLE
+    assert third.status == Comment.Status.HIDDEN
+    assert list(QueueClaim.objects.values_list('target_id', flat=True)) == [second.pk]
+
+
+@pytest.mark.django_db
+def test_lookup_ignores_comments_outside_the_window(client, posts, settings):
+    first = comment_as(client, 'bot1', posts[0], SPAM)
+    settings.COMMENT_DUPLICATE_WINDOW_HOURS = 0
+    assert duplicates.prune() == duplicates.BANDS
+    second = comment_as(client, 'bot2', posts[1], SPAM)
+    assert second.status == Comment.Status.VISIBLE
+    assert second.fingerprint.cluster_id == second.pk != first.pk
@@ -0,0 +1,61 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone as dt_timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from moderation import exports
+from news.models import Post, Comment, Like
+
+
+@pytest.fixture
+def admin_client(client, db):
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+    return client
+
+
+def download(client, dataset, fmt, **params):
+    response = client.get(reverse('moderation_export', args=[dataset, fmt]), params)
+    assert response.status_code == 200
+    assert response.streaming
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_csv_and_jsonl_exports_with_date_range(admin_client, monkeypatch):
+    monkeypatch.setattr(exports, 'CHUNK_SIZE', 2)
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    for day in (1, 2, 3):
+        comment = Comment.objects.create(post=post, author=author, body=f'day, "{day}"')
+        Comment.objects.filter(pk=comment.pk).update(created_at=datetime(2024, 5, day, 12, tzinfo=dt_timezone.utc))
+
+    rows = list(csv.reader(io.StringIO(download(admin_client, 'comments', 'csv', since='2024-05-02'))))
+    assert rows[0] == exports.DATASETS['comments'][1]
+    assert [row[-1] for row in rows[1:]] == ['day, "2"', 'day, "3"']
+
+    lines = download(admin_client, 'comments', 'jsonl', since='2024-05-01', until='2024-05-02').splitlines()
+    assert [json.loads(line)['body'] for line in lines] == ['day, "1"', 'day, "2"']
+    assert json.loads(lines[0])['created_at'] == '2024-05-01T12:00:00+00:00'
+
+
+@pytest.mark.django_db
+def test_other_datasets_and_errors(admin_client):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Like.objects.create(post=post, user=author)
+    admin_client.post(reverse('moderation_post_reject', args=[post.pk]), {'reason': 'spam'})
+
+    assert json.loads(download(admin_client, 'likes', 'jsonl'))['user__username'] == 'author'
+    assert json.loads(download(admin_client, 'moderation-actions', 'jsonl'))['reason'] == 'spam'
+    assert admin_client.get(reverse('moderation_export', args=['users', 'csv'])).status_code == 404
+    assert admin_client.get(reverse('moderation_export', args=['likes', 'csv']), {'since': '2024-02-30'}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_exports_are_for_moderators_only(client):
+    client.force_login(User.objects.create_user(username='u', password='p'))
+    assert client.get(reverse('moderation_export', args=['likes', 'csv'])).status_code == 404
@@ -0,0 +1,82 @@
+from datetime import date, datetime, timezone as dt_timezone
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from moderation import rollups
+from moderation.models import DailyAuthorEngagement, DailyEngagement
+from news.models import Comment, Like, Post
+
+
+def at(day):
+    return datetime(2024, 5, day, 12, tzinfo=dt_timezone.utc)
+
+
+@pytest.fixture
+def activity(db):
+    author = User.objects.create_user(username='author', password='p')
+    reader = User.objects.create_user(username='reader', password='p')
+    post = Post.objects.create(title='Rolled up', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Post.objects.filter(pk=post.pk).update(published_at=at(1))
+    comment = Comment.objects.create(post=post, author=reader, body='first')
+    Comment.objects.filter(pk=comment.pk).update(created_at=at(2))
+    like = Like.objects.create(post=post, user=reader)
+    Like.objects.filter(pk=like.pk).update(created_at=at(2))
+    return author, reader, post
+
+
+def test_rollup_by_day_and_author(activity):
+    author, reader, post = activity
+
+    assert rollups.run(until=date(2024, 5, 3), chunk_days=2) == 3
+
+    assert list(DailyEngagement.objects.values_list('day', 'posts', 'comments', 'likes')) == [
+        (date(2024, 5, 1), 1, 0, 0),
+        (date(2024, 5, 2), 0, 1, 1),
+    ]
+    rows = DailyAuthorEngagement.objects.filter(day=date(2024, 5, 2))
+    assert {(row.author_id, row.posts, row.comments, row.likes_received) for row in rows} == {
+        (author.pk, 0, 0, 1),
+        (reader.pk, 0, 1, 0),
+    }
+    assert rollups.watermark() == date(2024, 5, 3)
+
+
+def test_next_run_starts_at_watermark(activity):
+    author, reader, post = activity
+    rollups.run(until=date(2024, 5, 3))
+    DailyEngagement.objects.filter(day=date(2024, 5, 1)).update(posts=42)
+    like = Like.objects.create(post=post, user=author)
+    Like.objects.filter(pk=like.pk).update(created_at=at(3))
+    comment = Comment.objects.create(post=post, author=author, body='later')
+    Comment.objects.filter(pk=comment.pk).update(created_at=at(4))
+
+    assert rollups.run(until=date(2024, 5, 4)) == 2
+
+    # days before the watermark are not recomputed
+    assert DailyEngagement.objects.get(day=date(2024, 5, 1)).posts == 42
+    assert DailyEngagement.objects.get(day=date(2024, 5, 3)).likes == 1
+    assert DailyEngagement.objects.get(day=date(2024, 5, 4)).comments == 1
+
+    call_command('rollup_engagement', since='2024-05-01', stdout=StringIO())
+    assert DailyEngagement.objects.get(day=date(2024, 5, 1)).posts == 1
+
+
+def test_dashboard_reads_rollups_only(activity, client):
+    rollups.run(until=date(2024, 5, 3))
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('moderation_engagement'), {'days': 7})
+
+    assert response.status_code == 200
+    assert [row.day for row in response.context['daily']][-1] == date(2024, 5, 3)
+    assert len(response.context['daily']) == 7
+    assert response.context['totals'] == {'posts': 1, 'comments': 1, 'likes': 1}
+    assert [row['author__username'] for row in response.context['authors']] == ['author', 'reader']
+    assert not any('news_like' in query['sql'] for query in queries.captured_queries)
@@ -0,0 +1,82 @@
+from datetime import datetime, timezone
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.template import Context, Template
+from django.urls import reverse
+
+from news.models import Post, PostArchiveMonth
+
+
+def month_count(dt):
+    row = PostArchiveMonth.objects.filter(year=dt.year, month=dt.month).first()
+    return row.posts_count if row else 0
+
+
+@pytest.mark.django_db
+def test_month_index_follows_publish_unpublish_and_delete():
+    user = User.objects.create_user(username='u', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED)
+    Post.objects.create(title='Draft', body='<p>ok</p>', author=user)
+    assert month_count(post.published_at) == 1
+
+    post = Post.objects.get(pk=post.pk)
+    post.status = Post.Status.DRAFT
+    post.save()
+    assert month_count(post.published_at) == 0
+
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    assert month_count(post.published_at) == 1
+
+    Post.objects.get(pk=post.pk).delete()
+    assert month_count(post.published_at) == 0
+
+
+@pytest.mark.django_db
+def test_approving_a_draft_persists_published_at_and_counts_it():
+    user = User.objects.create_user(username='u', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=user)
+    post.status = Post.Status.PUBLISHED
+    post.save(update_fields=['status', 'updated_at'])
+    post.refresh_from_db()
+    assert post.published_at is not None
+    assert month_count(post.published_at) == 1
+
+
+@pytest.mark.django_db
+def test_year_and_month_archive_pages(client):
+    user = User.objects.create_user(username='u', password='p')
+    old = Post.objects.create(title='Old news', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED,
+                              published_at=datetime(2024, 12, 31, 23, 0, tzinfo=timezone.utc))
+    new = Post.objects.create(title='New news', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED,
+                              published_at=datetime(2025, 1, 1, 0, 30, tzinfo=timezone.utc))
+
+    resp = client.get(reverse('post_archive_year', kwargs={'year': 2024}))
+    assert b'Old news' in resp.content and b'New news' not in resp.content
+
+    resp = client.get(reverse('post_archive_month', kwargs={'year': 2025, 'month': 1}))
+    assert b'New news' in resp.content and b'Old news' not in resp.content
+
+    assert client.get('/2025/13/').status_code == 404
+
+
+@pytest.mark.django_db
+def test_sidebar_reads_only_the_month_index(django_assert_num_queries):
+    user = User.objects.create_user(username='u', password='p')
+    Post.objects.create(title='A', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED,
+                        published_at=datetime(2025, 8, 10, tzinfo=timezone.utc))
+    with django_assert_num_queries(1):
+        html = Template('{% load news_tags %}{% archive_sidebar %}').render(Context())
+    assert '/2025/8/' in html and '(1)' in html
+
+
+@pytest.mark.django_db
+def test_rebuild_archive_index():
+    user = User.objects.create_user(username='u', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=user, status=Post.Status.PUBLISHED)
+    PostArchiveMonth.objects.all().delete()
+    call_command('rebuild_archive_index', stdout=StringIO())
+    assert month_count(post.published_at) == 1
@@ -0,0 +1,49 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.urls import reverse
+
+from news.models import Post, Comment
+
+
+@pytest.mark.django_db
+def test_post_card_fragment_reused_until_post_changes(client):
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Original', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+    resp = client.get(reverse('post_list'))
+    assert b'Original' in resp.content
+    key = make_template_fragment_key('post_card', [post.pk, post.updated_at.timestamp(), 0, 0])
+    assert cache.get(key) is not None
+
+    # bypasses save(), so updated_at and the fragment key stay the same
+    Post.objects.filter(pk=post.pk).update(title='Sneaky')
+    resp = client.get(reverse('post_interesting'))
+    assert b'Original' in resp.content
+
+    post.refresh_from_db()
+    post.title = 'Edited'
+    post.save()
+    resp = client.get(reverse('post_list'))
+    assert b'Edited' in resp.content
+
+
+@pytest.mark.django_db
+def test_comment_fragment_shared_between_users(client):
+    author = User.objects.create_user(username='author', password='p')
+    User.objects.create_user(username='reader', password='p')
+    post = Post.objects.create(title='P', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    comment = Comment.objects.create(post=post, author=author, body='<p>hello</p>')
+
+    client.login(username='author', password='p')
+    resp = client.get(post.get_absolute_url())
+    assert reverse('comment_delete', kwargs={'pk': comment.pk}).encode() in resp.content
+    key = make_template_fragment_key('comment', [comment.pk, comment.updated_at.timestamp()])
+    assert cache.get(key) is not None
+
+    # per-user controls are rendered outside the cached fragment
+    client.login(username='reader', password='p')
+    resp = client.get(post.get_absolute_url())
+    assert b'hello' in resp.content
+    assert reverse('comment_delete', kwargs={'pk': comment.pk}).encode() not in resp.content
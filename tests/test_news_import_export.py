@@ -0,0 +1,88 @@
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from accounts.models import AuthorStats
+from core.models import OutboxEvent
+from news import suggest
+from news.models import Post, Comment, Like, PostArchiveMonth, RelatedPost, Tag
+
+
+@pytest.mark.django_db
+def test_export_then_import_round_trip(tmp_path):
+    author = User.objects.create_user(username='author', password='p')
+    reader = User.objects.create_user(username='reader', password='p')
+    post = Post.objects.create(title='Patch 7.37', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    other = Post.objects.create(title='Invoker guide', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    tag = Tag.objects.create(name='7.37', slug='737', kind=Tag.Kind.PATCH)
+    post.tags.add(tag)
+    top = Comment.objects.create(post=post, author=reader, body='top')
+    Comment.objects.create(post=post, author=author, body='reply', parent=top)
+    Like.objects.create(post=post, user=reader)
+    Like.objects.create(post=other, user=reader)
+    created_at = Post.objects.get(pk=post.pk).created_at
+
+    dump = tmp_path / 'news.jsonl.gz'
+    call_command('export_news', str(dump), stderr=StringIO())
+
+    Post.objects.all().delete()
+    Tag.objects.all().delete()
+    User.objects.filter(username='reader').delete()
+    OutboxEvent.objects.all().delete()
+    assert not Comment.objects.exists()
+
+    call_command('import_news', str(dump), '--create-users', '--chunk-size', '1', stdout=StringIO(), stderr=StringIO())
+
+    imported = Post.objects.get(pk=post.pk)
+    assert imported.created_at == created_at
+    assert imported.slug == post.slug
+    assert Comment.objects.get(body='reply').parent_id == top.pk
+    assert Like.objects.filter(post=imported, user__username='reader').exists()
+    # counters rebuilt after the bulk load
+    assert PostArchiveMonth.objects.get(year=imported.published_at.year, month=imported.published_at.month).posts_count == 2
+    assert AuthorStats.objects.get(user=author).likes_received == 2
+    assert list(imported.tags.values_list('slug', 'kind', 'posts_count')) == [('737', Tag.Kind.PATCH, 1)]
+    assert imported.trending_score > Post.objects.get(pk=other.pk).trending_score > 0
+    assert list(RelatedPost.objects.filter(post=imported).values_list('related_id', flat=True)) == [other.pk]
+    assert [entry.pk for entry in suggest.suggest('invo')['posts']] == [other.pk]
+    assert sorted(OutboxEvent.objects.values_list('topic', flat=True)) == (
+        ['comment.created'] * 2 + ['like.created'] * 2 + ['post.published'] * 2
+    )
+
+
+@pytest.mark.django_db
+def test_import_sanitizes_and_skips_unknown_authors(tmp_path):
+    User.objects.create_user(username='author', password='p')
+    dump = tmp_path / 'in.jsonl'
+    rows = [
+        {'type': 'post', 'id': 10, 'title': 'X', 'body': '<script>x</script><p>ok</p>', 'author': 'author',
+         'status': 'published', 'published_at': '2025-08-01T10:00:00Z', 'created_at': '2025-08-01T09:00:00Z'},
+        {'type': 'post', 'id': 11, 'title': 'Y', 'body': 'y', 'author': 'ghost', 'created_at': '2025-08-01T09:00:00Z'},
+    ]
+    dump.write_text('\n'.join(json.dumps(r) for r in rows) + '\n')
+    err = StringIO()
+    call_command('import_news', str(dump), stdout=StringIO(), stderr=err)
+    assert '<script>' not in Post.objects.get(pk=10).body
+    assert not Post.objects.filter(pk=11).exists()
+    assert 'skipped 1' in err.getvalue()
+
+
+@pytest.mark.django_db
+def test_import_skips_comments_and_likes_of_skipped_posts(tmp_path):
+    User.objects.create_user(username='reader', password='p')
+    dump = tmp_path / 'in.jsonl'
+    created = '2025-08-01T09:00:00Z'
+    rows = [
+        {'type': 'post', 'id': 11, 'title': 'Y', 'body': 'y', 'author': 'ghost', 'created_at': created},
+        {'type': 'comment', 'id': 20, 'post_id': 11, 'author': 'reader', 'body': 'c', 'created_at': created},
+        {'type': 'comment', 'id': 21, 'post_id': 11, 'parent_id': 20, 'author': 'reader', 'body': 'r', 'created_at': created},
+        {'type': 'like', 'id': 30, 'post_id': 11, 'user': 'reader', 'created_at': created},
+    ]
+    dump.write_text('\n'.join(json.dumps(r) for r in rows) + '\n')
+    err = StringIO()
+    call_command('import_news', str(dump), chunk_size=2, stdout=StringIO(), stderr=err)
+    assert not Comment.objects.exists() and not Like.objects.exists()
+    assert 'skipped 4' in err.getvalue()
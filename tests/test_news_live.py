@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.db.models import Max
+from django.http import Http404
+
+from core import outbox
+from core.models import OutboxEvent
+from news import live
+from news.async_views import PostEventsView
+from news.models import Comment, Like, Post
+
+
+@pytest.fixture
+def posts(db, settings):
+    settings.LIVE_POLL_SECONDS = 0.01
+    settings.LIVE_KEEPALIVE_SECONDS = 0.05
+    settings.LIVE_MAX_SECONDS = 0.2
+    author = User.objects.create_user(username='author', password='p')
+    reader = User.objects.create_user(username='reader', password='p')
+    match, other = [
+        Post.objects.create(title=title, body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+        for title in ('Match thread', 'Other thread')
+    ]
+    return author, reader, match, other
+
+
+def last_event_id():
+    return OutboxEvent.objects.aggregate(last=Max('pk'))['last']
+
+
+def drain(queue):
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def test_one_poll_fans_out_to_every_reader(posts):
+    author, reader, match, other = posts
+    before = last_event_id()
+    Comment.objects.create(post=match, author=reader, body='gg wp')
+    Comment.objects.create(post=match, author=reader, body='spam', status=Comment.Status.HIDDEN)
+    Like.objects.create(post=match, user=reader)
+    Like.objects.create(post=match, user=author)
+    Like.objects.create(post=other, user=reader)
+
+    async def scenario():
+        first, second = live.hub.subscribe(match.pk), live.hub.subscribe(match.pk)
+        elsewhere = live.hub.subscribe(other.pk)
+        live.hub.task.cancel()
+        live.hub.cursor = outbox.Cursor(before)
+        await live.hub.poll()
+        for queue, post_id in ((first, match.pk), (second, match.pk), (elsewhere, other.pk)):
+            live.hub.unsubscribe(post_id, queue)
+        return drain(first), drain(second), drain(elsewhere)
+
+    first, second, elsewhere = async_to_sync(scenario)()
+
+    assert len(first) == 2
+    assert 'event: comment' in first[0] and 'gg wp' in first[0] and 'spam' not in first[0]
+    assert 'event: likes\ndata: {"count": 2}' in first[1]
+    # rendered once, shared by every reader of the post
+    assert all(a is b for a, b in zip(first, second))
+    assert len(elsewhere) == 1 and '"count": 1' in elsewhere[0]
+    assert not live.hub.subscribers
+
+
+def test_poll_picks_up_an_event_committed_after_a_later_one(posts):
+    author, reader, match, other = posts
+    before = last_event_id()
+    Comment.objects.create(post=match, author=reader, body='slow transaction')
+    Comment.objects.create(post=match, author=reader, body='fast transaction')
+    # the first event's transaction has not committed yet when the hub polls
+    slow = OutboxEvent.objects.get(pk=before + 1)
+    OutboxEvent.objects.filter(pk=slow.pk).delete()
+
+    async def scenario():
+        queue = live.hub.subscribe(match.pk)
+        live.hub.task.cancel()
+        live.hub.cursor = outbox.Cursor(before)
+        await live.hub.poll()
+        first = drain(queue)
+        await OutboxEvent.objects.abulk_create([slow])
+        await live.hub.poll()
+        live.hub.unsubscribe(match.pk, queue)
+        return first, drain(queue)
+
+    first, second = async_to_sync(scenario)()
+    assert len(first) == 1 and 'fast transaction' in first[0]
+    assert len(second) == 1 and 'slow transaction' in second[0]
+    assert not live.hub.cursor.gaps
+
+
+def test_stream_replays_missed_events_and_ends(posts):
+    author, reader, match, other = posts
+    before = last_event_id()
+    Comment.objects.create(post=match, author=reader, body='missed it')
+
+    async def collect():
+        chunks = [chunk async for chunk in live.stream(match.pk, last_event_id=before)]
+        await asyncio.sleep(0.05)  # let the watcher notice it has no readers left
+        return chunks
+
+    chunks = async_to_sync(collect)()
+
+    assert chunks[0] == 'retry: 3000\n\n'
+    assert 'missed it' in chunks[1]
+    assert ': keepalive\n\n' in chunks
+    assert live.hub.task.done() and live.hub.cursor is None
+
+
+def test_watcher_recycles_its_connection_like_a_request_would(posts, monkeypatch):
+    closed = []
+    monkeypatch.setattr(live, 'close_old_connections', lambda: closed.append(True))
+
+    async def watch_briefly():
+        queue = live.hub.subscribe(posts[2].pk)
+        await asyncio.sleep(0.05)
+        live.hub.unsubscribe(posts[2].pk, queue)
+        await asyncio.sleep(0.05)
+
+    async_to_sync(watch_briefly)()
+
+    # once before every poll
+    assert len(closed) >= 2
+
+
+def test_events_view(posts, async_rf):
+    author, reader, match, other = posts
+    draft = Post.objects.create(title='Draft thread', body='<p>ok</p>', author=author)
+
+    async def first_chunk(pk):
+        request = async_rf.get(f'/{pk}/events/')
+        request.user = AnonymousUser()
+        response = await PostEventsView.as_view()(request, pk=pk)
+        content = aiter(response.streaming_content)
+        chunk = await anext(content)
+        await content.aclose()
+        return response, chunk
+
+    response, chunk = async_to_sync(first_chunk)(match.pk)
+    assert response['Content-Type'] == 'text/event-stream'
+    assert response['Cache-Control'] == 'no-cache'
+    assert chunk == b'retry: 3000\n\n'
+    with pytest.raises(Http404):
+        async_to_sync(first_chunk)(draft.pk)
@@ -0,0 +1,73 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import OperationalError
+from django.db.models import QuerySet
+from django.urls import reverse
+
+from news import pageviews
+from news.models import Post
+
+
+@pytest.fixture
+def buffered(settings):
+    settings.POST_VIEWS_FLUSH_SIZE = 1000
+    settings.POST_VIEWS_FLUSH_SECONDS = 3600
+    pageviews._pending.clear()
+    yield
+    pageviews._pending.clear()
+
+
+@pytest.mark.django_db
+def test_views_are_deduplicated_and_flushed_in_batches(client, buffered):
+    author = User.objects.create_user(username='author', password='p')
+    User.objects.create_user(username='reader', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+    client.get(post.get_absolute_url())
+    client.get(post.get_absolute_url())
+    client.login(username='reader', password='p')
+    client.get(post.get_absolute_url())
+
+    post.refresh_from_db()
+    assert post.views_count == 0  # still buffered
+    assert pageviews.flush() == 1
+    post.refresh_from_db()
+    assert post.views_count == 2
+
+
+@pytest.mark.django_db
+def test_flush_size_triggers_write(client, settings, buffered):
+    settings.POST_VIEWS_FLUSH_SIZE = 1
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    client.get(post.get_absolute_url())
+    post.refresh_from_db()
+    assert post.views_count == 1
+
+
+@pytest.mark.django_db
+def test_most_read_ordering(client):
+    author = User.objects.create_user(username='author', password='p')
+    Post.objects.create(title='Quiet', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED, views_count=3)
+    Post.objects.create(title='Popular', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED, views_count=30)
+    resp = client.get(reverse('post_most_read'))
+    assert [p.title for p in resp.context['posts']] == ['Popular', 'Quiet']
+
+
+@pytest.mark.django_db
+def test_failed_flush_keeps_page_working_and_hits(client, settings, buffered, monkeypatch):
+    settings.POST_VIEWS_FLUSH_SIZE = 1
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+
+    def locked(self, **kwargs):
+        raise OperationalError('database is locked')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(QuerySet, 'update', locked)
+        assert client.get(post.get_absolute_url()).status_code == 200
+
+    assert pageviews._pending[post.pk] == 1
+    assert pageviews.flush() == 1
+    post.refresh_from_db()
+    assert post.views_count == 1
@@ -0,0 +1,119 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+
+from core.models import OutboxEvent
+from news import related
+from news.models import Post, Like, RelatedPost
+from news.views import PostDetailView
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f'u{i}', password='p') for i in range(4)]
+
+
+def make_posts(author, n):
+    return [
+        Post.objects.create(title=f'P{i}', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+        for i in range(n)
+    ]
+
+
+def like(users, *posts):
+    for user in users:
+        for post in posts:
+            Like.objects.create(post=post, user=user)
+
+
+@pytest.mark.django_db
+def test_cosine_similarity_ranks_co_liked_posts(users):
+    a, b, c, d = make_posts(users[0], 4)
+    like(users[:2], a, b)
+    like(users[2:3], a, c)
+    like(users[3:], d)
+
+    neighbours = related.similar_posts([a.pk])[a.pk]
+    assert [post_id for post_id, _ in neighbours] == [b.pk, c.pk]
+    # a: 3 likes, b: 2 likes, 2 in common
+    assert neighbours[0][1] == pytest.approx(2 / (3 * 2) ** 0.5)
+
+
+@pytest.mark.django_db
+def test_drafts_and_heavy_likers_are_ignored(users, monkeypatch):
+    a, b, c = make_posts(users[0], 3)
+    Post.objects.filter(pk=c.pk).update(status=Post.Status.DRAFT)
+    like(users[:1], a, b, c)
+    assert [post_id for post_id, _ in related.similar_posts([a.pk])[a.pk]] == [b.pk]
+
+    monkeypatch.setattr(related, 'MAX_USER_LIKES', 2)
+    assert related.similar_posts([a.pk]) == {}
+
+
+@pytest.mark.django_db
+def test_command_is_incremental(users):
+    a, b, c = make_posts(users[0], 3)
+    like(users[:1], a, b)
+    call_command('compute_related_posts', stdout=StringIO())
+    assert list(RelatedPost.objects.filter(post=a).values_list('related_id', flat=True)) == [b.pk]
+
+    like(users[1:2], a, c)
+    assert set(related.posts_to_refresh(related.cursor())) == {a.pk, c.pk}
+    call_command('compute_related_posts', stdout=StringIO())
+    assert set(RelatedPost.objects.filter(post=a).values_list('related_id', flat=True)) == {b.pk, c.pk}
+    assert list(RelatedPost.objects.filter(post=c).values_list('related_id', flat=True)) == [a.pk]
+
+    # nothing new: nothing recomputed, even though c's reader left no neighbours for b
+    out = StringIO()
+    call_command('compute_related_posts', stdout=out)
+    assert 'for 0 posts' in out.getvalue()
+
+
+def refreshed(**options) -> str:
+    out = StringIO()
+    call_command('compute_related_posts', stdout=out, **options)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_unlike_and_late_like_are_picked_up(users):
+    a, b, c = make_posts(users[0], 3)
+    like(users[:1], a, b)
+    like(users[1:2], a, c)
+    refreshed()
+    assert set(RelatedPost.objects.filter(post=a).values_list('related_id', flat=True)) == {b.pk, c.pk}
+
+    Like.objects.get(post=c, user=users[1]).delete()
+    refreshed()
+    assert list(RelatedPost.objects.filter(post=a).values_list('related_id', flat=True)) == [b.pk]
+    assert not RelatedPost.objects.filter(post=c).exists()
+
+    # a like whose transaction commits after a later one has been read
+    Like.objects.create(post=b, user=users[2])
+    late = OutboxEvent.objects.latest('pk')
+    OutboxEvent.objects.filter(pk=late.pk).delete()
+    Like.objects.create(post=c, user=users[3])
+    assert 'for 1 posts' in refreshed()
+    late.save()
+    assert 'for 1 posts' in refreshed()
+    assert 'for 0 posts' in refreshed()
+
+
+@pytest.mark.django_db
+def test_detail_page_shows_related_posts(client, users, django_assert_num_queries):
+    a, b = make_posts(users[0], 2)
+    like(users[:1], a, b)
+    call_command('compute_related_posts', '--full', stdout=StringIO())
+
+    with django_assert_num_queries(1):
+        assert [link.related for link in PostDetailView().get_related_posts(a)] == [b]
+
+    response = client.get(a.get_absolute_url())
+    assert response.context['related_posts'] == [b]
+    assert 'Читайте также' in response.content.decode()
+
+    Post.objects.filter(pk=b.pk).update(status=Post.Status.DRAFT)
+    response = client.get(a.get_absolute_url())
+    assert response.context['related_posts'] == []
@@ -0,0 +1,113 @@
+import pytest
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.urls import reverse
+
+from moderation.models import BlockedWord
+from news import revisions
+from news.models import Post, PostRevision
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='author', password='p')
+
+
+def body(i):
+    lines = [f'<p>line {n}</p>' for n in range(200)]
+    lines[i % 200] = f'<p>edited in version {i}</p>'
+    return '\n'.join(lines)
+
+
+def test_delta_roundtrip():
+    old = 'a\nb\nc\n'
+    new = 'a\nB\nc\nd'
+    assert revisions.apply_delta(old, revisions.make_delta(old, new)) == new
+
+
+@pytest.mark.django_db
+def test_revisions_are_deltas_between_snapshots(author, settings, django_assert_max_num_queries):
+    settings.POST_REVISION_SNAPSHOT_EVERY = 4
+    post = Post.objects.create(title='Patch 7.36', body=body(0), author=author)
+    for i in range(10):
+        post.body = body(i)
+        post.save()
+        revisions.record_revision(post, author)
+    assert revisions.record_revision(post, author) is None
+
+    stored = list(PostRevision.objects.filter(post=post).order_by('number').values_list('number', 'is_snapshot'))
+    assert [n for n, snap in stored if snap] == [1, 5, 9]
+    delta = PostRevision.objects.get(post=post, number=3)
+    assert len(delta.data) < len(body(2).encode()) // 5
+
+    for number in range(1, 11):
+        assert revisions.body_at(post, number) == body(number - 1)
+    with django_assert_max_num_queries(2):
+        revisions.body_at(post, 8)
+
+
+@pytest.mark.django_db
+def test_edit_history_diff_and_restore(client, author):
+    client.force_login(author)
+    post = Post.objects.create(title='Old', body='<p>first</p>', author=author)
+    # a post from before revision history: its stored version becomes r1
+    client.post(reverse('post_edit', args=[post.pk]), {
+        'title': 'New', 'summary': '', 'body': '<p>second</p>', 'status': Post.Status.DRAFT,
+    })
+    assert list(post.revisions.order_by('number').values_list('number', 'title')) == [(1, 'Old'), (2, 'New')]
+
+    response = client.get(reverse('post_history', args=[post.pk]))
+    assert [r.number for r in response.context['revisions']] == [2, 1]
+
+    response = client.get(reverse('post_revision_diff', args=[post.pk, 2]))
+    assert response.context['diff_lines'][1:] == ['-<p>first</p>', '+<p>second</p>']
+    assert response.context['title_changed']
+
+    client.post(reverse('post_revision_restore', args=[post.pk, 1]))
+    post.refresh_from_db()
+    assert (post.title, post.body) == ('Old', '<p>first</p>')
+    assert post.revisions.count() == 3
+
+
+@pytest.mark.django_db
+def test_history_is_private_to_the_author(client, author):
+    post = Post.objects.create(title='A', body='<p>x</p>', author=author)
+    revisions.record_revision(post, author)
+    other = User.objects.create_user(username='other', password='p')
+    client.force_login(other)
+    assert client.get(reverse('post_history', args=[post.pk])).status_code == 404
+    assert client.post(reverse('post_revision_restore', args=[post.pk, 1])).status_code == 404
+
+
+@pytest.mark.django_db
+def test_restoring_a_revision_with_blocked_words_holds_the_post(client, author):
+    client.force_login(author)
+    post = Post.objects.create(title='Draft', body='<p>лучшее казино</p>', author=author)
+    revisions.record_revision(post, author)
+    client.post(reverse('post_edit', args=[post.pk]), {
+        'title': 'Clean', 'summary': '', 'body': '<p>ok</p>', 'status': Post.Status.PUBLISHED,
+    })
+    BlockedWord.objects.create(phrase='казино')
+
+    client.post(reverse('post_revision_restore', args=[post.pk, 1]))
+    post.refresh_from_db()
+    assert post.body == '<p>лучшее казино</p>'
+    assert post.status == Post.Status.DRAFT
+
+
+@pytest.mark.django_db
+def test_edit_is_not_saved_without_its_revision(client, author, monkeypatch):
+    client.force_login(author)
+    post = Post.objects.create(title='Old', body='<p>first</p>', author=author)
+    revisions.record_revision(post, author)
+
+    def clash(*args, **kwargs):
+        raise IntegrityError('unique_post_revision_number')
+
+    monkeypatch.setattr(revisions, 'record_revision', clash)
+    with pytest.raises(IntegrityError):
+        client.post(reverse('post_edit', args=[post.pk]), {
+            'title': 'New', 'summary': '', 'body': '<p>second</p>', 'status': Post.Status.DRAFT,
+        })
+    post.refresh_from_db()
+    assert (post.title, post.body) == ('Old', '<p>first</p>')
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone as dt_timezone
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+
+from news.models import Post
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='author', password='p')
+
+
+def publish(author, title, when):
+    post = Post.objects.create(title=title, body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED, published_at=when)
+    return Post.objects.get(pk=post.pk)
+
+
+def shard(client, year, month):
+    response = client.get(reverse('sitemap_shard', args=[year, month]))
+    assert response['Content-Type'] == 'application/xml'
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+def test_index_lists_months_with_posts(client, author):
+    publish(author, 'Jan', datetime(2024, 1, 10, tzinfo=dt_timezone.utc))
+    publish(author, 'Mar', datetime(2024, 3, 10, tzinfo=dt_timezone.utc))
+    body = client.get(reverse('sitemap_index')).content.decode()
+    assert 'http://testserver/sitemap-2024-1.xml' in body
+    assert 'http://testserver/sitemap-2024-3.xml' in body
+    assert 'sitemap-2024-2.xml' not in body
+
+
+@pytest.mark.django_db
+def test_shard_is_cached_until_its_month_changes(client, author, django_assert_num_queries):
+    jan = publish(author, 'Jan post', datetime(2024, 1, 10, tzinfo=dt_timezone.utc))
+    mar = publish(author, 'Mar post', datetime(2024, 3, 10, tzinfo=dt_timezone.utc))
+    Post.objects.create(title='Draft', body='<p>ok</p>', author=author)
+
+    body = shard(client, 2024, 1)
+    assert f'<loc>http://testserver{jan.get_absolute_url()}</loc>' in body
+    assert mar.get_absolute_url() not in body
+    # only the month's version is read from the database
+    with django_assert_num_queries(1):
+        assert shard(client, 2024, 1) == body
+
+    # a change in another month leaves this shard cached
+    mar.title = 'Edited'
+    mar.save()
+    with django_assert_num_queries(1):
+        shard(client, 2024, 1)
+
+    second = publish(author, 'Second Jan', datetime(2024, 1, 20, tzinfo=dt_timezone.utc))
+    assert second.get_absolute_url() in shard(client, 2024, 1)
+
+    jan.status = Post.Status.DRAFT
+    jan.save()
+    assert jan.get_absolute_url() not in shard(client, 2024, 1)
+
+
+@pytest.mark.django_db
+def test_invalid_month_is_404(client):
+    assert client.get('/sitemap-2024-13.xml').status_code == 404
+
+
+@pytest.mark.django_db
+def test_edit_in_another_process_drops_cached_shard(client, author, monkeypatch):
+    jan = publish(author, 'Jan post', datetime(2024, 1, 10, tzinfo=dt_timezone.utc))
+    shard(client, 2024, 1)
+
+    # the edit happens elsewhere: nothing it writes reaches this process's cache
+    with monkeypatch.context() as m:
+        for method in ('set', 'add', 'incr', 'delete'):
+            m.setattr(cache, method, lambda *args, **kwargs: None)
+        jan.slug = 'renamed'
+        jan.save()
+    assert '/renamed/' in shard(client, 2024, 1)
@@ -0,0 +1,100 @@
+import pytest
+from django.contrib.auth.models import User
+from django.urls import reverse
+
+from news import suggest
+from news.models import Post, SuggestChange
+
+
+@pytest.fixture(autouse=True)
+def fresh_index():
+    # the index lives in the process; start every test from an unbuilt one
+    suggest.index.load([], None)
+
+
+def labels(client, q, kind):
+    return [item['label'] for item in client.get(reverse('suggest'), {'q': q}).json()[kind]]
+
+
+def test_normalize_folds_case_and_yo():
+    assert suggest.normalize('  Ёжик, В ТУМАНЕ! ') == 'ежик в тумане'
+
+
+@pytest.mark.django_db
+def test_suggests_titles_and_usernames_without_queries(client, django_assert_num_queries):
+    author = User.objects.create_user(username='Ёлка', password='p')
+    User.objects.create_user(username='elka_fan', password='p')
+    Post.objects.create(title='Патч 7.36: Invoker и Ёж', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    Post.objects.create(title='Draft about Invoker', body='<p>ok</p>', author=author)
+
+    assert labels(client, 'ел', 'users') == ['Ёлка']
+    with django_assert_num_queries(0):
+        assert labels(client, 'INVO', 'posts') == ['Патч 7.36: Invoker и Ёж']
+        assert labels(client, 'патч 7', 'posts') == ['Патч 7.36: Invoker и Ёж']
+        assert labels(client, 'еж', 'posts') == ['Патч 7.36: Invoker и Ёж']
+        assert labels(client, 'elka', 'users') == ['elka_fan']
+        assert labels(client, '', 'posts') == []
+
+
+@pytest.mark.django_db
+def test_signals_keep_the_index_current(client, django_capture_on_commit_callbacks):
+    def committed(change):
+        with django_capture_on_commit_callbacks(execute=True):
+            change()
+
+    author = User.objects.create_user(username='author', password='p')
+    post = Post.objects.create(title='Old title', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    assert labels(client, 'old', 'posts') == ['Old title']
+
+    post.title = 'New title'
+    committed(post.save)
+    assert labels(client, 'old', 'posts') == []
+    assert labels(client, 'new', 'posts') == ['New title']
+
+    post.status = Post.Status.DRAFT
+    committed(post.save)
+    assert labels(client, 'new', 'posts') == []
+
+    author.username = 'renamed'
+    committed(author.save)
+    assert labels(client, 'auth', 'users') == []
+    assert labels(client, 'ren', 'users') == ['renamed']
+    committed(author.delete)
+    assert labels(client, 'ren', 'users') == []
+
+
+@pytest.mark.django_db
+def test_changes_made_elsewhere_are_replayed(client, settings, django_assert_num_queries):
+    author = User.objects.create_user(username='author', password='p')
+    suggest.warm()
+    # another process published a post and logged it
+    post = Post.objects.bulk_create([Post(title='Bulk', slug='bulk', body='x', author=author, status=Post.Status.PUBLISHED, published_at=author.date_joined)])[0]
+    SuggestChange.objects.create(kind='post', target_id=post.pk, label='Bulk', url=post.get_absolute_url())
+    assert labels(client, 'bulk', 'posts') == []
+    # noticed on the first lookup after SUGGEST_CHECK_SECONDS, without a rebuild
+    settings.SUGGEST_CHECK_SECONDS = 0
+    with django_assert_num_queries(1):
+        assert [entry.label for entry in suggest.suggest('bulk')['posts']] == ['Bulk']
+    SuggestChange.objects.create(kind='post', target_id=post.pk)
+    assert labels(client, 'bulk', 'posts') == []
+
+
+def test_change_applies_locally_only_once_committed(db, django_capture_on_commit_callbacks):
+    suggest.warm()
+    with django_capture_on_commit_callbacks() as callbacks:
+        User.objects.create_user(username='rolled_back', password='p')
+    assert suggest.suggest('rolled')['users'] == []
+    callbacks[0]()
+    assert [entry.label for entry in suggest.suggest('rolled')['users']] == ['rolled_back']
+
+
+def test_invalidate_makes_other_processes_rebuild(db, settings, django_capture_on_commit_callbacks):
+    author = User.objects.create_user(username='author', password='p')
+    suggest.warm()
+    Post.objects.bulk_create([Post(title='Imported', slug='imported', body='x', author=author, status=Post.Status.PUBLISHED, published_at=author.date_joined)])
+    # logged by a bulk load elsewhere; this process only sees the row
+    with django_capture_on_commit_callbacks():
+        suggest.invalidate()
+    assert suggest.suggest('impo')['posts'] == []
+    settings.SUGGEST_CHECK_SECONDS = 0
+    assert [entry.label for entry in suggest.suggest('impo')['posts']] == ['Imported']
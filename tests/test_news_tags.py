@@ -0,0 +1,101 @@
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.models import Post, Tag
+
+
+@pytest.fixture
+def author(db):
+    return User.objects.create_user(username='author', password='p')
+
+
+@pytest.fixture
+def tags(db):
+    return [
+        Tag.objects.create(name='Invoker', kind=Tag.Kind.HERO),
+        Tag.objects.create(name='7.36', slug='7-36', kind=Tag.Kind.PATCH),
+    ]
+
+
+def counts(tags):
+    return [Tag.objects.get(pk=tag.pk).posts_count for tag in tags]
+
+
+@pytest.mark.django_db
+def test_counts_follow_tagging_and_publishing(author, tags):
+    invoker, patch = tags
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author)
+    post.tags.set(tags)
+    assert counts(tags) == [0, 0]
+
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    assert counts(tags) == [1, 1]
+
+    post.tags.remove(patch)
+    post.tags.remove(patch)
+    assert counts(tags) == [1, 0]
+
+    patch.posts.add(post)
+    assert counts(tags) == [1, 1]
+
+    invoker.posts.clear()
+    assert counts(tags) == [0, 1]
+
+    post.status = Post.Status.DRAFT
+    post.save()
+    assert counts(tags) == [0, 0]
+
+    post.status = Post.Status.PUBLISHED
+    post.save()
+    post.delete()
+    assert counts(tags) == [0, 0]
+
+
+@pytest.mark.django_db
+def test_rebuild_command(author, tags):
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+    post.tags.set(tags)
+    Post.objects.create(title='B', body='<p>ok</p>', author=author).tags.set(tags)
+    Tag.objects.update(posts_count=42)
+    call_command('rebuild_tag_counts', stdout=StringIO())
+    assert counts(tags) == [1, 1]
+
+
+@pytest.mark.django_db
+def test_post_form_sets_tags(client, author, tags):
+    client.force_login(author)
+    response = client.post(reverse('post_create'), {
+        'title': 'Tagged', 'summary': '', 'body': '<p>ok</p>', 'status': Post.Status.PUBLISHED,
+        'tags': [tags[0].pk],
+    })
+    assert response.status_code == 302
+    post = Post.objects.get(title='Tagged')
+    assert list(post.tags.all()) == [tags[0]]
+    assert counts(tags) == [1, 0]
+
+
+@pytest.mark.django_db
+def test_tag_pages(client, author, tags):
+    for i in range(3):
+        post = Post.objects.create(title=f'P{i}', body='<p>ok</p>', author=author, status=Post.Status.PUBLISHED)
+        post.tags.add(tags[0])
+    Post.objects.create(title='Draft', body='<p>ok</p>', author=author).tags.add(tags[0])
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(reverse('tag_detail', args=[tags[0].slug]))
+    assert response.status_code == 200
+    assert len(response.context['posts']) == 3
+    assert response.context['paginator'].count == 3
+    # the page count comes from Tag.posts_count
+    assert not any('COUNT(*)' in q['sql'] for q in queries.captured_queries)
+
+    response = client.get(reverse('tag_list'))
+    assert list(response.context['tags']) == [tags[0]]
+    assert client.get(reverse('tag_detail', args=['nope'])).status_code == 404
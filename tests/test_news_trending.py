@@ -0,0 +1,83 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+
+from news.models import Post, Comment, Like
+
+
+@pytest.fixture
+def users(db):
+    return [User.objects.create_user(username=f'u{i}', password='p') for i in range(3)]
+
+
+def score(post):
+    return Post.objects.get(pk=post.pk).trending_score
+
+
+@pytest.mark.django_db
+def test_likes_and_comments_bump_score(users, settings):
+    settings.TRENDING_LIKE_WEIGHT = 1.0
+    settings.TRENDING_COMMENT_WEIGHT = 2.0
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    like = Like.objects.create(post=post, user=users[1])
+    Comment.objects.create(post=post, author=users[2], body='hi')
+    assert score(post) == pytest.approx(3.0, rel=1e-3)
+
+    like.delete()
+    assert score(post) == pytest.approx(2.0, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_decay_job_halves_score_after_half_life(users, settings):
+    settings.TRENDING_HALF_LIFE_HOURS = 24
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    Post.objects.filter(pk=post.pk).update(trending_score=8.0, trending_at=timezone.now() - timedelta(hours=48))
+    call_command('decay_trending_scores', stdout=StringIO())
+    assert score(post) == pytest.approx(2.0, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_rebuild_weights_events_by_age(users, settings):
+    settings.TRENDING_HALF_LIFE_HOURS = 24
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    like = Like.objects.create(post=post, user=users[1])
+    Like.objects.filter(pk=like.pk).update(created_at=timezone.now() - timedelta(hours=24))
+    Post.objects.filter(pk=post.pk).update(trending_score=0, trending_at=None)
+    call_command('decay_trending_scores', '--rebuild', stdout=StringIO())
+    assert score(post) == pytest.approx(0.5, rel=1e-3)
+
+
+@pytest.mark.django_db
+def test_fresh_activity_outranks_old_popularity(client, users):
+    old = Post.objects.create(title='Old hit', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    new = Post.objects.create(title='Fresh', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    Post.objects.filter(pk=old.pk).update(trending_score=10.0, trending_at=timezone.now() - timedelta(days=7))
+    Like.objects.create(post=new, user=users[1])
+    call_command('decay_trending_scores', stdout=StringIO())
+
+    resp = client.get(reverse('post_trending'))
+    posts = list(resp.context['posts'])
+    assert [p.title for p in posts] == ['Fresh', 'Old hit']
+    assert posts[0].likes_count == 1
+
+
+@pytest.mark.django_db
+def test_hiding_a_comment_takes_its_weight_back(users, client, settings):
+    settings.TRENDING_COMMENT_WEIGHT = 2.0
+    post = Post.objects.create(title='A', body='<p>ok</p>', author=users[0], status=Post.Status.PUBLISHED)
+    comment = Comment.objects.create(post=post, author=users[1], body='hi')
+    client.force_login(User.objects.create_superuser(username='admin', password='p'))
+
+    client.post(reverse('moderation_comment_hide', args=[comment.pk]))
+    assert score(post) == pytest.approx(0.0, abs=1e-3)
+
+    client.post(reverse('moderation_comment_unhide', args=[comment.pk]))
+    assert score(post) == pytest.approx(2.0, rel=1e-3)
+
+    Comment.objects.get(pk=comment.pk).save()  # edits without a status change do not count
+    assert score(post) == pytest.approx(2.0, rel=1e-3)
@@ -0,0 +1,48 @@
+import sqlite3
+
+import pytest
+from django.db.utils import ConnectionHandler
+
+
+@pytest.fixture
+def production_sqlite(tmp_path, django_db_blocker):
+    handler = ConnectionHandler({
+        'default': {
+            'ENGINE': 'core.sqlite_backend',
+            'NAME': str(tmp_path / 'prod.sqlite3'),
+            'OPTIONS': {'pragmas': {'busy_timeout': 100}},
+        },
+    })
+    connection = handler['default']
+    # a private database file, not the test database
+    with django_db_blocker.unblock():
+        yield connection
+        connection.close()
+
+
+def test_pragmas_applied_on_connect(production_sqlite):
+    with production_sqlite.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        assert cursor.fetchone()[0] == 'wal'
+        cursor.execute('PRAGMA synchronous')
+        assert cursor.fetchone()[0] == 1  # NORMAL
+        cursor.execute('PRAGMA busy_timeout')
+        assert cursor.fetchone()[0] == 100
+
+
+def test_transactions_take_write_lock_immediately(production_sqlite, tmp_path):
+    with production_sqlite.cursor() as cursor:
+        cursor.execute('CREATE TABLE t (x integer)')
+
+    production_sqlite.set_autocommit(False, force_begin_transaction_with_broken_autocommit=True)
+    try:
+        other = sqlite3.connect(str(tmp_path / 'prod.sqlite3'), timeout=0)
+        # readers are not blocked in WAL mode ...
+        assert other.execute('SELECT count(*) FROM t').fetchone() == (0,)
+        # ... but a second writer is, even before the first one wrote anything
+        with pytest.raises(sqlite3.OperationalError, match='locked'):
+            other.execute('BEGIN IMMEDIATE')
+        other.close()
+    finally:
+        production_sqlite.rollback()
+        production_sqlite.set_autocommit(True)